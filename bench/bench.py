@@ -0,0 +1,214 @@
+"""端到端延迟基准：在本地模拟服务上反复运行 main.py 命令和示例客户端菜单，报告 p50/p95/p99
+
+    python bench/bench.py --runs 20 --latency 50 --jitter 20
+    python bench/bench.py --output base.json            # 保存结果
+    python bench/bench.py --compare base.json           # 与之前的结果对比
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_etrade import add_arguments, config_from_args, start_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_DIR = os.path.join(ROOT, "example", "etrade_python_client")
+
+# main.py 命令 (argv)
+CLI_COMMANDS = {
+    "account list": ["account", "list"],
+    "account list --refresh": ["account", "list", "--refresh"],
+    "account balance": ["account", "balance"],
+    "account positions": ["account", "positions"],
+}
+
+# stderr 中出现这些内容也记为失败：run() 打印的认证/配额错误、未捕获的异常
+ERROR_MARKERS = ("错误:", "Traceback")
+
+class MenuExit(Exception):
+    """示例客户端菜单等待输入时抛出，用于结束一次测量"""
+
+def write_config(directory, base_url, rate_limit):
+    """生成指向模拟服务的 config.ini"""
+    lines = ["[DEFAULT]",
+             "CONSUMER_KEY = bench_consumer_key",
+             "CONSUMER_SECRET = bench_consumer_secret",
+             f"SANDBOX_BASE_URL = {base_url}",
+             f"PROD_BASE_URL = {base_url}",
+             "ACCESS_TOKEN = bench_access_token",
+             "ACCESS_TOKEN_SECRET = bench_access_secret"]
+    if not rate_limit:
+        lines += ["RATE_LIMIT_MARKET = 0", "RATE_LIMIT_ACCOUNTS = 0", "RATE_LIMIT_ORDERS = 0"]
+    with open(os.path.join(directory, "config.ini"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def percentile(sorted_samples, pct):
+    """最近秩法百分位数"""
+    if not sorted_samples:
+        return 0.0
+    index = max(int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+def summarize(samples, errors):
+    ordered = sorted(samples)
+    return {"runs": len(samples), "errors": errors,
+            "p50": percentile(ordered, 50), "p95": percentile(ordered, 95), "p99": percentile(ordered, 99),
+            "mean": statistics.fmean(ordered) if ordered else 0.0}
+
+def bench_cli(workdir, argv, runs, warmup):
+    """以子进程方式运行 main.py，测量包含解释器启动在内的总耗时；退出码非 0 或 stderr 有错误标记记为失败"""
+    samples = []
+    errors = 0
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, os.path.join(ROOT, "main.py")] + argv, cwd=workdir,
+                                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        elapsed = time.perf_counter() - start
+        if i < warmup:
+            continue
+        stderr = result.stderr.decode(errors="replace")
+        if result.returncode != 0 or any(marker in stderr for marker in ERROR_MARKERS):
+            errors += 1
+        samples.append(elapsed)
+    return summarize(samples, errors)
+
+def start_daemon(workdir, timeout=10):
+    """在 workdir 中启动 main.py daemon，等到 socket 出现"""
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "daemon"], cwd=workdir,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(os.path.join(workdir, ".etrade_daemon.sock")):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("守护进程启动失败")
+        time.sleep(0.05)
+    return process
+
+def stop_daemon(workdir, process):
+    subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), "daemon", "stop"], cwd=workdir,
+                   stdout=subprocess.DEVNULL)
+    process.wait(timeout=10)
+
+def bench_menus(workdir, base_url, runs, warmup):
+    """在进程内驱动示例客户端的 Accounts / Order 菜单"""
+    os.chdir(workdir)
+    sys.path.insert(0, EXAMPLE_DIR)
+    import configparser
+    from rauth import OAuth1Session
+    from accounts.accounts import Accounts
+    from order.order import Order
+    from transport.transport import configure_transport
+
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    session = configure_transport(OAuth1Session(config["DEFAULT"]["CONSUMER_KEY"],
+                                                config["DEFAULT"]["CONSUMER_SECRET"],
+                                                config["DEFAULT"]["ACCESS_TOKEN"],
+                                                config["DEFAULT"]["ACCESS_TOKEN_SECRET"]),
+                                  config["DEFAULT"])
+    account = {"accountIdKey": "key0", "accountId": "80000000", "institutionType": "BROKERAGE"}
+
+    def accounts_menu(action):
+        accounts = Accounts(session, base_url)
+        accounts.account = account
+        return getattr(accounts, action)
+
+    menus = {
+        "Accounts.balance": accounts_menu("balance"),
+        "Accounts.portfolio": accounts_menu("portfolio"),
+        "Order.view_orders": Order(session, account, base_url).view_orders,
+    }
+
+    def no_input(*args):
+        raise MenuExit()
+
+    results = {}
+    original_input = builtins.input
+    builtins.input = no_input
+    try:
+        for name, action in menus.items():
+            samples = []
+            errors = 0
+            for i in range(warmup + runs):
+                start = time.perf_counter()
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        action()
+                except MenuExit:
+                    pass
+                except Exception:
+                    errors += 1
+                elapsed = time.perf_counter() - start
+                if i >= warmup:
+                    samples.append(elapsed)
+            results[name] = summarize(samples, errors)
+    finally:
+        builtins.input = original_input
+    return results
+
+def print_report(results, baseline=None):
+    print(f"\n{'命令':<32} | {'次数':>4} | {'失败':>4} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'p99 (ms)':>9} | {'均值 (ms)':>9}"
+          + (" | 对比 p50" if baseline else ""))
+    print("-" * (104 if baseline else 92))
+    for name, r in results.items():
+        line = (f"{name:<32} | {r['runs']:>4} | {r['errors']:>4} | {r['p50'] * 1000:>9.1f} | "
+                f"{r['p95'] * 1000:>9.1f} | {r['p99'] * 1000:>9.1f} | {r['mean'] * 1000:>9.1f}")
+        if baseline and name in baseline and baseline[name]["p50"]:
+            change = (r["p50"] / baseline[name]["p50"] - 1) * 100
+            line += f" | {change:+7.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py 与示例客户端的端到端延迟基准")
+    add_arguments(parser)
+    parser.add_argument("--runs", type=int, default=20, help="每个命令的测量次数")
+    parser.add_argument("--warmup", type=int, default=1, help="不计入统计的预热次数")
+    parser.add_argument("--rate-limit", action="store_true", help="保留客户端默认限流 (默认关闭以测量纯延迟)")
+    parser.add_argument("--skip-menus", action="store_true", help="不测示例客户端菜单")
+    parser.add_argument("--daemon", action="store_true", help="另外在 main.py daemon 运行时再测一遍 CLI 命令")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比")
+    args = parser.parse_args()
+
+    cfg = config_from_args(args)
+    server, base_url = start_server(cfg)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        write_config(workdir, base_url, args.rate_limit)
+        for name, argv in CLI_COMMANDS.items():
+            results[name] = bench_cli(workdir, argv, args.runs, args.warmup)
+        if args.daemon:
+            daemon = start_daemon(workdir)
+            try:
+                for name, argv in CLI_COMMANDS.items():
+                    results[f"{name} [daemon]"] = bench_cli(workdir, argv, args.runs, args.warmup)
+            finally:
+                stop_daemon(workdir, daemon)
+        if not args.skip_menus:
+            cwd = os.getcwd()
+            try:
+                results.update(bench_menus(workdir, base_url, args.runs, args.warmup))
+            finally:
+                os.chdir(cwd)
+    server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\n模拟服务共处理请求 {cfg.requests} 次 (延迟 {args.latency:.0f}ms ± {args.jitter:.0f}ms，错误率 {args.error_rate:.1%})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
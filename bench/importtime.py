@@ -0,0 +1,66 @@
+"""启动耗时预算：用 `python -X importtime` 测量各命令路径的导入耗时，超出预算时返回非零
+
+    python bench/importtime.py            # 每个场景取 5 次中的最小值
+    python bench/importtime.py --runs 10
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 场景: 名称 -> (python 参数, 预算毫秒)
+#   usage 路径只允许导入 etrade_cli.config；子命令路径主要花在 requests/rauth 上；
+#   有守护进程时 account 命令只需要 socket/json 和解析 config.ini
+SCENARIOS = {
+    "usage (main.py 无参数)": (["main.py"], 10),
+    "account * (守护进程客户端)": (["-c", "import main, etrade_cli.daemon; etrade_cli.config.load()"], 25),
+    "account *": (["-c", "import main, etrade_cli.accounts"], 150),
+    "quote watch": (["-c", "import main, etrade_cli.quotes"], 150),
+}
+
+# 解释器自身启动时导入的模块，不计入预算
+STARTUP_MODULES = {"_frozen_importlib", "_imp", "_thread", "_warnings", "_weakref", "_io", "marshal", "posix",
+                   "_frozen_importlib_external", "time", "zipimport", "_codecs", "codecs", "encodings.aliases",
+                   "encodings", "encodings.utf_8", "_signal", "_abc", "abc", "io", "__main__", "site"}
+
+def measure(argv):
+    """运行一次，返回 (应用导入耗时毫秒, 耗时最多的前 5 个顶层模块)"""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=ROOT, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    total = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue  # 只统计顶层导入，子模块已包含在父模块的累计耗时里
+        name = name.strip()
+        if name in STARTUP_MODULES:
+            continue
+        total += int(cumulative)
+        modules.append((int(cumulative), name))
+    return total / 1000, sorted(modules, reverse=True)[:5]
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py 各命令路径的导入耗时预算检查")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景运行次数，取最小值")
+    args = parser.parse_args()
+
+    over_budget = False
+    print(f"{'场景':<24} | {'导入耗时 (ms)':>12} | {'预算 (ms)':>9} | 最慢的顶层模块")
+    print("-" * 100)
+    for name, (argv, budget) in SCENARIOS.items():
+        best, modules = min((measure(argv) for _ in range(args.runs)), key=lambda r: r[0])
+        status = "OK" if best <= budget else "超出"
+        over_budget |= best > budget
+        top = ", ".join(f"{m} {t / 1000:.1f}" for t, m in modules)
+        print(f"{name:<24} | {best:>12.1f} | {budget:>9} | {status}  {top}")
+
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""JSON 解码基准：response.json() vs etrade_cli.codec (标准库 json / orjson) + schema 解码
+
+在合成的大响应 (持仓、行情、订单、余额) 上比较解析耗时：
+  - 仅解析：response.json()、codec.loads (json)、codec.loads (orjson，已安装时)
+  - 解析 + schema：再经 models 中的解码函数得到记录，未读取的字段被丢弃
+
+    python bench/json_bench.py
+    python bench/json_bench.py --positions 50000 --orders 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+from mock_etrade import position, quotes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli import codec  # noqa: E402
+from etrade_cli.models import decode_balance, decode_orders, decode_portfolio_page, decode_quotes  # noqa: E402
+
+# 真实 detailFlag=ALL 行情的 All 块约有 80 个字段，看板只读其中 6 个
+EXTRA_QUOTE_FIELDS = [f"field{i:02d}" for i in range(70)]
+
+def portfolio_payload(count):
+    section = {"accountId": "bench", "totalPages": 1, "Position": [position("bench", i) for i in range(count)]}
+    return {"PortfolioResponse": {"AccountPortfolio": [section]}}
+
+def quote_payload(count):
+    data = quotes([f"SYM{i:05d}" for i in range(count)])
+    for quote in data["QuoteResponse"]["QuoteData"]:
+        quote["All"].update({name: 1.5 for name in EXTRA_QUOTE_FIELDS})
+    return data
+
+def orders_payload(count):
+    return {"OrdersResponse": {"Order": [{
+        "orderId": 1000 + i, "orderType": "EQ", "details": f"https://api.etrade.com/v1/accounts/k/orders/{1000 + i}",
+        "OrderDetail": [{"placedTime": 1700000000000 + i, "orderValue": 100.0, "status": "OPEN", "orderTerm": "GOOD_FOR_DAY",
+                         "priceType": "LIMIT", "limitPrice": 10.0 + i % 50, "stopPrice": 0, "marketSession": "REGULAR",
+                         "allOrNone": False, "netAsk": 0, "netBid": 0, "netPrice": 0,
+                         "Instrument": [{"Product": {"symbol": f"SYM{i % 500:05d}", "securityType": "EQ"},
+                                         "symbolDescription": f"SYM{i % 500:05d} INC", "orderAction": "BUY",
+                                         "quantityType": "QUANTITY", "orderedQuantity": 10, "filledQuantity": 0,
+                                         "averageExecutionPrice": 0, "estimatedCommission": 0,
+                                         "estimatedFees": 0}]}]} for i in range(count)]}}
+
+def balance_payload():
+    computed = {f"metric{i:02d}": float(i) for i in range(60)}
+    computed.update({"cashBuyingPower": 1000.0, "marginBuyingPower": 2000.0,
+                     "RealTimeValues": {"totalAccountValue": 50000.0, "netMv": 1.0, "netMvLong": 1.0}})
+    return {"BalanceResponse": {"accountId": "1", "accountDescription": "bench", "Computed": computed}}
+
+def make_response(payload):
+    """构造与 session.get 返回值相同的 Response (Content-Type 不带 charset，和 E*TRADE 一致)"""
+    response = requests.models.Response()
+    response._content = json.dumps(payload).encode()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(args):
+    payloads = {
+        f"portfolio ({args.positions} 持仓)": (portfolio_payload(args.positions), decode_portfolio_page),
+        f"quote ({args.quotes} 代码 x ALL)": (quote_payload(args.quotes), decode_quotes),
+        f"orders ({args.orders} 订单)": (orders_payload(args.orders), decode_orders),
+        "balance": (balance_payload(), decode_balance),
+    }
+    backends = ["json"]
+    if codec.select_backend("orjson") == "orjson":
+        backends.append("orjson")
+    else:
+        print("未安装 orjson，只比较标准库 json")
+
+    print(f"{'响应':<28} | {'大小':>8} | {'变体':<22} | {'解析 (ms)':>10} | {'+schema (ms)':>12} | {'对比':>6}")
+    print("-" * 100)
+    for name, (payload, schema) in payloads.items():
+        response = make_response(payload)
+        size = len(response.content)
+        # 小响应多跑几次，保证计时分辨率
+        loops = max(1, 2_000_000 // size)
+        timings = [("response.json()",
+                    best_of(args.repeat, lambda: [response.json() for _ in range(loops)]),
+                    best_of(args.repeat, lambda: [schema(response.json()) for _ in range(loops)]))]
+        for backend in backends:
+            codec.select_backend(backend)
+            timings.append((f"codec ({backend})",
+                            best_of(args.repeat, lambda: [codec.loads(response.content) for _ in range(loops)]),
+                            best_of(args.repeat, lambda: [codec.decode(response, schema) for _ in range(loops)])))
+        base = timings[0][2]
+        for i, (variant, parse, decoded) in enumerate(timings):
+            label = name if i == 0 else ""
+            size_text = f"{size / 1024:.0f}KB" if i == 0 else ""
+            print(f"{label:<28} | {size_text:>8} | {variant:<22} | {parse / loops * 1000:>10.3f} | "
+                  f"{decoded / loops * 1000:>12.3f} | {base / decoded:>5.2f}x")
+        print("-" * 100)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=10000, help="持仓响应中的持仓条数 (默认 10000)")
+    parser.add_argument("--quotes", type=int, default=50, help="行情响应中的代码个数 (默认 50)")
+    parser.add_argument("--orders", type=int, default=5000, help="订单响应中的订单数 (默认 5000)")
+    parser.add_argument("--repeat", type=int, default=5, help="取最优的重复次数 (默认 5)")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
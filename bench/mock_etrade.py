@@ -0,0 +1,390 @@
+"""本地模拟 E*TRADE API 服务，用于离线压测 main.py 和示例客户端
+
+支持账户列表、余额、持仓 (分页)、行情、订单 (marker 分页)、订单预览/下单/撤单和令牌续期接口，
+可配置延迟、抖动和错误注入；OAuth 只校验签名参数是否齐全，不验证签名本身。
+--idle-timeout 模拟令牌空闲失效：超时未使用的令牌返回 401，调用续期接口后恢复。
+订单预览和下单接受 JSON 或 XML 请求体；代码以 BAD 开头的订单返回 400，用于测试错误路径；
+下单时同一账户内重复的 clientOrderId 返回 400 (错误代码 1019)；代码以 SLOW 开头的订单在接受后过
+SLOW_PLACE_DELAY 秒才响应，用于模拟响应丢失 (客户端超时，但订单其实已经下了)。
+下过的订单带着 clientOrderId 出现在订单列表第一页的最前面 (状态 OPEN)。
+撤单后该订单不再出现在 OPEN 列表中；orderId 尾数为 9 的订单视为已成交，撤单返回 400。
+
+    python bench/mock_etrade.py --port 8765 --latency 50 --jitter 20 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# OAuth 1.0a 请求必须携带的参数
+OAUTH_PARAMS = ("oauth_consumer_key", "oauth_token", "oauth_signature_method",
+                "oauth_signature", "oauth_timestamp", "oauth_nonce")
+
+# SLOW* 订单的下单响应延迟 (秒)，大于客户端超时
+SLOW_PLACE_DELAY = 15
+
+ORDER_STATUSES = ("OPEN", "EXECUTED", "INDIVIDUAL_FILLS", "CANCELLED", "REJECTED", "EXPIRED")
+
+class MockConfig:
+    """模拟服务的行为参数"""
+
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, accounts=4, positions=20,
+                 page_size=50, orders=10, seed=None, idle_timeout=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.accounts = accounts
+        self.positions = positions
+        self.page_size = page_size
+        self.orders = orders
+        self.idle_timeout = idle_timeout
+        self.token_seen = {}
+        self.preview_id = 1000
+        self.placed = {}
+        self.cancelled = set()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def delay(self):
+        """本次请求的模拟延迟 (秒)"""
+        with self.lock:
+            self.requests += 1
+            jitter = self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(self.latency + jitter, 0.0)
+
+    def token_active(self, token, renew=False):
+        """令牌是否仍有效 (未空闲超时)；renew=True 时重新激活。每次调用都记为一次使用"""
+        with self.lock:
+            now = time.monotonic()
+            last = self.token_seen.get(token, now)
+            active = renew or not self.idle_timeout or now - last <= self.idle_timeout
+            if active:
+                self.token_seen[token] = now
+            return active
+
+    def next_preview_id(self):
+        with self.lock:
+            self.preview_id += 1
+            return self.preview_id
+
+    def place(self, key, client_order_id, orders):
+        """登记一笔订单，返回 orderId；同一账户内 clientOrderId 重复时返回 None"""
+        with self.lock:
+            placed = self.placed.setdefault(key, {})
+            if client_order_id in placed:
+                return None
+            order_id = 5000 + sum(map(len, self.placed.values()))
+            placed[client_order_id] = (order_id, int(time.time() * 1000), orders)
+            return order_id
+
+    def placed_orders(self, key):
+        """账户内下过且未撤销的订单，新的在前，格式同订单列表"""
+        with self.lock:
+            placed = [(client_order_id, *order) for client_order_id, order in (self.placed.get(key) or {}).items()
+                      if (key, order[0]) not in self.cancelled]
+        return [{"orderId": order_id, "clientOrderId": client_order_id, "orderType": "EQ", "OrderDetail": [{
+            "placedTime": placed_time, "status": "OPEN", "orderTerm": order.get("orderTerm"),
+            "priceType": order.get("priceType"), "limitPrice": order.get("limitPrice") or 0,
+            "Instrument": [{"Product": i["Product"], "orderAction": i["orderAction"], "quantityType": "QUANTITY",
+                            "orderedQuantity": float(i["quantity"]), "filledQuantity": 0,
+                            "averageExecutionPrice": 0} for i in order.get("Instrument") or []]} for order in orders]}
+                for client_order_id, order_id, placed_time, orders in reversed(placed)]
+
+    def cancel(self, key, order_id):
+        """撤单：返回错误说明，成功返回 None"""
+        with self.lock:
+            if (key, order_id) in self.cancelled:
+                return "Order already cancelled"
+            if order_id % 10 == 9:
+                return "Order has been executed"
+            self.cancelled.add((key, order_id))
+            return None
+
+    def should_fail(self):
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+def oauth_params(handler, query):
+    """从 Authorization 头或查询参数/表单中取出 OAuth 参数"""
+    params = {k: v[0] for k, v in query.items() if k.startswith("oauth_")}
+    auth = handler.headers.get("Authorization", "")
+    if auth.startswith("OAuth "):
+        for key, value in re.findall(r'(oauth_\w+)="([^"]*)"', auth):
+            params[key] = unquote(value)
+    return params
+
+def account_list(cfg):
+    accounts = [{"accountId": f"8{i:07d}", "accountIdKey": f"key{i}", "accountMode": "MARGIN",
+                 "accountDesc": f"Account {i}", "accountName": "", "accountType": "INDIVIDUAL",
+                 "institutionType": "BROKERAGE", "accountStatus": "ACTIVE"} for i in range(cfg.accounts)]
+    return {"AccountListResponse": {"Accounts": {"Account": accounts}}}
+
+def balance(key):
+    seed = sum(map(ord, key))
+    return {"BalanceResponse": {"accountId": key, "accountDescription": f"Account {key}",
+                                "Computed": {"cashBuyingPower": 1000.0 + seed,
+                                             "marginBuyingPower": 2000.0 + seed,
+                                             "RealTimeValues": {"totalAccountValue": 50000.0 + seed * 10}}}}
+
+def position(key, index):
+    symbol = f"SYM{index:05d}"
+    price = 10.0 + index % 500
+    qty = 1 + index % 100
+    paid = price * 0.9
+    return {"positionId": index, "symbolDescription": f"{symbol} INC", "quantity": qty,
+            "pricePaid": paid, "marketValue": price * qty, "totalGain": (price - paid) * qty,
+            "totalGainPct": (price - paid) / paid * 100, "positionType": "LONG",
+            "Product": {"symbol": symbol, "securityType": "EQ"},
+            "Quick": {"lastTrade": price, "change": 0.5, "changePct": 0.5, "volume": 1000 + index}}
+
+def portfolio(cfg, key, page_number):
+    total_pages = max((cfg.positions + cfg.page_size - 1) // cfg.page_size, 1)
+    start = (page_number - 1) * cfg.page_size
+    section = {"accountId": key, "totalPages": total_pages,
+               "Position": [position(key, i) for i in range(start, min(start + cfg.page_size, cfg.positions))]}
+    if page_number < total_pages:
+        section["nextPageNo"] = str(page_number + 1)
+    return {"PortfolioResponse": {"AccountPortfolio": [section]}}
+
+def quotes(symbols):
+    data = []
+    for symbol in symbols:
+        price = 10.0 + sum(map(ord, symbol)) % 500 + random.random()
+        data.append({"dateTime": time.strftime("%H:%M:%S EDT %m-%d-%Y"),
+                     "Product": {"symbol": symbol, "securityType": "EQ"},
+                     "All": {"lastTrade": price, "changeClose": 0.5, "changeClosePercentage": 0.5,
+                             "open": price - 0.5, "previousClose": price - 0.5, "bid": price - 0.01,
+                             "bidSize": 100, "ask": price + 0.01, "askSize": 100, "low": price - 1,
+                             "high": price + 1, "totalVolume": 123456}})
+    return {"QuoteResponse": {"QuoteData": data}}
+
+def orders(cfg, status, marker, count, key=None):
+    start = int(marker or 0)
+    end = min(start + count, cfg.orders)
+    order_list = cfg.placed_orders(key) if status == "OPEN" and not marker else []
+    for i in range(start, end):
+        if status == "OPEN" and (key, 1000 + i) in cfg.cancelled:
+            continue
+        order_list.append({"orderId": 1000 + i, "orderType": "EQ", "OrderDetail": [{
+            "placedTime": int(time.time() * 1000) - i * 60000, "orderValue": 100.0, "status": status,
+            "orderTerm": "GOOD_FOR_DAY", "priceType": "LIMIT", "limitPrice": 10.0 + i,
+            "Instrument": [{"Product": {"symbol": f"SYM{i:05d}", "securityType": "EQ"},
+                            "symbolDescription": f"SYM{i:05d} INC", "orderAction": "BUY",
+                            "quantityType": "QUANTITY", "orderedQuantity": 10, "filledQuantity": 0,
+                            "averageExecutionPrice": 0}]}]})
+    response = {"OrdersResponse": {"Order": order_list}}
+    if end < cfg.orders:
+        response["OrdersResponse"]["marker"] = str(end)
+        response["OrdersResponse"]["next"] = ""
+    return response
+
+def parse_order_request(body, root_name):
+    """解析 JSON 或 XML 的下单/预览请求体，返回 (clientOrderId, orderType, [订单 dict])"""
+    try:
+        request = json.loads(body)[root_name]
+        return request.get("clientOrderId"), request.get("orderType", "EQ"), request.get("Order") or []
+    except ValueError:
+        pass
+    root = ElementTree.fromstring(body)
+    text = lambda node, name: (node.findtext(name) or "").strip()
+    orders = []
+    for order in root.iter("Order"):
+        instruments = [{"Product": {"symbol": text(i, "Product/symbol"), "securityType": text(i, "Product/securityType")},
+                        "orderAction": text(i, "orderAction"), "quantity": text(i, "quantity") or 0}
+                       for i in order.iter("Instrument")]
+        orders.append({"priceType": text(order, "priceType"), "orderTerm": text(order, "orderTerm"),
+                       "limitPrice": text(order, "limitPrice") or 0, "Instrument": instruments})
+    return text(root, "clientOrderId"), text(root, "orderType") or "EQ", orders
+
+def preview(cfg, body):
+    """订单预览：市价单按 100 + 代码哈希估价，每条腿佣金 0.5"""
+    client_order_id, order_type, orders = parse_order_request(body, "PreviewOrderRequest")
+    result = []
+    for order in orders:
+        instruments = order.get("Instrument") or []
+        if any(i["Product"]["symbol"].startswith("BAD") for i in instruments):
+            return None
+        total = commission = 0.0
+        for instrument in instruments:
+            price = float(order.get("limitPrice") or 0) or 100 + sum(map(ord, instrument["Product"]["symbol"])) % 50
+            sign = -1 if instrument["orderAction"].startswith("SELL") else 1
+            commission += 0.5
+            total += sign * price * float(instrument["quantity"])
+        result.append({**order, "estimatedCommission": commission, "estimatedTotalAmount": round(total + commission, 2)})
+    return {"PreviewOrderResponse": {"orderType": order_type, "clientOrderId": client_order_id, "Order": result,
+                                     "PreviewIds": [{"previewId": cfg.next_preview_id()}]}}
+
+def cancel_order_id(body):
+    """CancelOrderRequest (JSON 或 XML) 中的 orderId"""
+    try:
+        return int(json.loads(body)["CancelOrderRequest"]["orderId"])
+    except ValueError:
+        return int(ElementTree.fromstring(body).findtext("orderId").strip())
+
+def place(cfg, key, body):
+    """下单：返回 (响应, 错误)；错误为 (代码, 说明)"""
+    client_order_id, order_type, orders = parse_order_request(body, "PlaceOrderRequest")
+    symbols = [i["Product"]["symbol"] for order in orders for i in order.get("Instrument") or []]
+    if any(symbol.startswith("BAD") for symbol in symbols):
+        return None, (1037, "Invalid symbol")
+    order_id = cfg.place(key, client_order_id, orders)
+    if order_id is None:
+        return None, (1019, "Duplicate clientOrderId")
+    if any(symbol.startswith("SLOW") for symbol in symbols):
+        time.sleep(SLOW_PLACE_DELAY)
+    return {"PlaceOrderResponse": {"orderType": order_type, "clientOrderId": client_order_id, "Order": orders,
+                                   "OrderIds": [{"orderId": order_id}], "placedTime": int(time.time() * 1000)}}, None
+
+def make_handler(cfg):
+    """生成绑定了配置的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, obj, code=200):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_empty(self, code):
+            self.send_response(code)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def handle_request(self):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            length = int(self.headers.get("Content-Length", 0) or 0)
+            body = self.rfile.read(length).decode() if length else ""
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                query.update(parse_qs(body))
+
+            time.sleep(cfg.delay())
+
+            # OAuth 检查：接受任何参数齐全的签名
+            params = oauth_params(self, query)
+            if any(not params.get(name) for name in OAUTH_PARAMS):
+                return self.send_json({"Error": {"code": 401, "message": "oauth_problem=parameter_absent"}}, 401)
+
+            if parts.path == "/oauth/renew_access_token":
+                cfg.token_active(params["oauth_token"], renew=True)
+                body = b"Access Token has been renewed"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                return self.wfile.write(body)
+            if not cfg.token_active(params["oauth_token"]):
+                return self.send_json({"Error": {"code": 401, "message": "oauth_problem=token_rejected"}}, 401)
+
+            if cfg.should_fail():
+                return self.send_json({"Error": {"code": 500, "message": "Injected error"}}, 500)
+
+            path = parts.path
+            arg = lambda name, default=None: query.get(name, [default])[0]
+
+            if path == "/v1/accounts/list.json":
+                return self.send_json(account_list(cfg))
+
+            if re.match(r"^/v1/accounts/[^/]+/orders/preview\.json$", path) and self.command == "POST":
+                data = preview(cfg, body)
+                if data is None:
+                    return self.send_json({"Error": {"code": 1037, "message": "Invalid symbol"}}, 400)
+                return self.send_json(data)
+
+            match = re.match(r"^/v1/accounts/([^/]+)/orders/place\.json$", path)
+            if match and self.command == "POST":
+                data, error = place(cfg, match.group(1), body)
+                if error:
+                    return self.send_json({"Error": {"code": error[0], "message": error[1]}}, 400)
+                return self.send_json(data)
+
+            match = re.match(r"^/v1/accounts/([^/]+)/orders/cancel\.json$", path)
+            if match and self.command == "PUT":
+                order_id = cancel_order_id(body)
+                error = cfg.cancel(match.group(1), order_id)
+                if error:
+                    return self.send_json({"Error": {"code": 5001, "message": error}}, 400)
+                return self.send_json({"CancelOrderResponse": {
+                    "accountId": match.group(1), "orderId": order_id, "cancelTime": int(time.time() * 1000),
+                    "Messages": {"Message": [{"code": 5011, "description": "Your request to cancel your order is being processed.", "type": "WARNING"}]}}})
+
+            match = re.match(r"^/v1/accounts/([^/]+)/(balance|portfolio|orders)\.json$", path)
+            if match:
+                key, resource = match.groups()
+                if resource == "balance":
+                    return self.send_json(balance(key))
+                if resource == "portfolio":
+                    if cfg.positions == 0:
+                        return self.send_empty(204)
+                    return self.send_json(portfolio(cfg, key, int(arg("pageNumber", "1"))))
+                if cfg.orders == 0:
+                    return self.send_empty(204)
+                return self.send_json(orders(cfg, arg("status", "OPEN"), arg("marker"), int(arg("count", "25")), key))
+
+            match = re.match(r"^/v1/market/quote/(.+)\.json$", path)
+            if match:
+                symbols = [s for s in unquote(match.group(1)).split(",") if s]
+                limit = 50 if arg("overrideSymbolCount") == "true" else 25
+                if len(symbols) > limit:
+                    return self.send_json({"Error": {"code": 1023, "message": "Too many symbols"}}, 400)
+                return self.send_json(quotes(symbols))
+
+            return self.send_json({"Error": {"code": 404, "message": "Not found"}}, 404)
+
+        do_GET = handle_request
+        do_POST = handle_request
+        do_PUT = handle_request
+
+    return Handler
+
+def start_server(cfg, host="127.0.0.1", port=0):
+    """在后台线程启动模拟服务，返回 (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(cfg))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def add_arguments(parser):
+    parser.add_argument("--latency", type=float, default=50, help="基础延迟 (毫秒)")
+    parser.add_argument("--jitter", type=float, default=0, help="延迟抖动幅度 (毫秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率 (0~1)")
+    parser.add_argument("--accounts", type=int, default=4, help="账户个数")
+    parser.add_argument("--positions", type=int, default=20, help="每个账户的持仓条数")
+    parser.add_argument("--orders", type=int, default=10, help="每种状态的订单条数")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="令牌空闲多少秒后失效 (0 表示不失效)")
+
+def config_from_args(args):
+    return MockConfig(latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+                      accounts=args.accounts, positions=args.positions, orders=args.orders, seed=args.seed,
+                      idle_timeout=args.idle_timeout)
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 E*TRADE API 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config_from_args(args)))
+    print(f"模拟 E*TRADE 服务已启动: http://{args.host}:{args.port} (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
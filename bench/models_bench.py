@@ -0,0 +1,139 @@
+"""持仓解码基准：原始 dict 的 .get 链 vs etrade_cli.models 的 __slots__ 记录
+
+在合成的 1 万条持仓 (按页序列化为 JSON，与线上响应相同) 上比较：
+  - 内存：解析后保留整份持仓所占的内存 (tracemalloc)
+  - 吞吐：解析 + 渲染表格行、以及对已解析数据做多遍汇总的速度
+
+    python bench/models_bench.py
+    python bench/models_bench.py --positions 50000 --passes 20
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from mock_etrade import position
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli.models import decode_portfolio_page  # noqa: E402
+
+def synthetic_pages(total, page_size):
+    """生成 PortfolioResponse 页面 (JSON 字节串)"""
+    pages = []
+    total_pages = max((total + page_size - 1) // page_size, 1)
+    for page in range(total_pages):
+        section = {"accountId": "bench", "totalPages": total_pages,
+                   "Position": [position("bench", i) for i in range(page * page_size, min((page + 1) * page_size, total))]}
+        pages.append(json.dumps({"PortfolioResponse": {"AccountPortfolio": [section]}}).encode())
+    return pages
+
+# --- 原来的处理方式：保留原始 dict，每次使用都走 .get 链 ---
+
+def load_dicts(pages):
+    positions = []
+    for body in pages:
+        data = json.loads(body)
+        if "PortfolioResponse" in data and "AccountPortfolio" in data["PortfolioResponse"]:
+            for section in data["PortfolioResponse"]["AccountPortfolio"]:
+                positions.extend(section.get("Position", []))
+    return positions
+
+def render_dict(pos):
+    product = pos.get("Product", {})
+    symbol = product.get("symbol", "N/A")
+    description = pos.get("symbolDescription", "N/A")[:25]
+    current_price = pos.get("Quick", {}).get("lastTrade", 0)
+    return (f"{symbol:<20} | {description:<25} | {pos.get('quantity', 0):>8.2f} | {pos.get('pricePaid', 0):>10.2f} | "
+            f"{current_price:>10.2f} | {pos.get('marketValue', 0):>14.2f} | {pos.get('totalGain', 0):>12.2f} | "
+            f"{pos.get('totalGainPct', 0):>9.2f}%")
+
+def summarize_dict(positions):
+    value = gain = 0.0
+    for pos in positions:
+        if "marketValue" in pos:
+            value += pos.get("marketValue", 0)
+        if "Quick" in pos and "lastTrade" in pos["Quick"]:
+            gain += pos.get("totalGain", 0)
+    return value, gain
+
+# --- 解码层：一次解码为 Position 记录，之后只读属性 ---
+
+def load_records(pages):
+    positions = []
+    for number, body in enumerate(pages, 1):
+        page, _ = decode_portfolio_page(json.loads(body), number)
+        positions.extend(page)
+    return positions
+
+def render_record(pos):
+    return (f"{pos.symbol:<20} | {pos.description[:25]:<25} | {pos.quantity:>8.2f} | {pos.price_paid:>10.2f} | "
+            f"{pos.last_trade:>10.2f} | {pos.market_value:>14.2f} | {pos.total_gain:>12.2f} | "
+            f"{pos.total_gain_pct:>9.2f}%")
+
+def summarize_records(positions):
+    value = gain = 0.0
+    for pos in positions:
+        value += pos.market_value
+        gain += pos.total_gain
+    return value, gain
+
+VARIANTS = {
+    "dict": (load_dicts, render_dict, summarize_dict),
+    "records": (load_records, render_record, summarize_records),
+}
+
+def retained_memory(load, pages):
+    """解析全部页面后仍被持仓列表引用的内存 (字节)，以及解析过程中的峰值"""
+    gc.collect()
+    tracemalloc.start()
+    positions = load(pages)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del positions
+    return current, peak
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(args):
+    pages = synthetic_pages(args.positions, args.page_size)
+    results = {}
+    for name, (load, render, summarize) in VARIANTS.items():
+        current, peak = retained_memory(load, pages)
+        load_render = best_of(args.repeat, lambda: [render(p) for p in load(pages)])
+        positions = load(pages)
+        passes = best_of(args.repeat, lambda: [summarize(positions) for _ in range(args.passes)])
+        results[name] = {"retained": current, "peak": peak, "load_render": load_render, "passes": passes}
+
+    base = results["dict"]
+    print(f"{args.positions} 条持仓，{len(pages)} 页，取 {args.repeat} 次最优")
+    print(f"{'':<10} | {'保留内存':>10} | {'峰值内存':>10} | {'解析+渲染':>12} | {f'汇总 x{args.passes}':>12}")
+    print("-" * 66)
+    for name, r in results.items():
+        print(f"{name:<10} | {r['retained'] / 2**20:>8.2f}MB | {r['peak'] / 2**20:>8.2f}MB | "
+              f"{args.positions / r['load_render'] / 1000:>8.0f}k/s | {r['passes'] * 1000:>10.1f}ms")
+    rec = results["records"]
+    print("-" * 66)
+    print(f"records / dict: 保留内存 {rec['retained'] / base['retained']:.2f}x，"
+          f"解析+渲染吞吐 {base['load_render'] / rec['load_render']:.2f}x，"
+          f"多遍汇总 {base['passes'] / rec['passes']:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=10000, help="合成持仓条数 (默认 10000)")
+    parser.add_argument("--page-size", type=int, default=50, help="每页条数 (默认 50)")
+    parser.add_argument("--passes", type=int, default=10, help="汇总遍数 (默认 10)")
+    parser.add_argument("--repeat", type=int, default=5, help="每项取最优的重复次数 (默认 5)")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
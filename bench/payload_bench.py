@@ -0,0 +1,141 @@
+"""订单请求体基准：逐笔构造 dict / ElementTree 再序列化 vs etrade_cli.payload 的缓存模板
+
+在合成的 1 万笔订单篮子 (股票、单腿期权、2~4 腿价差混合) 上比较 JSON 和 XML 请求体的编译速度；
+两种方式都先做同样的校验，并逐笔核对输出等价 (JSON 解析后相等，XML 规范化后相等)。
+
+    python bench/payload_bench.py
+    python bench/payload_bench.py --orders 50000 --repeat 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli import payload  # noqa: E402
+from etrade_cli.payload import Leg, OrderSpec  # noqa: E402
+
+SYMBOLS = ["AAPL", "MSFT", "IBM", "SPY", "QQQ", "AT&T", "BRK.B", "TSLA"]
+
+def synthetic_basket(total, seed=1):
+    """70% 股票、20% 单腿期权、10% 价差；代码中含需要转义的 &"""
+    rng = random.Random(seed)
+    expiry = date(2026, 11, 20)
+    orders = []
+    for i in range(total):
+        symbol = rng.choice(SYMBOLS)
+        kind = rng.random()
+        if kind < 0.7:
+            price_type = rng.choice(("MARKET", "LIMIT", "STOP", "STOP_LIMIT"))
+            legs = [Leg(symbol, rng.choice(payload.ORDER_ACTIONS), rng.randint(1, 500))]
+        elif kind < 0.9:
+            price_type = rng.choice(("MARKET", "LIMIT"))
+            legs = [Leg(symbol, rng.choice(payload.OPTION_ACTIONS), rng.randint(1, 20), rng.choice(("CALL", "PUT")),
+                        expiry + timedelta(weeks=rng.randint(0, 12)), float(rng.randint(20, 80) * 5))]
+        else:
+            price_type = rng.choice(payload.SPREAD_PRICE_TYPES)
+            strikes = rng.sample(range(20, 80), rng.randint(2, 4))
+            legs = [Leg(symbol, ("BUY_OPEN", "SELL_OPEN")[n % 2], 1, "CALL", expiry, strike * 5.0)
+                    for n, strike in enumerate(strikes)]
+        limit_price = round(rng.uniform(1, 300), 2) if price_type in payload.LIMIT_PRICE_TYPES else None
+        stop_price = round(rng.uniform(1, 300), 2) if price_type in payload.STOP_PRICE_TYPES else None
+        orders.append(OrderSpec(legs, price_type, "GOOD_FOR_DAY", limit_price, stop_price, f"{i:020d}"))
+    return orders
+
+# --- 逐笔构造：每笔订单建一棵嵌套 dict，再交给 json.dumps / ElementTree ---
+
+def request_dict(order, root="PreviewOrderRequest", preview_id=None):
+    payload.validate(order)
+    instruments = []
+    for leg in order.legs:
+        product = {"securityType": leg.security_type, "symbol": leg.symbol}
+        if leg.call_put is not None:
+            product.update(callPut=leg.call_put, expiryYear=leg.expiry.year, expiryMonth=leg.expiry.month,
+                           expiryDay=leg.expiry.day, strikePrice=leg.strike)
+        instruments.append({"Product": product, "orderAction": leg.action, "quantityType": "QUANTITY",
+                            "quantity": leg.quantity})
+    detail = {"allOrNone": False, "priceType": order.price_type, "orderTerm": order.order_term,
+              "marketSession": "REGULAR"}
+    if order.price_type in payload.LIMIT_PRICE_TYPES:
+        detail["limitPrice"] = order.limit_price
+    if order.price_type in payload.STOP_PRICE_TYPES:
+        detail["stopPrice"] = order.stop_price
+    detail["Instrument"] = instruments
+    request = {"orderType": order.order_type, "clientOrderId": order.client_order_id, "Order": [detail]}
+    if preview_id is not None:
+        request["PreviewIds"] = [{"previewId": preview_id}]
+    return {root: request}
+
+def dict_json(order):
+    return json.dumps(request_dict(order), separators=(",", ":"))
+
+def append_xml(parent, name, node):
+    if isinstance(node, list):
+        for item in node:
+            append_xml(parent, name, item)
+        return
+    element = ElementTree.SubElement(parent, name)
+    if isinstance(node, dict):
+        for key, value in node.items():
+            append_xml(element, key, value)
+    else:
+        element.text = ("true" if node else "false") if isinstance(node, bool) else str(node)
+
+def etree_xml(order):
+    (root, request), = request_dict(order).items()
+    element = ElementTree.Element(root)
+    for key, value in request.items():
+        append_xml(element, key, value)
+    return ElementTree.tostring(element, encoding="unicode")
+
+VARIANTS = {
+    "json": (dict_json, lambda order: payload.build(order)),
+    "xml": (etree_xml, lambda order: payload.build(order, fmt="xml")),
+}
+
+def check(orders):
+    """逐笔核对两种方式的输出等价"""
+    for order in orders:
+        if json.loads(dict_json(order)) != json.loads(payload.build(order)):
+            raise SystemExit(f"JSON 不一致: {order!r}")
+        expected = ElementTree.canonicalize(etree_xml(order))
+        if ElementTree.canonicalize(payload.build(order, fmt="xml")) != expected:
+            raise SystemExit(f"XML 不一致: {order!r}")
+
+def best_of(repeat, func, orders):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for order in orders:
+            func(order)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(args):
+    orders = synthetic_basket(args.orders)
+    check(orders)
+    payload.template.cache_clear()
+    print(f"{args.orders} 笔订单 (含 {sum(len(o.legs) > 1 for o in orders)} 笔价差)，输出已逐笔核对一致，"
+          f"取 {args.repeat} 次最优")
+    print(f"{'':<6} | {'逐笔构造':>12} | {'缓存模板':>12} | {'加速':>6}")
+    print("-" * 48)
+    for name, (naive, compiled) in VARIANTS.items():
+        base = best_of(args.repeat, naive, orders)
+        fast = best_of(args.repeat, compiled, orders)
+        print(f"{name:<6} | {base * 1000:>10.1f}ms | {fast * 1000:>10.1f}ms | {base / fast:>5.2f}x")
+    info = payload.template.cache_info()
+    print("-" * 48)
+    print(f"模板缓存: {info.currsize} 种形状，命中 {info.hits} 次，编译 {info.misses} 次")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=10000, help="合成订单笔数 (默认 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="每项取最优的重复次数 (默认 5)")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
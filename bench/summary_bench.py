@@ -0,0 +1,54 @@
+"""account summary 统计基准：合成大量持仓，测量列式装载与向量化统计的耗时
+
+    python bench/summary_bench.py                                  # 30 万笔，20 个账户，5000 个标的
+    python bench/summary_bench.py --lots 1000000 --budget 1000     # 超出预算 (毫秒) 时返回非零
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli.models import Position  # noqa: E402
+from etrade_cli.summary import PositionColumns, summarize  # noqa: E402
+
+def synthetic_accounts(lots, accounts, symbols, seed=0):
+    """生成每个账户的 [Position] 列表，价格与盈亏随机，含少量空头"""
+    rng = random.Random(seed)
+    result = [[] for _ in range(accounts)]
+    for i in range(lots):
+        price = rng.uniform(5, 500)
+        paid = price * rng.uniform(0.3, 1.8)
+        qty = rng.randint(1, 500) * (-1 if rng.random() < 0.05 else 1)
+        result[i % accounts].append(Position(f"SYM{rng.randrange(symbols):05d}", "EQ", "", float(qty), paid, price,
+                                              price * qty, (price - paid) * qty, (price - paid) / paid * 100))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lots", type=int, default=300000, help="持仓笔数 (默认 300000)")
+    parser.add_argument("--accounts", type=int, default=20, help="账户数 (默认 20)")
+    parser.add_argument("--symbols", type=int, default=5000, help="标的数 (默认 5000)")
+    parser.add_argument("--repeat", type=int, default=5, help="取最优的重复次数 (默认 5)")
+    parser.add_argument("--budget", type=float, default=1000, help="装载 + 统计的预算毫秒数 (默认 1000)")
+    args = parser.parse_args()
+
+    positions = synthetic_accounts(args.lots, args.accounts, args.symbols)
+    load = stats = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        cols = PositionColumns.from_positions(positions)
+        loaded = time.perf_counter()
+        summarize(cols, args.accounts)
+        done = time.perf_counter()
+        load = min(load, loaded - start)
+        stats = min(stats, done - loaded)
+
+    total = (load + stats) * 1000
+    print(f"{args.lots} 笔持仓，{args.accounts} 个账户，{args.symbols} 个标的，取 {args.repeat} 次最优")
+    print(f"列式装载 {load * 1000:.1f}ms，向量化统计 {stats * 1000:.1f}ms，合计 {total:.1f}ms (预算 {args.budget:.0f}ms)")
+    sys.exit(1 if total > args.budget else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""E*TRADE 命令行工具的各个子命令实现，由 main.py 按需导入"""
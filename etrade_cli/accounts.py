@@ -0,0 +1,279 @@
+"""account 子命令：账户列表 (带本地缓存)、余额、持仓"""
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from etrade_cli import codec, config
+from etrade_cli.colors import Colors
+from etrade_cli.render import Column, Report, pl_color
+from etrade_cli.models import decode_accounts, decode_balance, decode_portfolio_page
+from etrade_cli.ratelimit import QuotaExceededError
+
+def fetch_account_list(session):
+    return session.get(f"{config.BASE_URL}/v1/accounts/list.json")
+
+def account_cache_key():
+    """缓存键：Consumer Key 的摘要，避免把 Key 明文写入缓存文件"""
+    return hashlib.sha256(config.CONSUMER_KEY.encode()).hexdigest()
+
+def load_account_cache():
+    """读取未过期的账户列表缓存 (AccountListResponse 原始数据)，没有则返回 None"""
+    try:
+        with open(config.ACCOUNT_CACHE_FILE) as f:
+            entry = json.load(f).get(account_cache_key())
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not entry or time.time() - entry.get("saved_at", 0) > config.ACCOUNT_CACHE_TTL:
+        return None
+    return entry.get("data")
+
+def save_account_cache(data):
+    """写入账户列表缓存；先写临时文件再原子替换，避免并发读到半个文件"""
+    try:
+        with open(config.ACCOUNT_CACHE_FILE) as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cache[account_cache_key()] = {"saved_at": time.time(), "data": data}
+    tmp_file = f"{config.ACCOUNT_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, config.ACCOUNT_CACHE_FILE)
+    except OSError:
+        pass
+
+def get_accounts(session, refresh=False):
+    """获取账户列表 ([Account])：优先使用本地缓存，refresh=True 时强制请求 API；失败返回 None"""
+    data = None if refresh else load_account_cache()
+    if data is None:
+        response = fetch_account_list(session)
+        if response.status_code != 200:
+            print(f"无法获取账户列表。Code: {response.status_code} - {response.text}")
+            return None
+        data = codec.decode(response)
+        if "AccountListResponse" in data and "Accounts" in data["AccountListResponse"]:
+            save_account_cache(data)
+
+    return decode_accounts(data)
+
+def list_accounts(session, refresh=False, fmt="table"):
+    """获取并打印账户列表；无法获取时返回退出码 1"""
+    accounts = get_accounts(session, refresh)
+    if accounts is None:
+        return 1
+    if not accounts and fmt == "table":
+        print("未找到账户。")
+        return
+
+    with Report(fmt) as report:
+        table = report.table("accounts", [
+            Column("account_id", "账户ID", 20),
+            Column("account", "账户描述", 15),
+            Column("account_type", "类型"),
+            Column("institution_type", text=False),
+            Column("status", text=False),
+        ], rule="=")
+        table.header("")
+        for acc in accounts:
+            table.row({"account_id": acc.account_id, "account": acc.description, "account_type": acc.account_type,
+                       "institution_type": acc.institution_type, "status": acc.status})
+        table.footer()
+
+class PortfolioPageError(requests.RequestException):
+    """某一页持仓获取失败；page 为页码"""
+
+    def __init__(self, page, reason):
+        super().__init__(f"第 {page} 页{reason}")
+        self.page = page
+
+def fetch_portfolio_page(session, account_key, page_number=1):
+    """获取持仓的某一页，返回 ([Position], 下一页页码或 None)；
+    非 200 响应抛出 PortfolioPageError，网络错误抛出 requests.RequestException"""
+    url = f"{config.BASE_URL}/v1/accounts/{account_key}/portfolio.json"
+    params = {"count": config.PORTFOLIO_PAGE_SIZE, "pageNumber": page_number}
+    response = session.get(url, params=params, timeout=config.REQUEST_TIMEOUT)
+
+    if response.status_code == 204:
+        return [], None
+    if response.status_code != 200:
+        raise PortfolioPageError(page_number, f"失败 ({response.status_code})")
+
+    return codec.decode(response, decode_portfolio_page, page_number)
+
+def fetch_portfolio_timed(session, account_key, page_number=1):
+    """在工作线程中获取持仓的一页，返回 (页数据, 耗时秒数, 错误)；失败时页数据为 None，错误为 PortfolioPageError"""
+    start = time.perf_counter()
+    page = error = None
+    try:
+        page = fetch_portfolio_page(session, account_key, page_number)
+    except PortfolioPageError as e:
+        error = e
+    except requests.Timeout:
+        error = PortfolioPageError(page_number, "超时")
+    except QuotaExceededError as e:
+        error = PortfolioPageError(page_number, f": {e}")
+    except requests.RequestException:
+        error = PortfolioPageError(page_number, "网络错误")
+    return page, time.perf_counter() - start, error
+
+def iter_portfolio_pages(session, account_key, first=None, timings=None):
+    """逐页产出持仓 (每次一页 Position 列表)，调用方渲染当前页时后台预取下一页，内存只保留两页
+
+    first 为 fetch_portfolio_timed 已取得的第一页结果；timings 为 list 时追加每一页请求的耗时。
+    任何一页失败都抛出 PortfolioPageError，调用方据此知道已产出的持仓不完整，而不是悄悄少算。
+    """
+    page, elapsed, error = first if first is not None else fetch_portfolio_timed(session, account_key)
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        while True:
+            if timings is not None:
+                timings.append(elapsed)
+            if error is not None:
+                raise error
+            positions, next_page = page
+            future = prefetch.submit(fetch_portfolio_timed, session, account_key, next_page) if next_page else None
+            yield positions
+            if future is None:
+                return
+            page, elapsed, error = future.result()
+
+# 持仓表的列；账户列只出现在 csv/json/ndjson 中 (table 格式按账户分段)，error 列只在持仓获取失败的行中有值
+POSITION_COLUMNS = [
+    Column("account_id", text=False),
+    Column("account", text=False),
+    Column("symbol", "Symbol", 20),
+    Column("description", "Name", 25),
+    Column("quantity", "Qty", 8, ">", ".2f"),
+    Column("price_paid", "Paid ($)", 10, ">", ".2f"),
+    Column("last_trade", "Price ($)", 10, ">", ".2f"),
+    Column("market_value", "Mkt Value ($)", 14, ">", ".2f"),
+    Column("total_gain", "P&L ($)", 12, ">", ".2f", color=pl_color),
+    Column("total_gain_pct", "P&L %", 10, ">", ".2f", suffix="%", color=pl_color),
+    Column("error", text=False),
+]
+
+def print_portfolio(session, table, acc, first, timings):
+    """输出单个账户的持仓，后续页边取边输出；全部取到返回 True，中途失败时输出错误行并返回 False"""
+    table.header(f"\n{Colors.BOLD}账户: {acc.description or 'Unknown Account'} ({acc.account_id}){Colors.RESET}")
+
+    count = 0
+    try:
+        for positions in iter_portfolio_pages(session, acc.account_id_key, first, timings):
+            for pos in positions:
+                row = pos.as_dict()
+                row["description"] = pos.description[:25] if table.report.format == "table" else pos.description
+                row["account_id"] = acc.account_id
+                row["account"] = acc.description
+                table.row(row)
+            count += len(positions)
+            # 每页写一次，大账户也能边取边看到输出
+            table.report.flush()
+    except requests.RequestException as e:
+        message = f"持仓获取失败: {e}" + (f"，以上 {count} 笔不完整" if count else "")
+        if table.report.format == "table":
+            table.message(f"{Colors.RED}{message}{Colors.RESET}")
+        else:
+            table.row({"account_id": acc.account_id, "account": acc.description, "error": message})
+        table.footer()
+        return False
+
+    if not count:
+        table.message("(无持仓)")
+    table.footer()
+    return True
+
+def cmd_account_positions(session, concurrency=config.DEFAULT_CONCURRENCY, refresh=False, fmt="table"):
+    """处理 'account positions' 命令；有账户的持仓获取失败 (含只取到部分页) 时返回退出码 1"""
+
+    # 1. 获取账户列表 (默认走本地缓存)
+    accounts = get_accounts(session, refresh)
+    if accounts is None:
+        return 1
+    if not accounts:
+        print("名下没有账户。")
+        return 0
+
+    # 2. 用有界线程池并发获取所有账户的持仓第一页
+    #    按账户原始顺序依次等待结果：某个账户一到且前面的都已打印，就立即输出，后续页边取边打印
+    start = time.perf_counter()
+    timings = []
+    failed = 0
+    workers = max(1, min(concurrency, len(accounts)))
+    with ThreadPoolExecutor(max_workers=workers) as pool, Report(fmt) as report:
+        table = report.table("positions", POSITION_COLUMNS)
+        futures = [pool.submit(fetch_portfolio_timed, session, acc.account_id_key) for acc in accounts]
+        for acc, future in zip(accounts, futures):
+            if not print_portfolio(session, table, acc, future.result(), timings):
+                failed += 1
+
+        # 3. 耗时统计：所有页请求 (含预取的后续页) 耗时之和即为原串行路径的估计耗时
+        wall = time.perf_counter() - start
+        serial_estimate = sum(timings)
+        speedup = serial_estimate / wall if wall > 0 else 1.0
+        if failed:
+            report.text(f"\n{Colors.RED}{failed}/{len(accounts)} 个账户的持仓获取失败或不完整{Colors.RESET}")
+        report.text(f"\n耗时 {wall:.2f}s (并发 {workers}，{len(timings)} 次请求，"
+                    f"串行估计 {serial_estimate:.2f}s，加速 {speedup:.1f}x)")
+    return 1 if failed else 0
+
+def fetch_balance(session, acc):
+    """获取单个账户的余额，返回 (Balance, 错误信息)；失败时 Balance 为 None"""
+    url = f"{config.BASE_URL}/v1/accounts/{acc.account_id_key}/balance.json"
+    params = {"instType": acc.institution_type, "realTimeNAV": "true"}
+    try:
+        bal_res = session.get(url, params=params, headers={"consumerkey": config.CONSUMER_KEY},
+                              timeout=config.REQUEST_TIMEOUT)
+    except requests.Timeout:
+        return None, "超时"
+    except QuotaExceededError as e:
+        return None, str(e)
+    except requests.RequestException:
+        return None, "网络错误"
+
+    if bal_res.status_code != 200:
+        return None, f"失败 ({bal_res.status_code})"
+    return codec.decode(bal_res, decode_balance), None
+
+def cmd_account_balance(session, concurrency=config.DEFAULT_CONCURRENCY, refresh=False, fmt="table"):
+    """处理 'account balance' 命令；有账户获取失败时返回退出码 1"""
+    accounts = get_accounts(session, refresh)
+    if not accounts:
+        return 1 if accounts is None else 0
+
+    # 并发获取所有账户余额，单个账户超时或失败不影响其他账户
+    workers = max(1, min(concurrency, len(accounts)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        balances = list(pool.map(lambda acc: fetch_balance(session, acc), accounts))
+
+    with Report(fmt) as report:
+        table = report.table("balances", [
+            Column("account_id", text=False),
+            Column("account", "账户描述", 20),
+            Column("net_value", "净资产 (Net Value)", 18, spec="<17,.2f", prefix="$"),
+            Column("cash_buying_power", "现金购买力", 15, spec="<14,.2f", prefix="$"),
+            Column("margin_buying_power", "保证金购买力", 15, spec="<14,.2f", prefix="$"),
+            Column("status", "状态", color=lambda status: None if status == "OK" else Colors.RED),
+        ], rule="=")
+        table.header("")
+
+        total_net = total_cash = total_margin = 0.0
+        for acc, (bal, error) in zip(accounts, balances):
+            row = {"account_id": acc.account_id, "account": acc.description, "status": error or "OK"}
+            if bal is not None:
+                total_net += bal.net_value
+                total_cash += bal.cash_buying_power
+                total_margin += bal.margin_buying_power
+                row.update(net_value=bal.net_value, cash_buying_power=bal.cash_buying_power,
+                           margin_buying_power=bal.margin_buying_power)
+            table.row(row)
+
+        failed = sum(1 for _, error in balances if error)
+        table.footer({"account": "合计", "net_value": total_net, "cash_buying_power": total_cash,
+                      "margin_buying_power": total_margin, "status": f"{len(accounts) - failed}/{len(accounts)}"})
+        report.text()
+    return 1 if failed else 0
@@ -0,0 +1,43 @@
+"""JSON 解码后端：安装了 orjson 时用它，否则回退到标准库 json
+
+响应体直接按字节解码 (不经过 response.text 的编码探测)，再交给 models 中的
+解码函数按 schema 取出用到的字段；未读取的字段不会进入任何记录。
+    JSON_BACKEND = auto | orjson | json   (config.ini，默认 auto)
+"""
+import json
+
+from etrade_cli import config
+
+_loads = None
+_backend = None
+
+def select_backend(name="auto"):
+    """选择解码后端，返回实际使用的名称；指定 orjson 但未安装时回退到 json"""
+    global _loads, _backend
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            pass
+        else:
+            _loads, _backend = orjson.loads, "orjson"
+            return _backend
+    _loads, _backend = json.loads, "json"
+    return _backend
+
+def backend():
+    """当前使用的后端名称 (第一次调用时按配置选择)"""
+    if _backend is None:
+        select_backend(config.JSON_BACKEND)
+    return _backend
+
+def loads(content):
+    """把 bytes/str 解码为 Python 对象"""
+    if _loads is None:
+        backend()
+    return _loads(content)
+
+def decode(response, schema=None, *args):
+    """解码响应体；给出 schema (models 中的解码函数) 时直接返回解码后的记录"""
+    data = loads(response.content)
+    return schema(data, *args) if schema is not None else data
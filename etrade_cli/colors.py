@@ -0,0 +1,19 @@
+"""终端颜色代码 (用于美化输出)"""
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+
+# 原始颜色代码，守护进程按每个请求开关颜色时用来恢复
+_CODES = {name: value for name, value in vars(Colors).items() if not name.startswith('_')}
+
+def disable_colors():
+    """关闭颜色 (输出不是终端或不是表格格式时)，之后所有颜色代码都为空串"""
+    Colors.GREEN = Colors.RED = Colors.RESET = Colors.BOLD = ''
+
+def enable_colors():
+    """恢复颜色代码"""
+    for name, value in _CODES.items():
+        setattr(Colors, name, value)
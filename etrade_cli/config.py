@@ -0,0 +1,89 @@
+"""配置：常量直接定义，config.ini 中的设置在第一次访问时才读取和解析"""
+import sys
+
+# 配置文件路径 (相对当前目录)
+CONFIG_FILE = 'config.ini'
+
+# 并发获取账户数据时的默认线程数
+DEFAULT_CONCURRENCY = 8
+# 单个请求的超时时间 (秒)，避免一个慢账户拖住整份报表
+REQUEST_TIMEOUT = 10
+# 持仓接口每页返回的条数
+PORTFOLIO_PAGE_SIZE = 50
+# 订单列表每页返回的条数 (orders cancel 扫描挂单时使用，接口上限 100)
+ORDER_PAGE_SIZE = 100
+# 单次行情请求的代码数上限 (带 overrideSymbolCount 时为 50)
+QUOTE_BATCH_SIZE = 50
+# quote watch 的默认/最大轮询间隔 (秒)
+DEFAULT_WATCH_INTERVAL = 2.0
+WATCH_MAX_INTERVAL = 60.0
+# 配额计数每累计多少次调用写一次盘 (退出时也会写盘)
+QUOTA_FLUSH_EVERY = 20
+# 预计同时调用接口的进程数：剩余配额不足 QUOTA_FLUSH_EVERY × 该值时，每次调用都按磁盘上的计数检查并立即写盘
+QUOTA_PROCESSES = 4
+# 报表输出格式 (--format)，第一个为默认
+OUTPUT_FORMATS = ("table", "csv", "json", "ndjson")
+# account summary 中列出的前 N 大标的，以及盈亏分布直方图的分档 (收益率 %)
+SUMMARY_TOP = 10
+SUMMARY_RETURN_BINS = (-50, -20, -10, 0, 10, 20, 50)
+
+# 来自 config.ini 的设置: 名称 -> (键, 默认值, 类型)；默认值为 None 表示必填
+SETTINGS = {
+    "CONSUMER_KEY": ("CONSUMER_KEY", None, str),
+    "CONSUMER_SECRET": ("CONSUMER_SECRET", None, str),
+    # 自动选择 URL：优先读取 PROD，如果被注释则回退到正式环境地址
+    "BASE_URL": ("PROD_BASE_URL", "https://api.etrade.com", str),
+    # 连接池参数：缓存的主机连接池个数，以及每个主机保持的最大长连接数
+    "POOL_CONNECTIONS": ("POOL_CONNECTIONS", "4", int),
+    "POOL_MAXSIZE": ("POOL_MAXSIZE", str(DEFAULT_CONCURRENCY), int),
+    # 账户列表缓存文件及有效期 (秒)，账户列表一天之内几乎不会变化
+    "ACCOUNT_CACHE_FILE": ("ACCOUNT_CACHE_FILE", ".account_cache.json", str),
+    "ACCOUNT_CACHE_TTL": ("ACCOUNT_CACHE_TTL", "43200", int),
+    # 各类接口每秒请求数上限，0 表示不限流
+    "RATE_LIMIT_MARKET": ("RATE_LIMIT_MARKET", "4", float),
+    "RATE_LIMIT_ACCOUNTS": ("RATE_LIMIT_ACCOUNTS", "2", float),
+    "RATE_LIMIT_ORDERS": ("RATE_LIMIT_ORDERS", "2", float),
+    # 当日调用计数文件及上限，0 表示不限
+    "QUOTA_FILE": ("QUOTA_FILE", ".api_quota.json", str),
+    "DAILY_QUOTA": ("DAILY_QUOTA", "0", int),
+    # 共享令牌文件 (多个进程共用，不再写回 config.ini)，以及登录租约的有效期 (秒)：
+    # 一个进程登录期间其他进程等它完成，持有者异常退出或超时后租约失效
+    "TOKEN_FILE": ("TOKEN_FILE", ".etrade_tokens.json", str),
+    "LOGIN_LEASE": ("LOGIN_LEASE", "600", int),
+    # 令牌空闲多久 (秒) 后由后台线程续期 (E*TRADE 空闲两小时失效)，以及后台检查的间隔
+    "TOKEN_RENEW_IDLE": ("TOKEN_RENEW_IDLE", "5400", int),
+    "TOKEN_RENEW_CHECK": ("TOKEN_RENEW_CHECK", "60", int),
+    # 下单日志 (orders place 持久化 clientOrderId 和下单状态，重试时据此避免重复下单)
+    "ORDER_JOURNAL": ("ORDER_JOURNAL", ".order_journal.jsonl", str),
+    # 守护进程 (main.py daemon) 监听的 Unix socket 路径
+    "DAEMON_SOCKET": ("DAEMON_SOCKET", ".etrade_daemon.sock", str),
+    # JSON 解码后端：auto (有 orjson 就用)、orjson 或 json
+    "JSON_BACKEND": ("JSON_BACKEND", "auto", str),
+}
+
+_parser = None
+
+def load():
+    """读取 config.ini (只在第一次调用时解析)，返回 ConfigParser"""
+    global _parser
+    if _parser is None:
+        import configparser
+        parser = configparser.ConfigParser()
+        parser.read(CONFIG_FILE)
+
+        # 检查配置是否存在
+        if parser["DEFAULT"].get("CONSUMER_KEY", "PLEASE_ENTER").startswith("PLEASE_ENTER"):
+            print("错误: 请先在 config.ini 中填入您的 Sandbox Key 和 Secret。")
+            sys.exit(1)
+        _parser = parser
+    return _parser
+
+def __getattr__(name):
+    """按需读取 SETTINGS 中的设置，结果缓存为模块属性"""
+    if name not in SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    key, default, cast = SETTINGS[name]
+    section = load()["DEFAULT"]
+    value = cast(section[key] if default is None else section.get(key, default))
+    globals()[name] = value
+    return value
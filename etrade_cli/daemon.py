@@ -0,0 +1,155 @@
+"""常驻守护进程：持有已认证的会话、连接池和已导入的模块，CLI 通过本地 Unix socket 把命令交给它执行
+
+协议是每行一个 JSON：客户端发送 {"argv": [...], "tty": 是否终端}，
+守护进程依次回送 {"out": 文本} / {"err": 文本}，最后是 {"exit": 退出码}。
+命令在守护进程中逐个执行 (stdout/stderr 和颜色设置是进程级的)，命令内部的并发请求不受影响。
+客户端一侧只用到 socket 和 json，不导入 rauth、requests，启动开销只有解释器本身。
+"""
+import os
+import sys
+import json
+import socket
+
+from etrade_cli import config
+
+def send(sock, message):
+    sock.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode())
+
+def connect():
+    """连接守护进程，没有运行 (socket 不存在或连接被拒绝) 时返回 None"""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(config.DAEMON_SOCKET):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(config.DAEMON_SOCKET)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+def forward(argv, tty):
+    """把命令交给守护进程执行并原样输出结果，返回命令的退出码；
+    守护进程没有运行时返回 None，由调用方在本进程执行"""
+    sock = connect()
+    if sock is None:
+        return None
+    code = 1
+    with sock, sock.makefile("rb") as reader:
+        send(sock, {"argv": argv, "tty": tty})
+        try:
+            for line in reader:
+                message = json.loads(line)
+                if "out" in message:
+                    sys.stdout.write(message["out"])
+                elif "err" in message:
+                    sys.stderr.write(message["err"])
+                else:
+                    code = message.get("exit", 1)
+                    break
+            else:
+                print("错误: 守护进程在命令完成前断开了连接", file=sys.stderr)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # 输出接到 head 等提前退出的程序：关闭连接即可，守护进程那边会放弃这条命令的剩余输出
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return code
+
+def request(message):
+    """发送控制请求 (status / stop)，返回守护进程的答复；没有运行时返回 None"""
+    sock = connect()
+    if sock is None:
+        return None
+    with sock, sock.makefile("rb") as reader:
+        send(sock, message)
+        line = reader.readline()
+    return json.loads(line) if line else None
+
+class ClientStream:
+    """命令执行期间替换 sys.stdout / sys.stderr：写入的文本转发给客户端的对应通道"""
+
+    def __init__(self, sock, channel, tty):
+        self.sock = sock
+        self.channel = channel
+        self.tty = tty
+
+    def write(self, text):
+        if text:
+            send(self.sock, {self.channel: text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self.tty
+
+def serve(execute, session):
+    """在前台运行守护进程直到收到 stop 请求或 Ctrl+C
+
+    execute(argv, session, tty) 解析并执行一条命令，返回退出码；session 为常驻的会话。
+    """
+    import time
+    import threading
+    import traceback
+    import socketserver
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("错误: 当前平台不支持 Unix socket，无法运行守护进程。")
+        return
+    path = config.DAEMON_SOCKET
+    if request({"status": True}) is not None:
+        print(f"守护进程已在运行 ({path})")
+        return
+    if os.path.exists(path):
+        os.unlink(path)  # 上次异常退出留下的 socket 文件
+
+    lock = threading.Lock()
+    started = time.time()
+    served = [0]
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                message = json.loads(self.rfile.readline() or "{}")
+                if message.get("stop"):
+                    send(self.connection, {"stopping": True})
+                    threading.Thread(target=self.server.shutdown).start()
+                elif message.get("status"):
+                    send(self.connection, {"pid": os.getpid(), "uptime": time.time() - started, "served": served[0]})
+                elif "argv" in message:
+                    send(self.connection, {"exit": self.run(message["argv"], bool(message.get("tty")))})
+            except (OSError, ValueError):
+                pass  # 客户端中途断开 (如输出接到 head) 或发来无法解析的请求
+
+        def run(self, argv, tty):
+            with lock:
+                served[0] += 1
+                saved = sys.stdout, sys.stderr
+                sys.stdout = ClientStream(self.connection, "out", tty)
+                sys.stderr = ClientStream(self.connection, "err", tty)
+                try:
+                    return execute(argv, session, tty)
+                except Exception:
+                    traceback.print_exc()
+                    return 1
+                finally:
+                    sys.stdout, sys.stderr = saved
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o077)  # socket 只允许当前用户连接
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+    print(f"守护进程已启动 (pid {os.getpid()})，监听 {path}；按 Ctrl+C 或运行 main.py daemon stop 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+    print(f"守护进程已停止，共处理 {served[0]} 条命令")
@@ -0,0 +1,73 @@
+"""下单日志：为篮子中的每笔订单持久化 clientOrderId 和下单状态，使重试不会重复下单
+
+日志是追加写入的 JSONL (ORDER_JOURNAL)，每次状态变化写一行，
+{"batch", "basket", "key", "line", "client_order_id", "state", ...}，读取时按顺序回放、后写的覆盖先写的。
+写入在文件锁内追加并 fsync，发送请求前 clientOrderId 已经落盘：
+超时或进程中断后重新运行同一个篮子，会沿用同一个 clientOrderId，
+E*TRADE 对同一账户内重复的 clientOrderId 会拒绝下单，因此同一笔订单最多成交一次。
+
+批次跟着篮子文件走：同一路径的篮子重新运行 (哪怕改过内容) 都延续最近的批次，直到显式开始新批次。
+批次内的订单以内容 (账户、各腿、价格类型和价格等，见 orders.order_keys) 为键，
+修改、增删篮子中的其他行不会影响已分配的 clientOrderId 和已下单的状态。
+
+状态: new (已分配 ID) -> placing (已预览，正在下单) -> placed / rejected / unknown (超时等，结果未知)；
+预览失败为 preview_failed。除 placed 外的订单重新运行时都会以原 clientOrderId 重试；
+placing / unknown 的订单可能已经下单，重试前先按 clientOrderId 在订单列表中查找。
+"""
+import os
+import json
+import time
+import secrets
+import threading
+
+from etrade_cli.tokens import file_lock
+
+# 结果未知、可能已经下单的状态
+UNRESOLVED = ("placing", "unknown")
+
+def new_client_order_id():
+    """20 位十六进制：毫秒时间戳 (11 位) + 36 位随机数，跨进程、跨天都不会重复"""
+    return f"{int(time.time() * 1000):011x}{secrets.token_hex(5)[:9]}"
+
+def new_batch_id():
+    """批次标识：开始时间 + 随机数，便于在日志中辨认"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+
+class OrderJournal:
+    """一个篮子文件的下单日志；线程安全，也可以被多个进程同时追加"""
+
+    def __init__(self, path, basket):
+        self.path = path
+        self.basket = os.path.abspath(basket)
+        self.batch = None
+        self.lock = threading.Lock()
+
+    def replay(self):
+        """回放日志，返回本篮子 {批次: {订单键: 最新状态 dict}}，按批次最后一次写入的先后排列"""
+        batches = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for text in f:
+                    try:
+                        record = json.loads(text)
+                    except ValueError:
+                        continue  # 写到一半中断的行
+                    if isinstance(record, dict) and record.get("basket") == self.basket and "key" in record:
+                        entries = batches.pop(record["batch"], {})
+                        entries.setdefault(record["key"], {}).update(record)
+                        batches[record["batch"]] = entries
+        except OSError:
+            pass
+        return batches
+
+    def record(self, *entries):
+        """追加若干条本批次的状态 (每条是含 key 的 dict)，返回前已 fsync 到磁盘"""
+        now = time.time()
+        text = "".join(json.dumps({"batch": self.batch, "basket": self.basket, "time": now, **entry},
+                                  ensure_ascii=False) + "\n"
+                       for entry in entries)
+        with self.lock, file_lock(f"{self.path}.lock"):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
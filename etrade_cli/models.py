@@ -0,0 +1,282 @@
+"""API 响应的解码层：把嵌套 JSON 一次性解码成带 __slots__ 的紧凑记录
+
+渲染和统计代码只读属性，不再对原始 dict 反复做 .get 链和 in 判断；
+解码时统一转换字段类型，缺失的数值字段记为 0，缺失的文本字段记为空串。
+"""
+
+def _float(value):
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+def _str(value):
+    return str(value) if value is not None else ""
+
+def _as_list(value):
+    """E*TRADE 在只有一项时有时返回对象而不是列表"""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+class Record:
+    """记录基类：按 __slots__ 提供 repr、相等比较和转换为 dict"""
+    __slots__ = ()
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    # 记录是可变的，部分字段是列表 (如 OrderSpec.legs)，按字段求哈希既不稳定也可能失败；
+    # 明确声明不可哈希，需要做键时用其中的标识字段 (如 account_id_key、order_id)
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Account(Record):
+    """账户 (AccountListResponse.Accounts.Account 的一项)"""
+    __slots__ = ("account_id", "account_id_key", "description", "account_type", "institution_type", "status")
+
+    def __init__(self, account_id, account_id_key, description="", account_type="",
+                 institution_type="BROKERAGE", status=""):
+        self.account_id = account_id
+        self.account_id_key = account_id_key
+        self.description = description
+        self.account_type = account_type
+        self.institution_type = institution_type
+        self.status = status
+
+    @classmethod
+    def from_json(cls, d):
+        return cls(_str(d.get("accountId")), _str(d.get("accountIdKey")), _str(d.get("accountDesc")).strip(),
+                   _str(d.get("accountType")), d.get("institutionType") or "BROKERAGE",
+                   _str(d.get("accountStatus")))
+
+class Position(Record):
+    """持仓 (PortfolioResponse.AccountPortfolio.Position 的一项)，价格取自 Quick 块"""
+    __slots__ = ("symbol", "security_type", "description", "quantity", "price_paid", "last_trade",
+                 "market_value", "total_gain", "total_gain_pct")
+
+    def __init__(self, symbol, security_type="EQ", description="", quantity=0.0, price_paid=0.0,
+                 last_trade=0.0, market_value=0.0, total_gain=0.0, total_gain_pct=0.0):
+        self.symbol = symbol
+        self.security_type = security_type
+        self.description = description
+        self.quantity = quantity
+        self.price_paid = price_paid
+        self.last_trade = last_trade
+        self.market_value = market_value
+        self.total_gain = total_gain
+        self.total_gain_pct = total_gain_pct
+
+    @classmethod
+    def from_json(cls, d):
+        product = d.get("Product") or {}
+        quick = d.get("Quick") or {}
+        return cls(product.get("symbol") or "N/A", product.get("securityType") or "EQ",
+                   d.get("symbolDescription") or "N/A", _float(d.get("quantity")), _float(d.get("pricePaid")),
+                   _float(quick.get("lastTrade")), _float(d.get("marketValue")), _float(d.get("totalGain")),
+                   _float(d.get("totalGainPct")))
+
+class Balance(Record):
+    """账户余额 (BalanceResponse)；净资产优先取实时值"""
+    __slots__ = ("account_id", "description", "net_value", "cash_buying_power", "margin_buying_power")
+
+    def __init__(self, account_id="", description="", net_value=0.0, cash_buying_power=0.0,
+                 margin_buying_power=0.0):
+        self.account_id = account_id
+        self.description = description
+        self.net_value = net_value
+        self.cash_buying_power = cash_buying_power
+        self.margin_buying_power = margin_buying_power
+
+    @classmethod
+    def from_json(cls, d):
+        computed = d.get("Computed") or {}
+        real_time = computed.get("RealTimeValues") or {}
+        return cls(_str(d.get("accountId")), _str(d.get("accountDescription")),
+                   _float(real_time.get("totalAccountValue", computed.get("totalAccountValue"))),
+                   _float(computed.get("cashBuyingPower")), _float(computed.get("marginBuyingPower")))
+
+class Order(Record):
+    """订单中的一条腿 (Order.OrderDetail.Instrument)，多腿订单解码为多条共享 order_id 的记录"""
+    __slots__ = ("order_id", "order_type", "status", "placed_time", "price_type", "order_term", "limit_price",
+                 "stop_price", "symbol", "security_type", "description", "action", "quantity",
+                 "filled_quantity", "execution_price", "client_order_id")
+
+    def __init__(self, order_id, order_type="EQ", status="", placed_time=0, price_type="", order_term="",
+                 limit_price=0.0, stop_price=0.0, symbol="", security_type="EQ", description="", action="",
+                 quantity=0.0, filled_quantity=0.0, execution_price=0.0, client_order_id=""):
+        self.order_id = order_id
+        self.order_type = order_type
+        self.status = status
+        self.placed_time = placed_time
+        self.price_type = price_type
+        self.order_term = order_term
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.symbol = symbol
+        self.security_type = security_type
+        self.description = description
+        self.action = action
+        self.quantity = quantity
+        self.filled_quantity = filled_quantity
+        self.execution_price = execution_price
+        self.client_order_id = client_order_id
+
+    @classmethod
+    def from_json(cls, d):
+        """解码 OrdersResponse.Order 的一项，返回各腿的记录列表"""
+        legs = []
+        for detail in _as_list(d.get("OrderDetail")):
+            for instrument in _as_list(detail.get("Instrument")):
+                product = instrument.get("Product") or {}
+                legs.append(cls(int(d.get("orderId", 0)), d.get("orderType") or "EQ", _str(detail.get("status")),
+                                int(detail.get("placedTime") or detail.get("executedTime") or 0),
+                                _str(detail.get("priceType")), _str(detail.get("orderTerm")),
+                                _float(detail.get("limitPrice")), _float(detail.get("stopPrice")),
+                                _str(product.get("symbol")), product.get("securityType") or "EQ",
+                                _str(instrument.get("symbolDescription")), _str(instrument.get("orderAction")),
+                                _float(instrument.get("orderedQuantity")),
+                                _float(instrument.get("filledQuantity")),
+                                _float(instrument.get("averageExecutionPrice")),
+                                _str(d.get("clientOrderId") or detail.get("clientOrderId"))))
+        return legs
+
+def decode_accounts(data):
+    """AccountListResponse -> [Account]"""
+    accounts = ((data or {}).get("AccountListResponse") or {}).get("Accounts") or {}
+    return [Account.from_json(a) for a in _as_list(accounts.get("Account"))]
+
+def decode_portfolio_page(data, page_number=1):
+    """PortfolioResponse -> ([Position], 下一页页码或 None)"""
+    positions = []
+    next_page = None
+    for section in _as_list(((data or {}).get("PortfolioResponse") or {}).get("AccountPortfolio")):
+        positions.extend(Position.from_json(p) for p in _as_list(section.get("Position")))
+        if section.get("nextPageNo"):
+            next_page = int(section["nextPageNo"])
+        elif int(section.get("totalPages", 1) or 1) > page_number:
+            next_page = page_number + 1
+    return positions, next_page
+
+def decode_balance(data):
+    """BalanceResponse -> Balance"""
+    return Balance.from_json((data or {}).get("BalanceResponse") or {})
+
+# 行情看板读取的 All 块字段，其余字段 (约 80 个) 解码时直接丢弃
+QUOTE_FIELDS = ("lastTrade", "changeClose", "changeClosePercentage", "bid", "ask", "totalVolume")
+
+def decode_quotes(data, fields=QUOTE_FIELDS):
+    """QuoteResponse -> {symbol: {字段: 值, "dateTime": ...}}，只保留 fields 中的字段"""
+    quotes = {}
+    for quote in _as_list(((data or {}).get("QuoteResponse") or {}).get("QuoteData")):
+        symbol = (quote.get("Product") or {}).get("symbol")
+        if symbol:
+            detail = quote.get("All") or {}
+            quotes[symbol] = {name: detail[name] for name in fields if name in detail}
+            quotes[symbol]["dateTime"] = quote.get("dateTime", "")
+    return quotes
+
+def decode_orders(data):
+    """OrdersResponse -> ([Order], 下一页 marker 或 None)"""
+    response = (data or {}).get("OrdersResponse") or {}
+    orders = []
+    for order in _as_list(response.get("Order")):
+        orders.extend(Order.from_json(order))
+    return orders, response.get("marker") or None
+
+class Preview(Record):
+    """订单预览结果 (PreviewOrderResponse)；多腿订单的 symbol/action/quantity 取第一条腿"""
+    __slots__ = ("preview_id", "symbol", "action", "quantity", "price_type", "limit_price",
+                 "estimated_commission", "estimated_total", "message")
+
+    def __init__(self, preview_id=None, symbol="", action="", quantity=0.0, price_type="", limit_price=0.0,
+                 estimated_commission=0.0, estimated_total=0.0, message=""):
+        self.preview_id = preview_id
+        self.symbol = symbol
+        self.action = action
+        self.quantity = quantity
+        self.price_type = price_type
+        self.limit_price = limit_price
+        self.estimated_commission = estimated_commission
+        self.estimated_total = estimated_total
+        self.message = message
+
+    @classmethod
+    def from_json(cls, d):
+        ids = [p.get("previewId") for p in _as_list(d.get("PreviewIds")) if p.get("previewId") is not None]
+        orders = _as_list(d.get("Order"))
+        order = orders[0] if orders else {}
+        instruments = _as_list(order.get("Instrument"))
+        instrument = instruments[0] if instruments else {}
+        # 预览也可能带回警告 (如超出购买力)，只保留第一条说明
+        messages = _as_list((order.get("messages") or {}).get("Message"))
+        return cls(int(ids[0]) if ids else None, _str((instrument.get("Product") or {}).get("symbol")),
+                   _str(instrument.get("orderAction")), _float(instrument.get("quantity")),
+                   _str(order.get("priceType")), _float(order.get("limitPrice")),
+                   sum(_float(o.get("estimatedCommission")) for o in orders),
+                   sum(_float(o.get("estimatedTotalAmount")) for o in orders),
+                   _str(messages[0].get("description")) if messages else "")
+
+def decode_preview(data):
+    """PreviewOrderResponse -> Preview"""
+    return Preview.from_json((data or {}).get("PreviewOrderResponse") or {})
+
+class Placed(Record):
+    """下单结果 (PlaceOrderResponse)"""
+    __slots__ = ("order_id", "placed_time", "message")
+
+    def __init__(self, order_id=None, placed_time=0, message=""):
+        self.order_id = order_id
+        self.placed_time = placed_time
+        self.message = message
+
+    @classmethod
+    def from_json(cls, d):
+        ids = [o.get("orderId") for o in _as_list(d.get("OrderIds")) if o.get("orderId") is not None]
+        orders = _as_list(d.get("Order"))
+        messages = _as_list(((orders[0] if orders else {}).get("messages") or {}).get("Message"))
+        return cls(int(ids[0]) if ids else None, int(d.get("placedTime") or 0),
+                   _str(messages[0].get("description")) if messages else "")
+
+def decode_placed(data):
+    """PlaceOrderResponse -> Placed"""
+    return Placed.from_json((data or {}).get("PlaceOrderResponse") or {})
+
+class Cancelled(Record):
+    """撤单结果 (CancelOrderResponse)"""
+    __slots__ = ("order_id", "cancel_time", "message")
+
+    def __init__(self, order_id=None, cancel_time=0, message=""):
+        self.order_id = order_id
+        self.cancel_time = cancel_time
+        self.message = message
+
+    @classmethod
+    def from_json(cls, d):
+        messages = _as_list((d.get("Messages") or {}).get("Message"))
+        return cls(int(d["orderId"]) if d.get("orderId") is not None else None, int(d.get("cancelTime") or 0),
+                   _str(messages[0].get("description")) if messages else "")
+
+def decode_cancelled(data):
+    """CancelOrderResponse -> Cancelled"""
+    return Cancelled.from_json((data or {}).get("CancelOrderResponse") or {})
+
+def decode_error(data):
+    """错误响应 {"Error": {"code", "message"}} -> 说明文字，没有时返回空串"""
+    error = (data or {}).get("Error") or {}
+    return _str(error.get("message"))
+
+def decode_error_detail(data):
+    """错误响应 -> (错误代码 int 或 None, 说明文字)"""
+    error = (data or {}).get("Error") or {}
+    try:
+        code = int(error["code"])
+    except (KeyError, TypeError, ValueError):
+        code = None
+    return code, _str(error.get("message"))
@@ -0,0 +1,685 @@
+"""orders 子命令：从 CSV/JSON 篮子文件批量预览订单，或流水线式地预览并下单；按条件批量撤单
+
+篮子文件每行一笔订单，列 (JSON 为同名键)：
+    symbol, action, quantity                  必填；股票的 action 为 BUY / SELL / BUY_TO_COVER / SELL_SHORT
+    call_put, expiry, strike                  期权必填 (CALL / PUT、YYYY-MM-DD、行权价)；
+                                              期权的 action 为 BUY_OPEN / SELL_OPEN / BUY_CLOSE / SELL_CLOSE
+    price_type, limit_price, stop_price       可选；给了 limit_price 时默认 LIMIT，否则 MARKET
+    order_term                                可选，默认 GOOD_FOR_DAY
+    account                                   可选，账户号或账户描述，默认取 --account (只有一个账户时可省略)
+    client_order_id                           可选，不填则自动生成 (下单时持久化到下单日志)
+JSON 篮子中的多腿价差用 "legs": [{symbol, action, quantity, call_put, expiry, strike}, ...] 代替单腿的列，
+price_type 必须是 NET_DEBIT / NET_CREDIT / NET_EVEN。
+整个文件先全部校验，有任何一行出错就不发送请求；请求经有界线程池并发发出，受全局限流约束。
+"""
+import os
+import csv
+import re
+import json
+import hashlib
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import requests
+
+from etrade_cli import codec, config, payload
+from etrade_cli.accounts import get_accounts
+from etrade_cli.colors import Colors
+from etrade_cli.journal import UNRESOLVED, OrderJournal, new_batch_id, new_client_order_id
+from etrade_cli.models import (decode_cancelled, decode_error, decode_error_detail, decode_orders, decode_placed,
+                               decode_preview)
+from etrade_cli.payload import LIMIT_PRICE_TYPES, STOP_PRICE_TYPES, Leg, OrderSpec
+from etrade_cli.render import Column, Report
+from etrade_cli.tokens import eastern_zone
+
+class BasketOrder(OrderSpec):
+    """篮子文件中的一笔订单；line 为文件中的行号 (JSON 为序号)，account 为解析后的 Account"""
+    __slots__ = ("line", "account")
+
+    def __init__(self, line, account, legs, price_type="MARKET", order_term="GOOD_FOR_DAY", limit_price=None,
+                 stop_price=None, client_order_id=""):
+        super().__init__(legs, price_type, order_term, limit_price, stop_price, client_order_id)
+        self.line = line
+        self.account = account
+
+def read_basket(path):
+    """读取篮子文件，返回 [(行号, {列名: 值})]；.json 为对象列表 (或 {"orders": [...]})，其他按 CSV 读取"""
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data.get("orders", []) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON 篮子应为订单对象的列表")
+        return list(enumerate(rows, 1))
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        # 第 1 行是表头，数据从第 2 行开始；跳过空行
+        return [(reader.line_num, row) for row in reader if any((v or "").strip() for v in row.values())]
+
+def parse_price(value, name):
+    if value in (None, ""):
+        return None
+    try:
+        price = float(value)
+    except ValueError:
+        raise ValueError(f"{name} 不是数字") from None
+    if not 0 < price < float("inf"):
+        raise ValueError(f"{name} 必须大于 0")
+    return price
+
+def normalize(row):
+    return {str(k).strip().lower(): str(v).strip() if v is not None else "" for k, v in row.items() if k}
+
+def parse_leg(row):
+    """一条腿：symbol, action, quantity，期权另有 call_put, expiry, strike；action 等取值由 payload.validate 检查"""
+    symbol = row.get("symbol", "").upper()
+    if not symbol:
+        raise ValueError("缺少 symbol")
+    try:
+        quantity = float(row.get("quantity", ""))
+    except ValueError:
+        raise ValueError("quantity 不是数字") from None
+    if quantity <= 0 or not quantity.is_integer():
+        raise ValueError("quantity 必须是正整数")
+    action = row.get("action", "").upper()
+    if not (row.get("call_put") or row.get("expiry") or row.get("strike")):
+        return Leg(symbol, action, int(quantity))
+
+    call_put = row.get("call_put", "").upper()
+    call_put = {"C": "CALL", "P": "PUT"}.get(call_put, call_put)
+    try:
+        expiry = date.fromisoformat(row.get("expiry", ""))
+    except ValueError:
+        raise ValueError("expiry 必须是 YYYY-MM-DD 格式的日期") from None
+    strike = parse_price(row.get("strike"), "strike")
+    if strike is None:
+        raise ValueError("期权需要 strike")
+    return Leg(symbol, action, int(quantity), call_put, expiry, strike)
+
+def parse_legs(legs):
+    """JSON 篮子中价差的 legs 列表"""
+    if not isinstance(legs, list) or not legs or not all(isinstance(leg, dict) for leg in legs):
+        raise ValueError("legs 应为非空的腿对象列表")
+    parsed = []
+    for number, leg in enumerate(legs, 1):
+        try:
+            parsed.append(parse_leg(normalize(leg)))
+        except ValueError as e:
+            raise ValueError(f"第 {number} 条腿: {e}") from None
+    return parsed
+
+def parse_order(line, row, accounts, default_account):
+    """校验并转换一行，出错时抛出 ValueError"""
+    legs = next((value for key, value in row.items() if str(key).strip().lower() == "legs"), None)
+    row = normalize({key: value for key, value in row.items() if str(key).strip().lower() != "legs"})
+    legs = parse_legs(legs) if legs is not None else [parse_leg(row)]
+    limit_price = parse_price(row.get("limit_price"), "limit_price")
+    stop_price = parse_price(row.get("stop_price"), "stop_price")
+
+    # 单腿订单可以省略 price_type，价差必须写明 NET_DEBIT / NET_CREDIT / NET_EVEN
+    price_type = row.get("price_type", "").upper()
+    if not price_type and len(legs) == 1:
+        price_type = "LIMIT" if limit_price else "MARKET"
+    order_term = row.get("order_term", "").upper() or "GOOD_FOR_DAY"
+
+    name = row.get("account") or default_account
+    if not name:
+        raise ValueError("缺少 account (有多个账户时请在文件中指定或使用 --account)")
+    account = accounts.get(name)
+    if account is None:
+        raise ValueError(f"未知账户: {name}")
+
+    order = BasketOrder(line, account, legs, price_type, order_term,
+                        limit_price if price_type in LIMIT_PRICE_TYPES else None,
+                        stop_price if price_type in STOP_PRICE_TYPES else None, row.get("client_order_id", ""))
+    payload.validate(order)
+    return order
+
+def load_basket(path, accounts, default_account=None):
+    """读取并校验篮子文件，返回 ([BasketOrder], [(行号, 错误)])；文件本身无法读取时抛出 ValueError"""
+    try:
+        rows = read_basket(path)
+    except OSError as e:
+        raise ValueError(f"无法读取篮子文件: {e.strerror or e}") from None
+    except (ValueError, csv.Error) as e:
+        raise ValueError(f"篮子文件格式错误: {e}") from None
+
+    # 账户既可以用账户号也可以用描述指定
+    by_name = {acc.description: acc for acc in accounts}
+    by_name.update({acc.account_id: acc for acc in accounts})
+    if default_account is None and len(accounts) == 1:
+        default_account = accounts[0].account_id
+
+    orders, errors = [], []
+    for line, row in rows:
+        try:
+            orders.append(parse_order(line, row, by_name, default_account))
+        except ValueError as e:
+            errors.append((line, str(e)))
+    first_line = {}
+    for order in orders:
+        key = (order.account.account_id, order.client_order_id)
+        if order.client_order_id and first_line.setdefault(key, order.line) != order.line:
+            errors.append((order.line, f"client_order_id {order.client_order_id} 与第 {first_line[key]} 行重复"))
+    return orders, sorted(errors)
+
+# E*TRADE 错误代码：同一账户内 clientOrderId 重复
+DUPLICATE_CLIENT_ORDER_ID = 1019
+# 下单请求返回这些状态码 (以及所有 5xx) 时订单可能已被网关之后的系统接受，结果记为 unknown 而不是 rejected
+UNCERTAIN_STATUS_CODES = (408, 429)
+
+def order_keys(orders):
+    """下单日志中各订单的内容键：账户、各腿、价格类型、期限、价格和篮子中指定的 clientOrderId 的摘要；
+    内容完全相同的多行按出现次序加 -1、-2 区分。与行号无关，修改篮子中的其他行不会改变键"""
+    keys, seen = [], {}
+    for order in orders:
+        legs = [(leg.symbol, leg.action, leg.quantity, leg.call_put, leg.expiry and leg.expiry.isoformat(), leg.strike)
+                for leg in order.legs]
+        content = json.dumps([order.account.account_id, legs, order.price_type, order.order_term, order.limit_price,
+                              order.stop_price, order.client_order_id])
+        digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+        seen[digest] = seen.get(digest, 0) + 1
+        keys.append(f"{digest}-{seen[digest]}")
+    return keys
+
+def api_error(response):
+    """非 200 响应的 (错误代码或 None, 说明)；响应体无法解析时抛出 ValueError"""
+    code, message = codec.decode(response, decode_error_detail)
+    return code, message or f"失败 ({response.status_code})"
+
+def post_order(session, order, action, body):
+    """POST 到 orders/{action}.json；返回响应，网络错误时抛出 requests.RequestException"""
+    url = f"{config.BASE_URL}/v1/accounts/{order.account.account_id_key}/orders/{action}.json"
+    headers = {"Content-Type": payload.CONTENT_TYPES["json"], "consumerKey": config.CONSUMER_KEY}
+    return session.post(url, header_auth=True, headers=headers, data=body, timeout=config.REQUEST_TIMEOUT)
+
+def preview_order(session, order):
+    """预览一笔订单，返回 (Preview, 错误代码, 错误信息)；失败时 Preview 为 None，错误代码只在 API 给出时有值"""
+    try:
+        response = post_order(session, order, "preview", payload.build(order))
+    except requests.Timeout:
+        return None, None, "超时"
+    except requests.RequestException:
+        return None, None, "网络错误"
+
+    try:
+        if response.status_code != 200:
+            return None, *api_error(response)
+        preview = codec.decode(response, decode_preview)
+    except ValueError:
+        return None, None, f"无法解析响应 ({response.status_code})"
+    if preview.preview_id is None:
+        return None, None, preview.message or "未返回 PreviewId"
+    return preview, None, None
+
+def place_order(session, order, preview_id):
+    """按预览结果下单，返回 (状态, orderId, 说明)；状态为 placed / rejected / unknown
+
+    超时等拿不到响应、以及 5xx / 408 / 429 的情况记为 unknown：订单可能已被接受，只能用同一个 clientOrderId 重试；
+    重试时 E*TRADE 以 clientOrderId 重复 (错误代码 1019) 拒绝，说明之前那次已经下单成功。
+    """
+    try:
+        response = post_order(session, order, "place", payload.build(order, "PlaceOrderRequest", preview_id))
+    except requests.Timeout:
+        return "unknown", None, "超时，结果未知"
+    except requests.RequestException:
+        return "unknown", None, "网络错误，结果未知"
+
+    uncertain = response.status_code >= 500 or response.status_code in UNCERTAIN_STATUS_CODES
+    try:
+        if response.status_code != 200:
+            code, message = api_error(response)
+            if code == DUPLICATE_CLIENT_ORDER_ID:
+                return "placed", None, "此前已下单 (clientOrderId 重复)"
+            if uncertain:
+                return "unknown", None, f"{message}，结果未知"
+            return "rejected", None, message
+        placed = codec.decode(response, decode_placed)
+    except ValueError:
+        return "unknown", None, f"无法解析响应 ({response.status_code})"
+    if placed.order_id is None:
+        return "rejected", None, placed.message or "未返回 OrderId"
+    return "placed", placed.order_id, placed.message
+
+def bounded_map(pool, func, items, window):
+    """按输入顺序逐个产出 func(item)；同时在途的任务不超过 window 个，大篮子也不会一次全部排进线程池"""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(func, item))
+    while pending:
+        yield pending.popleft().result()
+
+PREVIEW_COLUMNS = [
+    Column("line", "行", 4, ">"),
+    Column("account_id", text=False),
+    Column("account", "账户", 14),
+    Column("symbol", "Symbol", 14),
+    Column("action", "方向", 12),
+    Column("quantity", "数量", 8, ">", ","),
+    Column("price_type", "价格类型", 10),
+    Column("limit_price", "限价", 10, ">", ",.2f"),
+    Column("client_order_id", text=False),
+    Column("preview_id", "Preview ID", 12, ">"),
+    Column("estimated_commission", "预估佣金", 10, ">", ",.2f"),
+    Column("estimated_total", "预估总额 ($)", 14, ">", ",.2f"),
+    Column("status", "状态", color=lambda status: None if status.startswith("OK") else Colors.RED),
+]
+
+def prepare_basket(session, basket, account, refresh):
+    """读取并校验篮子，打印错误；可以继续时返回 [BasketOrder]，否则返回 None"""
+    accounts = get_accounts(session, refresh)
+    if not accounts:
+        return None
+    try:
+        orders, errors = load_basket(basket, accounts, account)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return None
+    if errors:
+        for line, message in errors:
+            print(f"  第 {line} 行: {message}")
+        print(f"{Colors.RED}篮子文件有 {len(errors)} 处错误，未发送任何请求。{Colors.RESET}")
+        return None
+    if not orders:
+        print("篮子文件中没有订单。")
+        return None
+    return orders
+
+def order_row(order, status):
+    return {"line": order.line, "account_id": order.account.account_id, "account": order.account.description,
+            "symbol": order.symbol, "action": order.action, "quantity": order.quantity,
+            "price_type": order.price_type, "limit_price": order.limit_price,
+            "client_order_id": order.client_order_id, "status": status}
+
+def show_progress(done, total, verb):
+    print(f"\r已{verb} {done}/{total}", end="", file=sys.stderr, flush=True)
+    if done == total:
+        print("\r" + " " * 24 + "\r", end="", file=sys.stderr, flush=True)
+
+def cmd_orders_preview(session, basket, account=None, concurrency=config.DEFAULT_CONCURRENCY, refresh=False,
+                       fmt="table"):
+    """处理 'orders preview --basket FILE' 命令；有订单预览失败时返回退出码 1"""
+    orders = prepare_basket(session, basket, account, refresh)
+    if orders is None:
+        return 1
+    for order in orders:
+        order.client_order_id = order.client_order_id or new_client_order_id()
+
+    start = time.perf_counter()
+    workers = max(1, min(concurrency, len(orders)))
+    progress = sys.stderr.isatty()
+    total_commission = total_amount = 0.0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool, Report(fmt) as report:
+        table = report.table("previews", PREVIEW_COLUMNS)
+        table.header("")
+        results = bounded_map(pool, lambda order: preview_order(session, order), orders, workers * 2)
+        for done, (order, (preview, _, error)) in enumerate(zip(orders, results), 1):
+            if progress:
+                show_progress(done, len(orders), "预览")
+            row = order_row(order, error or "OK")
+            if preview is not None:
+                total_commission += preview.estimated_commission
+                total_amount += preview.estimated_total
+                row.update(preview_id=preview.preview_id, estimated_commission=preview.estimated_commission,
+                           estimated_total=preview.estimated_total)
+                if preview.message:
+                    row["status"] = f"OK: {preview.message}"
+            else:
+                failed += 1
+            table.row(row)
+
+        table.footer({"account": "合计", "estimated_commission": total_commission, "estimated_total": total_amount,
+                      "status": f"{len(orders) - failed}/{len(orders)}"})
+        wall = time.perf_counter() - start
+        report.text(f"\n预览 {len(orders)} 笔订单，失败 {failed} 笔，耗时 {wall:.2f}s (并发 {workers})")
+    return 1 if failed else 0
+
+PLACE_COLUMNS = [
+    Column("line", "行", 4, ">"),
+    Column("account_id", text=False),
+    Column("account", "账户", 14),
+    Column("symbol", "Symbol", 14),
+    Column("action", "方向", 12),
+    Column("quantity", "数量", 8, ">", ","),
+    Column("price_type", "价格类型", 10),
+    Column("limit_price", "限价", 10, ">", ",.2f"),
+    Column("client_order_id", "clientOrderId", 20),
+    Column("order_id", "Order ID", 10, ">"),
+    Column("estimated_total", "预估总额 ($)", 14, ">", ",.2f"),
+    Column("status", "状态", color=lambda status: None if status.startswith(("OK", "已下单")) else Colors.RED),
+]
+
+def submit_order(session, journal, order, key):
+    """流水线中的一笔订单：预览 -> 记下 placing -> 下单 -> 记下结果，返回 (状态, orderId, 预估总额, 说明)
+
+    多个工作线程各自推进不同订单，一笔的下单请求与下一笔的预览请求在网络上重叠。
+    """
+    preview, code, error = preview_order(session, order)
+    if preview is None:
+        # 之前结果未知的订单重试时，预览就可能因 clientOrderId 重复被拒，说明上次已经下单
+        state = "placed" if code == DUPLICATE_CLIENT_ORDER_ID else "preview_failed"
+        journal.record({"key": key, "line": order.line, "state": state, "message": error})
+        return state, None, None, "此前已下单 (clientOrderId 重复)" if state == "placed" else error
+    journal.record({"key": key, "line": order.line, "state": "placing", "preview_id": preview.preview_id,
+                    "sent": time.time()})
+    state, order_id, message = place_order(session, order, preview.preview_id)
+    journal.record({"key": key, "line": order.line, "state": state, "order_id": order_id, "message": message})
+    return state, order_id, preview.estimated_total, message
+
+def find_placed(session, acc, client_order_ids, since):
+    """在账户的订单列表 (不限状态) 中按 clientOrderId 查找，返回 {clientOrderId: orderId}；
+    从 since (上次发出下单请求的时间戳) 的美东日期查起 (fromDate 按美东时间划分)，全部找到或翻到 since 之前下的订单就停止；
+    失败抛出 requests.RequestException"""
+    wanted = set(client_order_ids)
+    found = {}
+    earliest = (since - 60) * 1000  # placedTime 为毫秒，留一分钟时钟误差
+    marker = None
+    while True:
+        legs, marker = fetch_orders_page(session, acc, marker, None, datetime.fromtimestamp(since, eastern_zone()).date())
+        for leg in legs:
+            if leg.client_order_id in wanted:
+                found[leg.client_order_id] = leg.order_id
+        if not marker or len(found) == len(wanted) or legs and all(0 < leg.placed_time < earliest for leg in legs):
+            return found
+
+def resolve_unknown(session, journal, pending, entries):
+    """上次停在 placing / unknown 的订单可能已经下单：重试前按 clientOrderId 在各账户的订单列表中查找，
+    找到的记为 placed 并从 pending 中移除；查找失败时保持原状，重试仍用同一 clientOrderId，由 E*TRADE 拒绝重复"""
+    by_account = {}
+    for order, key in pending:
+        entry = entries.get(key, {})
+        if entry.get("state") in UNRESOLVED:
+            by_account.setdefault(order.account.account_id, []).append((order, key, entry))
+    resolved = set()
+    for items in by_account.values():
+        acc = items[0][0].account
+        try:
+            found = find_placed(session, acc, [order.client_order_id for order, _, _ in items],
+                                min(entry.get("sent", entry.get("time", time.time())) for _, _, entry in items))
+        except requests.RequestException as e:
+            print(f"注意: 查询账户 {acc.account_id} 的订单列表失败 ({str(e) or '网络错误'})，"
+                  f"结果未知的订单将以原 clientOrderId 重试。")
+            continue
+        records = [{"key": key, "line": order.line, "state": "placed", "order_id": found[order.client_order_id],
+                    "message": "订单列表中已有此 clientOrderId"}
+                   for order, key, _ in items if order.client_order_id in found]
+        if records:
+            journal.record(*records)
+            for record in records:
+                entries[record["key"]] = {**entries.get(record["key"], {}), **record}
+                resolved.add(record["key"])
+    return [(order, key) for order, key in pending if key not in resolved]
+
+def confirm(prompt):
+    print(prompt, end="", file=sys.stderr, flush=True)
+    try:
+        return input().strip().lower() in ("y", "yes")
+    except EOFError:
+        return False
+
+def cmd_orders_place(session, basket, account=None, concurrency=config.DEFAULT_CONCURRENCY, refresh=False,
+                     fmt="table", yes=False, new_batch=False, ignore_unresolved=False):
+    """处理 'orders place --basket FILE' 命令：预览并下单，已下单的订单重新运行时跳过；
+    有订单失败或结果未知时返回退出码 1"""
+    orders = prepare_basket(session, basket, account, refresh)
+    if orders is None:
+        return 1
+    keys = order_keys(orders)
+
+    # 1. 回放下单日志：默认延续这个篮子最近的批次；最近的批次还有结果未知的订单时，不允许开始新批次
+    #    (更早的批次只能是加 --ignore-unresolved 放弃的，不再检查)
+    journal = OrderJournal(config.ORDER_JOURNAL, basket)
+    batches = journal.replay()
+    latest = batches[list(batches)[-1]] if batches else {}
+    if new_batch or not batches:
+        stuck = sum(entry.get("state") in UNRESOLVED for entry in latest.values())
+        if stuck and not ignore_unresolved:
+            print(f"错误: 这个篮子之前的批次中有 {stuck} 笔订单结果未知 (可能已经下单)，不能开始新批次。"
+                  f"不带 --new-batch 重新运行会先在订单列表中确认并重试最近批次中的这些订单；"
+                  f"确认无误后可加 --ignore-unresolved 强制开始新批次。")
+            return 1
+        journal.batch, entries = new_batch_id(), {}
+    else:
+        journal.batch, entries = list(batches)[-1], latest
+    current = set(keys)
+    orphans = sorted(entry.get("line", 0) for key, entry in entries.items()
+                     if key not in current and entry.get("state") in UNRESOLVED)
+    if orphans:
+        print(f"注意: 批次中有 {len(orphans)} 笔结果未知的订单已不在篮子中 (原第 {', '.join(map(str, orphans))} 行)，"
+              f"它们可能已经下单。")
+
+    # 2. 沿用已分配的 clientOrderId，跳过已下单的订单，新分配的 ID 先落盘再发请求
+    pending, assigned = [], []
+    for order, key in zip(orders, keys):
+        entry = entries.get(key, {})
+        if entry.get("state") == "placed":
+            continue
+        order.client_order_id = order.client_order_id or entry.get("client_order_id") or new_client_order_id()
+        if entry.get("client_order_id") != order.client_order_id or entry.get("line") != order.line:
+            assigned.append({"key": key, "line": order.line, "state": entry.get("state", "new"),
+                             "client_order_id": order.client_order_id})
+        pending.append((order, key))
+    if assigned:
+        journal.record(*assigned)
+    pending = resolve_unknown(session, journal, pending, entries)
+    skipped = len(orders) - len(pending)
+    retried = sum(1 for order, key in pending if entries.get(key, {}).get("state") not in (None, "new"))
+
+    summary = f"批次 {journal.batch}: 待下单 {len(pending)} 笔 (其中重试 {retried} 笔)，已下单跳过 {skipped} 笔"
+    if not pending:
+        print(f"{summary}，没有需要下单的订单。")
+        return
+    if not yes:
+        if not sys.stdin.isatty():
+            print("错误: 非交互式运行时需要 --yes 确认下单。")
+            return 2
+        if not confirm(f"{summary}\n确认提交真实订单? 输入 yes 继续: "):
+            print("已取消，未提交任何订单。")
+            return 1
+
+    # 3. 流水线：有界线程池中每个工作线程依次预览并下单，结果按文件顺序输出
+    start = time.perf_counter()
+    workers = max(1, min(concurrency, len(pending)))
+    progress = sys.stderr.isatty()
+    counts = {"placed": 0, "rejected": 0, "preview_failed": 0, "unknown": 0}
+    total_amount = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as pool, Report(fmt) as report:
+        table = report.table("orders", PLACE_COLUMNS)
+        table.header("")
+        results = bounded_map(pool, lambda item: submit_order(session, journal, *item), pending, workers * 2)
+        done = 0
+        for order, key in zip(orders, keys):
+            entry = entries.get(key, {})
+            if entry.get("state") == "placed":
+                row = order_row(order, "已下单 (跳过)")
+                row.update(client_order_id=entry.get("client_order_id"), order_id=entry.get("order_id"))
+                table.row(row)
+                continue
+            state, order_id, amount, message = next(results)
+            done += 1
+            if progress:
+                show_progress(done, len(pending), "提交")
+            counts[state] += 1
+            if state == "placed":
+                total_amount += amount or 0.0
+                status = f"OK: {message}" if message else "OK"
+            elif state == "unknown":
+                status = f"{message}，重新运行会先在订单列表中确认，再用同一 clientOrderId 重试"
+            else:
+                status = f"{'预览失败' if state == 'preview_failed' else '被拒'}: {message}"
+            row = order_row(order, status)
+            row.update(order_id=order_id, estimated_total=amount)
+            table.row(row)
+
+        table.footer({"account": "合计", "estimated_total": total_amount,
+                      "status": f"{counts['placed']}/{len(pending)}"})
+        wall = time.perf_counter() - start
+        failed = counts["rejected"] + counts["preview_failed"]
+        report.text(f"\n下单 {counts['placed']} 笔，失败 {failed} 笔，结果未知 {counts['unknown']} 笔，"
+                    f"跳过 {skipped} 笔；耗时 {wall:.2f}s (并发 {workers})")
+        if failed or counts["unknown"]:
+            report.text(f"重新运行同一命令即可重试未成功的订单，已下单的不会重复提交 (下单日志 {config.ORDER_JOURNAL})")
+    return 1 if failed or counts["unknown"] else 0
+
+def parse_age(text):
+    """--older-than 的时长："90"、"30s"、"15m"、"2h"、"1d"，返回秒数；格式错误返回 None"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd]?)", text.strip().lower())
+    if not match:
+        return None
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+
+def fetch_orders_page(session, acc, marker=None, status="OPEN", from_date=None):
+    """获取一页订单 (status 为 None 时不限状态，from_date 起至美东时间的今天)，返回 ([Order], 下一页 marker)；
+    失败抛出 requests.RequestException"""
+    params = {"count": config.ORDER_PAGE_SIZE}
+    if status:
+        params["status"] = status
+    if from_date:
+        params.update(fromDate=f"{from_date:%m%d%Y}", toDate=f"{datetime.now(eastern_zone()):%m%d%Y}")
+    if marker:
+        params["marker"] = marker
+    response = session.get(f"{config.BASE_URL}/v1/accounts/{acc.account_id_key}/orders.json", params=params,
+                           headers={"consumerkey": config.CONSUMER_KEY}, timeout=config.REQUEST_TIMEOUT)
+    if response.status_code == 204:
+        return [], None
+    if response.status_code != 200:
+        raise requests.RequestException(f"失败 ({response.status_code})")
+    return codec.decode(response, decode_orders)
+
+def group_legs(legs):
+    """把各腿记录按 order_id 合并成 [[腿, ...], ...]，保持原顺序"""
+    grouped = {}
+    for leg in legs:
+        grouped.setdefault(leg.order_id, []).append(leg)
+    return list(grouped.values())
+
+def cancel_order(session, acc, order_id):
+    """撤销一笔订单，返回 (是否成功, 说明)"""
+    url = f"{config.BASE_URL}/v1/accounts/{acc.account_id_key}/orders/cancel.json"
+    headers = {"Content-Type": "application/json", "consumerKey": config.CONSUMER_KEY}
+    try:
+        response = session.put(url, header_auth=True, headers=headers,
+                               data=json.dumps({"CancelOrderRequest": {"orderId": order_id}}),
+                               timeout=config.REQUEST_TIMEOUT)
+    except requests.Timeout:
+        return False, "超时"
+    except requests.RequestException:
+        return False, "网络错误"
+    try:
+        if response.status_code != 200:
+            return False, codec.decode(response, decode_error) or f"失败 ({response.status_code})"
+        return True, codec.decode(response, decode_cancelled).message
+    except ValueError:
+        return False, f"无法解析响应 ({response.status_code})"
+
+def scan_account(session, acc, match, cancel):
+    """逐页列出一个账户的挂单，每页中符合条件的订单立即交给 cancel (提交到撤单线程池)，
+    不等其他页或其他账户；返回 ([(各腿, 撤单 future 或 None)], 错误)"""
+    matched = []
+    marker = None
+    try:
+        while True:
+            legs, marker = fetch_orders_page(session, acc, marker)
+            for order in group_legs(legs):
+                if match(order):
+                    matched.append((order, cancel(acc, order[0].order_id)))
+            if not marker:
+                return matched, None
+    except requests.RequestException as e:
+        return matched, str(e) or "网络错误"
+
+CANCEL_COLUMNS = [
+    Column("account_id", text=False),
+    Column("account", "账户", 14),
+    Column("order_id", "Order ID", 10, ">"),
+    Column("symbol", "Symbol", 12),
+    Column("action", "方向", 12),
+    Column("quantity", "数量", 8, ">", ",g"),
+    Column("price_type", "价格类型", 10),
+    Column("limit_price", "限价", 10, ">", ",.2f"),
+    Column("placed_time", "下单时间", 14),
+    Column("status", "状态", color=lambda status: None if status.startswith(("OK", "待撤单")) else Colors.RED),
+]
+
+def cmd_orders_cancel(session, symbols=None, older_than=None, account=None, concurrency=config.DEFAULT_CONCURRENCY,
+                      refresh=False, fmt="table", yes=False, dry_run=False):
+    """处理 'orders cancel' 命令：跨账户一遍流式扫描挂单，符合条件的边扫边并发撤销
+
+    symbols 为代码集合 (任一腿匹配即可)，older_than 为秒数；都为 None 时撤销全部挂单。
+    有撤单失败或某个账户的挂单列不出来时返回退出码 1。
+    """
+    accounts = get_accounts(session, refresh)
+    if not accounts:
+        return 1 if accounts is None else 0
+    if account is not None:
+        accounts = [acc for acc in accounts if account in (acc.account_id, acc.description)]
+        if not accounts:
+            print(f"错误: 未知账户: {account}")
+            return 2
+
+    conditions = []
+    if symbols:
+        conditions.append(f"代码为 {', '.join(sorted(symbols))}")
+    if older_than is not None:
+        conditions.append(f"挂单超过 {older_than:g} 秒")
+    description = f"{len(accounts)} 个账户中{' 且 '.join(conditions) + ' ' if conditions else '全部'}的挂单"
+    if not dry_run and not yes:
+        if not sys.stdin.isatty():
+            print("错误: 非交互式运行时需要 --yes 确认撤单 (或用 --dry-run 只列出匹配的订单)。")
+            return 2
+        if not confirm(f"将撤销 {description}，确认? 输入 yes 继续: "):
+            print("已取消，未撤销任何订单。")
+            return 1
+
+    cutoff = (time.time() - older_than) * 1000 if older_than is not None else None
+    def match(order):
+        if symbols and not any(leg.symbol.upper() in symbols for leg in order):
+            return False
+        return cutoff is None or 0 < order[0].placed_time <= cutoff
+
+    # 1. 列单线程池逐页扫描各账户，撤单线程池在扫描的同时执行撤单 (都受 orders 类限流约束)
+    start = time.perf_counter()
+    list_workers = max(1, min(concurrency, len(accounts)))
+    with ThreadPoolExecutor(max_workers=list_workers) as list_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as cancel_pool:
+        cancel = (lambda acc, order_id: None) if dry_run else \
+            (lambda acc, order_id: cancel_pool.submit(cancel_order, session, acc, order_id))
+        scans = [list_pool.submit(scan_account, session, acc, match, cancel) for acc in accounts]
+
+        # 2. 按账户顺序输出每笔订单的结果
+        counts = {"ok": 0, "failed": 0}
+        with Report(fmt) as report:
+            table = report.table("cancels", CANCEL_COLUMNS)
+            table.header(f"\n{'[dry run] ' if dry_run else ''}撤销 {description}")
+            for acc, scan in zip(accounts, scans):
+                matched, error = scan.result()
+                for order, future in matched:
+                    first = order[0]
+                    if future is None:
+                        status = "待撤单 (dry run)"
+                    else:
+                        ok, message = future.result()
+                        counts["ok" if ok else "failed"] += 1
+                        status = (f"OK: {message}" if message else "OK") if ok else f"失败: {message}"
+                    table.row({"account_id": acc.account_id, "account": acc.description, "order_id": first.order_id,
+                               "symbol": "/".join(leg.symbol for leg in order), "action": first.action,
+                               "quantity": first.quantity, "price_type": first.price_type,
+                               "limit_price": first.limit_price if first.price_type != "MARKET" else None,
+                               "placed_time": time.strftime("%m-%d %H:%M:%S", time.localtime(first.placed_time / 1000))
+                               if first.placed_time else None,
+                               "status": status})
+                if error:
+                    table.row({"account_id": acc.account_id, "account": acc.description,
+                               "status": f"列出挂单失败: {error}"})
+            matched_count = sum(len(scan.result()[0]) for scan in scans)
+            table.footer({"account": "合计", "symbol": f"{matched_count} 笔",
+                          "status": f"{counts['ok']}/{matched_count}" if not dry_run else "dry run"})
+            wall = time.perf_counter() - start
+            report.text(f"\n匹配 {matched_count} 笔，撤销成功 {counts['ok']} 笔，失败 {counts['failed']} 笔；"
+                        f"耗时 {wall:.2f}s (列单并发 {list_workers}，撤单并发 {concurrency})")
+    return 1 if counts["failed"] or any(scan.result()[1] for scan in scans) else 0
@@ -0,0 +1,251 @@
+"""订单请求体编译器：把 OrderSpec 校验后编译成 PreviewOrderRequest / PlaceOrderRequest 的 JSON 或 XML 请求体
+
+支持股票 (EQ)、单腿期权 (OPTN) 和最多 4 条腿的价差 (SPREADS，各腿可以是期权或正股)。
+请求体的结构只取决于订单的"形状"：根元素、各腿的证券类型、是否带限价 / 止损价 / PreviewId 以及格式，
+每种形状第一次出现时编译成一个 % 格式化模板并缓存，之后每笔订单只需把转义后的字段值填进模板，
+不再逐笔构造嵌套 dict 再序列化。字符串值一律经过 JSON / XML 转义。
+"""
+from datetime import date
+from functools import lru_cache
+from json.encoder import encode_basestring
+from operator import attrgetter
+from xml.sax.saxutils import escape
+
+from etrade_cli.models import Record
+
+ORDER_ACTIONS = ("BUY", "SELL", "BUY_TO_COVER", "SELL_SHORT")
+OPTION_ACTIONS = ("BUY_OPEN", "SELL_OPEN", "BUY_CLOSE", "SELL_CLOSE")
+PRICE_TYPES = ("MARKET", "LIMIT", "STOP", "STOP_LIMIT")
+SPREAD_PRICE_TYPES = ("NET_DEBIT", "NET_CREDIT", "NET_EVEN")
+LIMIT_PRICE_TYPES = ("LIMIT", "STOP_LIMIT", "NET_DEBIT", "NET_CREDIT")
+STOP_PRICE_TYPES = ("STOP", "STOP_LIMIT")
+ORDER_TERMS = ("GOOD_FOR_DAY", "IMMEDIATE_OR_CANCEL", "FILL_OR_KILL", "GOOD_UNTIL_CANCEL")
+MAX_LEGS = 4
+
+CONTENT_TYPES = {"json": "application/json", "xml": "application/xml"}
+
+class Leg(Record):
+    """订单的一条腿；期权腿带 call_put (CALL / PUT)、expiry (date) 和 strike，股票腿这三项为 None"""
+    __slots__ = ("symbol", "action", "quantity", "call_put", "expiry", "strike")
+
+    def __init__(self, symbol, action, quantity, call_put=None, expiry=None, strike=None):
+        self.symbol = symbol
+        self.action = action
+        self.quantity = quantity
+        self.call_put = call_put
+        self.expiry = expiry
+        self.strike = strike
+
+    @property
+    def security_type(self):
+        return "EQ" if self.call_put is None else "OPTN"
+
+    @property
+    def display(self):
+        """股票为代码，期权为 OCC 风格的简写，如 IBM 261120C150"""
+        if self.call_put is None:
+            return self.symbol
+        return f"{self.symbol} {self.expiry:%y%m%d}{self.call_put[0]}{self.strike:g}"
+
+class OrderSpec(Record):
+    """一笔待提交的订单：一条或多条腿共用价格类型、期限和价格"""
+    __slots__ = ("legs", "price_type", "order_term", "limit_price", "stop_price", "client_order_id")
+
+    def __init__(self, legs, price_type="MARKET", order_term="GOOD_FOR_DAY", limit_price=None, stop_price=None,
+                 client_order_id=""):
+        self.legs = legs
+        self.price_type = price_type
+        self.order_term = order_term
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.client_order_id = client_order_id
+
+    @property
+    def order_type(self):
+        return "SPREADS" if len(self.legs) > 1 else self.legs[0].security_type
+
+    # 以下三项用于表格展示：多腿订单按腿用 / 连接，数量取第一条腿
+    @property
+    def symbol(self):
+        return "/".join(leg.display for leg in self.legs)
+
+    @property
+    def action(self):
+        return "/".join(leg.action for leg in self.legs)
+
+    @property
+    def quantity(self):
+        return self.legs[0].quantity
+
+def positive(value):
+    """大于 0 的有限数 (不含 bool)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 < value < float("inf")
+
+def validate_leg(leg):
+    if not isinstance(leg.symbol, str) or not leg.symbol:
+        raise ValueError("缺少 symbol")
+    if not isinstance(leg.quantity, int) or isinstance(leg.quantity, bool) or leg.quantity <= 0:
+        raise ValueError("quantity 必须是正整数")
+    if leg.call_put is None:
+        if leg.action not in ORDER_ACTIONS:
+            raise ValueError(f"action 必须是 {' / '.join(ORDER_ACTIONS)}")
+        return
+    if leg.call_put not in ("CALL", "PUT"):
+        raise ValueError("call_put 必须是 CALL / PUT")
+    if not isinstance(leg.expiry, date):
+        raise ValueError("期权需要 expiry 日期")
+    if not positive(leg.strike):
+        raise ValueError("期权需要大于 0 的 strike")
+    if leg.action not in OPTION_ACTIONS:
+        raise ValueError(f"期权的 action 必须是 {' / '.join(OPTION_ACTIONS)}")
+
+def validate(order):
+    """检查订单能否提交，不合法时抛出 ValueError"""
+    legs = order.legs
+    if not legs:
+        raise ValueError("订单没有任何腿")
+    if len(legs) > MAX_LEGS:
+        raise ValueError(f"价差最多 {MAX_LEGS} 条腿")
+    for number, leg in enumerate(legs, 1):
+        try:
+            validate_leg(leg)
+        except ValueError as e:
+            raise ValueError(f"第 {number} 条腿: {e}" if len(legs) > 1 else str(e)) from None
+
+    spread = len(legs) > 1
+    if spread:
+        if len({leg.symbol for leg in legs}) > 1:
+            raise ValueError("价差各腿的标的必须相同")
+        contracts = [(leg.call_put, leg.expiry, leg.strike) for leg in legs]
+        if len(set(contracts)) < len(contracts):
+            raise ValueError("价差中有重复的腿")
+    price_types = SPREAD_PRICE_TYPES if spread else PRICE_TYPES
+    if order.price_type not in price_types:
+        raise ValueError(f"{'价差订单的 ' if spread else ''}price_type 必须是 {' / '.join(price_types)}")
+    if order.price_type in LIMIT_PRICE_TYPES and not positive(order.limit_price):
+        raise ValueError(f"{order.price_type} 订单需要大于 0 的 limit_price")
+    if order.price_type in STOP_PRICE_TYPES and not positive(order.stop_price):
+        raise ValueError(f"{order.price_type} 订单需要大于 0 的 stop_price")
+    if order.order_term not in ORDER_TERMS:
+        raise ValueError(f"order_term 必须是 {' / '.join(ORDER_TERMS)}")
+    # clientOrderId 最长 20 位字母数字，在账户内唯一；为空表示尚未分配
+    client_order_id = order.client_order_id
+    if not isinstance(client_order_id, str) or client_order_id and (
+            not client_order_id.isascii() or not client_order_id.isalnum() or len(client_order_id) > 20):
+        raise ValueError("client_order_id 只能是不超过 20 位的字母数字")
+
+# --- 模板编译 ---
+
+class Field:
+    """模板中逐笔填入的值：get(order, preview_id) 取值，kind 为 str / int / float"""
+    __slots__ = ("get", "kind")
+
+    def __init__(self, get, kind):
+        self.get = get
+        self.kind = kind
+
+def order_field(name, kind):
+    get = attrgetter(name)
+    return Field(lambda order, preview_id: get(order), kind)
+
+def leg_field(index, name, kind):
+    get = attrgetter(name)
+    return Field(lambda order, preview_id: get(order.legs[index]), kind)
+
+def structure(root, security_types, limit, stop, preview):
+    """一种形状的请求体结构：dict 为嵌套对象，list 为重复元素，Field 为逐笔填入的值，其他为常量"""
+    instruments = []
+    for index, security_type in enumerate(security_types):
+        product = {"securityType": security_type, "symbol": leg_field(index, "symbol", str)}
+        if security_type == "OPTN":
+            product.update(callPut=leg_field(index, "call_put", str),
+                           expiryYear=leg_field(index, "expiry.year", int),
+                           expiryMonth=leg_field(index, "expiry.month", int),
+                           expiryDay=leg_field(index, "expiry.day", int),
+                           strikePrice=leg_field(index, "strike", float))
+        instruments.append({"Product": product, "orderAction": leg_field(index, "action", str),
+                            "quantityType": "QUANTITY", "quantity": leg_field(index, "quantity", int)})
+    detail = {"allOrNone": False, "priceType": order_field("price_type", str),
+              "orderTerm": order_field("order_term", str), "marketSession": "REGULAR"}
+    if limit:
+        detail["limitPrice"] = order_field("limit_price", float)
+    if stop:
+        detail["stopPrice"] = order_field("stop_price", float)
+    detail["Instrument"] = instruments
+    order_type = "SPREADS" if len(security_types) > 1 else security_types[0]
+    request = {"orderType": order_type, "clientOrderId": order_field("client_order_id", str), "Order": [detail]}
+    if preview:
+        request["PreviewIds"] = [{"previewId": Field(lambda order, preview_id: preview_id, int)}]
+    return {root: request}
+
+def literal(text):
+    return text.replace("%", "%%")
+
+def number(value):
+    return repr(float(value))
+
+ENCODERS = {
+    "json": {str: encode_basestring, int: str, float: number},
+    "xml": {str: escape, int: str, float: number},
+}
+
+def emit_json(node, out, slots):
+    if isinstance(node, dict):
+        out.append("{")
+        for n, (key, value) in enumerate(node.items()):
+            out.append(literal(("," if n else "") + encode_basestring(key) + ":"))
+            emit_json(value, out, slots)
+        out.append("}")
+    elif isinstance(node, list):
+        out.append("[")
+        for n, item in enumerate(node):
+            if n:
+                out.append(",")
+            emit_json(item, out, slots)
+        out.append("]")
+    elif isinstance(node, Field):
+        out.append("%s")
+        slots.append((node.get, ENCODERS["json"][node.kind]))
+    elif isinstance(node, bool):
+        out.append("true" if node else "false")
+    else:
+        out.append(literal(encode_basestring(node)))
+
+def emit_xml(name, node, out, slots):
+    if isinstance(node, list):
+        for item in node:
+            emit_xml(name, item, out, slots)
+        return
+    out.append(f"<{name}>")
+    if isinstance(node, dict):
+        for key, value in node.items():
+            emit_xml(key, value, out, slots)
+    elif isinstance(node, Field):
+        out.append("%s")
+        slots.append((node.get, ENCODERS["xml"][node.kind]))
+    elif isinstance(node, bool):
+        out.append("true" if node else "false")
+    else:
+        out.append(literal(escape(node)))
+    out.append(f"</{name}>")
+
+@lru_cache(maxsize=256)
+def template(fmt, root, security_types, limit, stop, preview):
+    """编译一种形状，返回 (% 格式串, ((取值函数, 编码函数), ...))"""
+    out, slots = [], []
+    request = structure(root, security_types, limit, stop, preview)
+    if fmt == "json":
+        emit_json(request, out, slots)
+    elif fmt == "xml":
+        emit_xml(root, request[root], out, slots)
+    else:
+        raise ValueError(f"不支持的请求体格式: {fmt}")
+    return "".join(out), tuple(slots)
+
+def build(order, root="PreviewOrderRequest", preview_id=None, fmt="json"):
+    """校验并编译一笔订单的请求体 (str)；下单 (PlaceOrderRequest) 时带上预览得到的 preview_id"""
+    validate(order)
+    text, slots = template(fmt, root, tuple(leg.security_type for leg in order.legs),
+                           order.price_type in LIMIT_PRICE_TYPES, order.price_type in STOP_PRICE_TYPES,
+                           preview_id is not None)
+    return text % tuple(encode(get(order, preview_id)) for get, encode in slots)
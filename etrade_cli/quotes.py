@@ -0,0 +1,153 @@
+"""quote 子命令：分批并发获取行情、行情看板"""
+import sys
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from etrade_cli import codec, config
+from etrade_cli.models import decode_quotes
+from etrade_cli.colors import Colors
+from etrade_cli.ratelimit import get_rate_limiter
+
+def fetch_quote_batch(session, symbols):
+    """请求一批行情 (最多 QUOTE_BATCH_SIZE 个代码)，返回 (行情字典, 响应或 None)"""
+    url = f"{config.BASE_URL}/v1/market/quote/{','.join(symbols)}.json"
+    params = {"detailFlag": "ALL"}
+    if len(symbols) > 25:
+        params["overrideSymbolCount"] = "true"
+    try:
+        response = session.get(url, params=params, timeout=config.REQUEST_TIMEOUT)
+    except requests.RequestException:
+        return {}, None
+
+    if response.status_code != 200:
+        return {}, response
+    return codec.decode(response, decode_quotes), response
+
+def fetch_quotes(session, symbols, concurrency=config.DEFAULT_CONCURRENCY):
+    """按 QUOTE_BATCH_SIZE 分批并发请求行情，返回 (行情字典, 各批次响应列表)"""
+    size = config.QUOTE_BATCH_SIZE
+    batches = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+    quotes = {}
+    responses = []
+    workers = max(1, min(concurrency, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch_quotes, response in pool.map(lambda batch: fetch_quote_batch(session, batch), batches):
+            quotes.update(batch_quotes)
+            responses.append(response)
+    return quotes, responses
+
+def next_poll_interval(interval, base_interval, responses, limiter=None):
+    """根据限流余量调整轮询间隔：被限流或余量不足时退避，余量充足时逐步回到基础间隔
+
+    余量按本地限流器 (market 令牌桶与当日配额) 以当前间隔继续轮询来估算；
+    响应带有 X-RateLimit-* 头时以服务端给出的余量为准
+    """
+    if any(r is None or r.status_code == 429 for r in responses):
+        return min(interval * 2, config.WATCH_MAX_INTERVAL)
+
+    headroom = None
+    for r in responses:
+        remaining = r.headers.get("X-RateLimit-Remaining")
+        limit = r.headers.get("X-RateLimit-Limit")
+        if remaining is not None and limit:
+            try:
+                ratio = float(remaining) / float(limit)
+            except ValueError:
+                continue
+            headroom = ratio if headroom is None else min(headroom, ratio)
+    if headroom is None and limiter is not None:
+        headroom = limiter.headroom("market", len(responses), interval)
+
+    if headroom is not None and headroom < 0.2:
+        return min(interval * 1.5, config.WATCH_MAX_INTERVAL)
+    return max(interval * 0.8, base_interval)
+
+# 看板列定义: (标题, 宽度, 对齐)
+WATCH_COLUMNS = [("Symbol", 10, "<"), ("Last", 10, ">"), ("Chg", 9, ">"), ("Chg %", 8, ">"),
+                 ("Bid", 10, ">"), ("Ask", 10, ">"), ("Volume", 14, ">"), ("Time", 24, "<")]
+
+def quote_cells(symbol, quote):
+    """把一条行情格式化为看板的各列文本"""
+    if quote is None:
+        return [symbol] + ["-"] * (len(WATCH_COLUMNS) - 1)
+    return [symbol,
+            f"{quote.get('lastTrade', 0):,.2f}",
+            f"{quote.get('changeClose', 0):+,.2f}",
+            f"{quote.get('changeClosePercentage', 0):+.2f}%",
+            f"{quote.get('bid', 0):,.2f}",
+            f"{quote.get('ask', 0):,.2f}",
+            f"{quote.get('totalVolume', 0):,}",
+            str(quote.get("dateTime", ""))]
+
+def cmd_quote_watch(session, symbols, interval=config.DEFAULT_WATCH_INTERVAL,
+                    concurrency=config.DEFAULT_CONCURRENCY):
+    """处理 'quote watch' 命令：轮询行情，只重绘发生变化的单元格"""
+    symbols = list(dict.fromkeys(s.strip().upper() for arg in symbols for s in arg.split(",") if s.strip()))
+    out = sys.stdout
+    tty = out.isatty()
+
+    # 每列在屏幕上的起始列号 (从 1 开始)，列之间用 " | " 分隔
+    offsets = []
+    col = 1
+    for _, width, _ in WATCH_COLUMNS:
+        offsets.append(col)
+        col += width + 3
+
+    # 终端放不下的行不绘制，避免滚屏打乱光标定位
+    visible = symbols
+    if tty:
+        visible = symbols[:max(shutil.get_terminal_size().lines - 5, 1)]
+        header = " | ".join(f"{title:{align}{width}}" for title, width, align in WATCH_COLUMNS)
+        out.write("\033[?1049h\033[?25l\033[2J\033[H")
+        out.write(f"{Colors.BOLD}行情看板 ({len(symbols)} 个代码，Ctrl+C 退出){Colors.RESET}\n")
+        out.write(f"{header}\n{'-' * len(header)}\n")
+        for row in range(len(visible)):
+            out.write(" | ".join(" " * width for _, width, _ in WATCH_COLUMNS) + "\n")
+        out.flush()
+
+    screen = {}
+    base_interval = interval
+    limiter = get_rate_limiter()
+    try:
+        while True:
+            start = time.monotonic()
+            quotes, responses = fetch_quotes(session, symbols, concurrency)
+
+            # 只为内容变化的单元格生成输出，一次性写出
+            buf = []
+            for row, symbol in enumerate(visible):
+                cells = quote_cells(symbol, quotes.get(symbol))
+                changed = False
+                for idx, text in enumerate(cells):
+                    if screen.get((row, idx)) == text:
+                        continue
+                    screen[(row, idx)] = text
+                    changed = True
+                    if tty:
+                        _, width, align = WATCH_COLUMNS[idx]
+                        color = ""
+                        if idx in (2, 3) and text != "-":
+                            color = Colors.GREEN if not text.startswith("-") else Colors.RED
+                        buf.append(f"\033[{row + 4};{offsets[idx]}H{color}{text:{align}{width}}{Colors.RESET if color else ''}")
+                if changed and not tty:
+                    buf.append(" | ".join(cells) + "\n")
+
+            interval = next_poll_interval(interval, base_interval, responses, limiter)
+            if tty:
+                failed = sum(1 for r in responses if r is None or r.status_code != 200)
+                buf.append(f"\033[{len(visible) + 5};1H\033[K更新于 {time.strftime('%H:%M:%S')} | "
+                           f"间隔 {interval:.1f}s | 请求 {len(responses)} 次，失败 {failed} 次"
+                           f"{f' | 仅显示前 {len(visible)} 个' if len(visible) < len(symbols) else ''}")
+            if buf:
+                out.write("".join(buf))
+                out.flush()
+
+            time.sleep(max(interval - (time.monotonic() - start), 0))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if tty:
+            out.write("\033[?25h\033[?1049l")
+            out.flush()
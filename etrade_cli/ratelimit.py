@@ -0,0 +1,202 @@
+"""客户端限流：按接口类别分桶的令牌桶，以及持久化到磁盘的当日调用计数"""
+import os
+import json
+import time
+import atexit
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+from etrade_cli import config
+from etrade_cli.tokens import file_lock
+
+class QuotaExceededError(requests.RequestException):
+    """当日 API 调用次数已达到 DAILY_QUOTA 上限"""
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒的速度补充令牌，最多积攒 capacity 个，线程安全"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """尝试取一个令牌：成功返回 0，否则返回还需等待的秒数"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """阻塞直到取得令牌"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """协程版本：等待期间让出事件循环"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+class RateLimiter:
+    """按接口类别 (market / accounts / orders) 分桶限流，并把当日调用次数累计到磁盘"""
+
+    def __init__(self, rates, quota_file, daily_quota=0):
+        self.buckets = {name: TokenBucket(rate, max(rate, 1)) for name, rate in rates.items() if rate > 0}
+        self.quota_file = quota_file
+        self.daily_quota = daily_quota
+        self.pending = 0
+        # 最近一次读写配额文件时磁盘上的当日计数；只在写盘或跨天时重新读取，不必每个请求都读文件
+        self.day = None
+        self.base = 0
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def endpoint_class(url):
+        """根据 URL 判断接口类别，OAuth 等其他请求返回 None (不限流)"""
+        path = urlsplit(url).path
+        if "/v1/market/" in path:
+            return "market"
+        if "/orders" in path:
+            return "orders"
+        if "/v1/accounts" in path:
+            return "accounts"
+        return None
+
+    def acquire(self, url):
+        """阻塞直到该 URL 所属类别有令牌，并计入当日配额"""
+        self.count()
+        bucket = self.buckets.get(self.endpoint_class(url))
+        if bucket:
+            bucket.acquire()
+
+    async def acquire_async(self, url):
+        """acquire 的协程版本"""
+        self.count()
+        bucket = self.buckets.get(self.endpoint_class(url))
+        if bucket:
+            await bucket.acquire_async()
+
+    def headroom(self, name, calls, period):
+        """每 period 秒向 name 类接口发 calls 次请求时剩余的余量比例 (0~1)，没有任何限制时返回 None
+
+        取两者中较小的：令牌桶每 period 秒补充的令牌中未被用掉的部分，以及按此频率持续到当天结束时
+        当日配额中还剩下的部分
+        """
+        ratios = []
+        bucket = self.buckets.get(name)
+        if bucket:
+            ratios.append(1 - calls / (bucket.rate * period))
+        if self.daily_quota:
+            with self.lock:
+                remaining = self.daily_quota - self.used_today()
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            needed = calls * (midnight - now).total_seconds() / period
+            ratios.append(1 - needed / remaining if remaining > 0 else 0.0)
+        return max(min(ratios), 0.0) if ratios else None
+
+    def count(self):
+        """累计一次调用；开启 DAILY_QUOTA 时超额直接拒绝"""
+        with self.lock:
+            used = self.used_today()
+            if self.daily_quota and used + 1 > self.daily_quota:
+                raise QuotaExceededError(f"今日 API 调用已达上限 ({self.daily_quota})")
+            self.pending += 1
+            # 缓存的计数看不到其他进程尚未写盘的调用 (每个进程最多 QUOTA_FLUSH_EVERY 次)；接近上限时改为每次调用都
+            # 在进程间锁内按磁盘上的计数检查并立即写盘，不超过 QUOTA_PROCESSES 个进程时合计不会超过上限
+            if self.daily_quota and self.daily_quota - used <= config.QUOTA_FLUSH_EVERY * config.QUOTA_PROCESSES:
+                if not self.flush_locked(self.daily_quota):
+                    self.pending -= 1
+                    raise QuotaExceededError(f"今日 API 调用已达上限 ({self.daily_quota})")
+            elif self.pending >= config.QUOTA_FLUSH_EVERY:
+                self.flush_locked()
+
+    def used_today(self):
+        """当日已用次数 = 磁盘上的计数 (缓存) + 尚未写盘的增量；跨天时重新读盘，前一天未写盘的增量作废"""
+        today = time.strftime("%Y-%m-%d")
+        if today != self.day:
+            self.day = today
+            self.base = self.load().get(today, 0)
+            self.pending = 0
+        return self.base + self.pending
+
+    def load(self):
+        try:
+            with open(self.quota_file) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        """把未写盘的调用次数累加到配额文件"""
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self, limit=0):
+        """写盘；给出 limit 且写入后磁盘上的计数会超过它时不写盘，返回 False"""
+        if not self.pending:
+            return True
+        today = time.strftime("%Y-%m-%d")
+        # 在配额文件的进程间锁内读-加-写 (只保留当天的计数)，多个 CLI 进程和守护进程的增量不会互相覆盖；
+        # 顺便刷新缓存的磁盘计数，其他进程的调用最迟在下次写盘时计入
+        tmp_file = f"{self.quota_file}.{os.getpid()}.tmp"
+        try:
+            with file_lock(f"{self.quota_file}.lock"):
+                total = self.load().get(today, 0) + self.pending
+                if limit and total > limit:
+                    self.day = today
+                    self.base = total - self.pending
+                    return False
+                with open(tmp_file, 'w') as f:
+                    json.dump({today: total}, f)
+                os.replace(tmp_file, self.quota_file)
+        except OSError:
+            return True
+        self.day = today
+        self.base = total
+        self.pending = 0
+        return True
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    """进程内共享的限流器，第一次使用时按配置创建"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            {"market": config.RATE_LIMIT_MARKET,
+             "accounts": config.RATE_LIMIT_ACCOUNTS,
+             "orders": config.RATE_LIMIT_ORDERS},
+            config.QUOTA_FILE,
+            config.DAILY_QUOTA,
+        )
+    return _rate_limiter
+
+class RateLimitedAdapter(HTTPAdapter):
+    """在每个请求真正发出前经过全局限流器，session.get/post/put 都会经过这里"""
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(request.url)
+        return super().send(request, **kwargs)
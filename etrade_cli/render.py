@@ -0,0 +1,215 @@
+"""报表渲染：统一的表格 / CSV / JSON / NDJSON 输出
+
+所有报表都先描述列，再逐行交给 Report；列宽在建表时一次算好，
+输出先攒在缓冲区里，按页或攒够一定行数后一次写入 stdout。
+非 table 格式下说明性文字 (标题、耗时统计) 写到 stderr，stdout 只有数据。
+"""
+import csv
+import io
+import os
+import json
+import sys
+import unicodedata
+
+from etrade_cli import config
+from etrade_cli.colors import Colors
+
+# 缓冲区攒够这么多行就写一次
+FLUSH_LINES = 512
+
+def display_width(text):
+    """终端显示宽度：全角/宽字符 (中文) 占两列"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+def dumps(obj):
+    # NumPy 标量等带 item() 的值转成 Python 原生类型
+    return json.dumps(obj, ensure_ascii=False, default=lambda o: o.item() if hasattr(o, "item") else str(o))
+
+def pad(text, width, align="<"):
+    gap = max(width - display_width(text), 0)
+    return text + " " * gap if align == "<" else " " * gap + text
+
+class Column:
+    """一列：key 是行 dict 中的键；spec/prefix/suffix 只用于 table 格式；
+    color(value) 返回颜色代码；text=False 的列只出现在 csv/json/ndjson 中，data=False 的列只出现在 table 中"""
+    __slots__ = ("key", "title", "width", "align", "spec", "prefix", "suffix", "color", "text", "data")
+
+    def __init__(self, key, title=None, width=0, align="<", spec="", prefix="", suffix="", color=None, text=True,
+                 data=True):
+        self.key = key
+        self.title = title if title is not None else key
+        self.width = max(width, display_width(self.title))
+        self.align = align
+        self.spec = spec
+        self.prefix = prefix
+        self.suffix = suffix
+        self.color = color
+        self.text = text
+        self.data = data
+
+    def cell(self, value, colored=True):
+        """table 格式的单元格：先按宽度对齐再加颜色，颜色代码不影响对齐"""
+        if value is None:
+            text = "-"
+        elif isinstance(value, str):
+            text = value
+        else:
+            text = f"{self.prefix}{value:{self.spec}}{self.suffix}"
+        text = pad(text, self.width, self.align)
+        color = self.color(value) if colored and self.color and value is not None else None
+        return f"{color}{text}{Colors.RESET}" if color else text
+
+def pl_color(value):
+    """盈亏颜色：盈利绿色，亏损红色"""
+    return Colors.GREEN if value >= 0 else Colors.RED
+
+class Table:
+    """Report 中的一张表，由 Report.table() 创建"""
+
+    def __init__(self, report, name, columns, rule="-"):
+        self.report = report
+        self.name = name
+        self.columns = [c for c in columns if c.data]
+        self.visible = [c for c in columns if c.text]
+        self.line_width = sum(c.width for c in self.visible) + 3 * (len(self.visible) - 1)
+        self.rule = rule
+        self.rows = 0
+        self.csv_header = False
+
+    def rule_line(self, char="-"):
+        return char * self.line_width
+
+    def header(self, title=None):
+        """table 格式：打印 (可选的) 标题和表头；可以多次调用，例如每个账户一段"""
+        if self.report.format != "table":
+            return
+        if title is not None:
+            self.report.text(title)
+        self.report.write(self.rule_line(self.rule))
+        self.report.write(" | ".join(pad(c.title, c.width, c.align) for c in self.visible).rstrip())
+        self.report.write(self.rule_line())
+
+    def row(self, values):
+        """输出一行，values 是 {key: 原始值}"""
+        self.rows += 1
+        report = self.report
+        if report.format == "table":
+            report.write(" | ".join(c.cell(values.get(c.key)) for c in self.visible).rstrip())
+        elif report.format == "csv":
+            if not self.csv_header:
+                self.csv_header = True
+                report.csv_section([c.key for c in self.columns])
+            report.csv_row([values.get(c.key) for c in self.columns])
+        elif report.format == "ndjson":
+            report.write(dumps({"table": self.name, **{c.key: values.get(c.key) for c in self.columns}}))
+        else:
+            report.json_row({c.key: values.get(c.key) for c in self.columns})
+
+    def message(self, text):
+        """table 格式中代替数据行的提示 (如 "无持仓")"""
+        if self.report.format == "table":
+            self.report.write(f"  {text}")
+
+    def footer(self, values=None):
+        """table 格式：收尾的分隔线和 (可选的) 加粗合计行；合计行可由数据推出，其他格式不输出"""
+        if self.report.format != "table":
+            return
+        if values is not None:
+            self.report.write(self.rule_line())
+            cells = " | ".join(c.cell(values[c.key], False) if c.key in values else " " * c.width for c in self.visible)
+            self.report.write(f"{Colors.BOLD}{cells}{Colors.RESET}")
+        self.report.write(self.rule_line(self.rule))
+
+class Report:
+    """一次命令的全部输出；用作上下文管理器，退出时补全 JSON 并写出剩余缓冲"""
+
+    def __init__(self, fmt="table", out=None):
+        if fmt not in config.OUTPUT_FORMATS:
+            raise ValueError(f"未知输出格式: {fmt}")
+        self.format = fmt
+        self.out = out or sys.stdout
+        self.buffer = []
+        self.csv_buffer = io.StringIO()
+        self.csv_writer = csv.writer(self.csv_buffer, lineterminator="\n")
+        self.csv_sections = 0
+        self.json_table = None
+        self.json_pending = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def table(self, name, columns, rule="-"):
+        """新建一张表；多张表时按创建顺序依次输出，不能交错写"""
+        if self.format == "json":
+            self.json_start(name)
+        return Table(self, name, columns, rule)
+
+    def write(self, line):
+        self.buffer.append(line)
+        if len(self.buffer) >= FLUSH_LINES:
+            self.flush()
+
+    def text(self, line=""):
+        """说明性文字：table 格式写入报表，其他格式写到 stderr，不混进数据"""
+        if self.format == "table":
+            self.write(line)
+        else:
+            self.flush()
+            print(line, file=sys.stderr)
+
+    def flush(self):
+        try:
+            if self.buffer:
+                self.out.write("\n".join(self.buffer) + "\n")
+                self.buffer.clear()
+            self.out.flush()
+        except BrokenPipeError:
+            # 输出接到 head 等提前退出的程序：之后的输出都丢进 devnull，安静地结束 (与 daemon.forward 相同)；
+            # 守护进程中的 out 是转发给客户端的流，交给守护进程处理
+            if self.out is not sys.__stdout__:
+                raise
+            self.buffer.clear()
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+
+    def csv_section(self, header):
+        # 多张表时每张表各自带表头，表之间空一行
+        if self.csv_sections:
+            self.write("")
+        self.csv_sections += 1
+        self.csv_row(header)
+
+    def csv_row(self, values):
+        self.csv_writer.writerow(values)
+        self.write(self.csv_buffer.getvalue().rstrip("\n"))
+        self.csv_buffer.seek(0)
+        self.csv_buffer.truncate()
+
+    def json_start(self, name):
+        # 流式写出 {"表名": [行, ...], ...}，不必把整份结果留在内存里；
+        # 每行先暂存，等到下一行或表结束时才知道行尾要不要逗号
+        self.json_end()
+        self.write(f"{'{' if self.json_table is None else ','}{json.dumps(name)}: [")
+        self.json_table = name
+
+    def json_row(self, row):
+        if self.json_pending is not None:
+            self.write(self.json_pending + ",")
+        self.json_pending = dumps(row)
+
+    def json_end(self):
+        if self.json_table is None:
+            return
+        if self.json_pending is not None:
+            self.write(self.json_pending)
+            self.json_pending = None
+        self.write("]")
+
+    def close(self):
+        if self.format == "json":
+            self.json_end()
+            self.write("{}" if self.json_table is None else "}")
+        self.flush()
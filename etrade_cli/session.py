@@ -0,0 +1,281 @@
+"""会话：OAuth 登录、会话管理 (续期、过期检测、凭据原子替换)、带连接池和限流的传输层"""
+import sys
+import time
+import atexit
+import threading
+import requests
+from rauth import OAuth1Service, OAuth1Session
+
+from etrade_cli import config
+from etrade_cli.colors import Colors
+from etrade_cli.ratelimit import RateLimitedAdapter, get_rate_limiter
+from etrade_cli.tokens import get_token_store, token_expiry, usable
+
+class AuthenticationError(requests.RequestException):
+    """令牌失效且无法续期或重新登录 (例如非交互式运行时)"""
+
+def configure_transport(session, pool_size=None):
+    """为会话挂载带连接池和限流的长连接适配器，所有命令共用同一会话以复用 TLS 连接"""
+    pool_size = max(pool_size or 0, config.POOL_MAXSIZE)
+    # pool_block=True：每个主机的连接数不超过 pool_size，超出时等待空闲连接而不是新建
+    adapter = RateLimitedAdapter(get_rate_limiter(), pool_connections=config.POOL_CONNECTIONS,
+                                 pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+def transport_stats(session):
+    """统计会话连接池的使用情况，返回 (请求数, 新建连接数)"""
+    total_requests = 0
+    total_connections = 0
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            total_connections += pool.num_connections
+    return total_requests, total_connections
+
+def print_transport_stats(session):
+    """打印连接复用情况"""
+    total_requests, total_connections = transport_stats(session)
+    reused = max(total_requests - total_connections, 0)
+    ratio = reused / total_requests * 100 if total_requests else 0.0
+    print(f"连接统计: 请求 {total_requests} 次，新建连接 {total_connections} 个，复用 {reused} 次 ({ratio:.0f}%)")
+
+class ManagedSession(OAuth1Session):
+    """由 SessionManager 管理的会话：凭据可在运行中整体替换，401 时交给管理器恢复后重试一次
+
+    (令牌, 密钥, 代次) 存放在一个元组里，替换是一次赋值；每个请求开始时在线程本地取一份快照，
+    rauth 签名时读到的令牌和密钥一定来自同一份凭据，不会与并发的替换交错。
+    """
+
+    def __init__(self, manager, consumer_key, consumer_secret, access_token, access_token_secret):
+        self.manager = manager
+        self.local = threading.local()
+        self.state = (access_token, access_token_secret, 0)
+        super().__init__(consumer_key, consumer_secret, access_token, access_token_secret)
+
+    def credentials(self):
+        return getattr(self.local, "state", None) or self.state
+
+    @property
+    def access_token(self):
+        return self.credentials()[0]
+
+    @access_token.setter
+    def access_token(self, value):
+        token, secret, generation = self.state
+        self.state = (value, secret, generation)
+
+    @property
+    def access_token_secret(self):
+        return self.credentials()[1]
+
+    @access_token_secret.setter
+    def access_token_secret(self, value):
+        token, secret, generation = self.state
+        self.state = (token, value, generation)
+
+    def swap(self, access_token, access_token_secret):
+        """原子替换凭据并递增代次；之后开始的请求都用新凭据签名"""
+        self.state = (access_token, access_token_secret, self.state[2] + 1)
+
+    def request(self, method, url, recover=True, **kwargs):
+        state = self.state
+        if recover and self.manager.expired():
+            self.manager.recover(state[2])
+            state = self.state
+        self.local.state = state
+        try:
+            response = super().request(method, url, **kwargs)
+        finally:
+            self.local.state = None
+        self.manager.touch()
+        if response.status_code == 401 and recover and self.manager.recover(state[2]):
+            return self.request(method, url, recover=False, **kwargs)
+        return response
+
+class SessionManager:
+    """持有当前会话：后台在空闲超时前续期令牌，美东午夜过期前后自动切换到新令牌，
+    401 时先尝试续期、不行再登录；并发的工作线程只会触发一次续期或登录，
+    多个进程通过 TokenStore 共用同一份令牌，同一时刻只有一个进程在登录"""
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size
+        self.store = get_token_store()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.last_activity = time.time()
+        self.last_saved = 0.0
+        self.expires_at = None
+        self.session = None
+        self.renewer = None
+        self.login_forbidden = None
+
+    def start(self):
+        """读取共享令牌 (没有或已过午夜则登录)，创建会话并启动后台续期线程；
+        上次使用已超过 TOKEN_RENEW_IDLE 时先续期，免得第一个请求就因空闲失效而 401"""
+        entry = self.store.load()
+        self.session = ManagedSession(self, config.CONSUMER_KEY, config.CONSUMER_SECRET,
+                                      entry.get("access_token"), entry.get("access_token_secret"))
+        configure_transport(self.session, self.pool_size)
+        self.adopt(entry)
+        if not usable(entry):
+            self.login()
+        elif time.time() - (entry.get("last_used") or 0) >= config.TOKEN_RENEW_IDLE:
+            self.renew()
+
+        atexit.register(self.save_activity)
+        self.renewer = threading.Thread(target=self.renew_loop, name="token-renewer", daemon=True)
+        self.renewer.start()
+        return self.session
+
+    def stop(self):
+        self.stopped.set()
+        self.save_activity()
+
+    def forbid_login(self, reason):
+        """之后需要登录时不再提示输入验证码，而是抛出 AuthenticationError(reason)；
+        其他进程登录得到的新令牌仍会被换用"""
+        self.login_forbidden = reason
+
+    def touch(self):
+        self.last_activity = time.time()
+
+    def save_activity(self):
+        """把最近一次使用时间写入令牌存储 (供其他进程和下次启动判断是否需要续期)"""
+        if self.last_activity > self.last_saved:
+            self.last_saved = self.last_activity
+            try:
+                self.store.touch(self.last_activity)
+            except OSError:
+                pass
+
+    def expired(self):
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def adopt(self, entry):
+        """换用存储中的令牌 (通常是其他进程刚登录得到的)"""
+        issued = entry.get("issued_at")
+        self.expires_at = token_expiry(issued) if issued else None
+        if entry.get("access_token") and entry["access_token"] != self.session.state[0]:
+            self.session.swap(entry["access_token"], entry["access_token_secret"])
+
+    def renew(self):
+        """调用续期接口重新激活令牌 (空闲超过两小时会失效，但当日午夜前都能续期)"""
+        try:
+            response = self.session.request("GET", f"{config.BASE_URL}/oauth/renew_access_token", recover=False,
+                                            header_auth=True, timeout=config.REQUEST_TIMEOUT)
+        except requests.RequestException:
+            return False
+        if response.status_code != 200:
+            return False
+        token, secret, generation = self.session.state
+        self.session.state = (token, secret, generation + 1)
+        self.touch()
+        self.save_activity()
+        return True
+
+    def login(self):
+        """获取新令牌：其他进程已登录过就直接换用；有进程正在登录就等它；
+        否则登记登录租约，由本进程做交互式 OAuth 登录并写入共享存储"""
+        interactive = sys.stdin.isatty() and not self.login_forbidden
+        while True:
+            stale_token = self.session.state[0]
+            outcome, entry = self.store.begin_login(stale_token, interactive)
+            if outcome == "tokens":
+                self.adopt(entry)
+                return
+            if outcome == "none":
+                raise AuthenticationError(self.login_forbidden or
+                                          "令牌已失效，当前不是交互式终端，无法登录；请先在终端中运行一次 main.py 完成授权")
+            if outcome == "login":
+                break
+            print(f"{Colors.RED}[提示] 进程 {entry.get('pid')} 正在登录，等待其完成...{Colors.RESET}", file=sys.stderr)
+            entry = self.store.wait_login(stale_token)
+            if entry:
+                self.adopt(entry)
+                return
+
+        try:
+            access_token, access_secret = oauth_login()
+            self.store.save(access_token, access_secret)
+        except BaseException:
+            self.store.end_login()
+            raise
+        print(f">>> 令牌已保存到 {config.TOKEN_FILE} (有效期至今日美东时间午夜)")
+        self.expires_at = token_expiry(time.time())
+        self.session.swap(access_token, access_secret)
+
+    def recover(self, generation):
+        """处理 401 或过期：返回 True 表示凭据已可用，调用方可以重试
+
+        generation 是失败请求签名时的凭据代次；若其他线程已在此期间续期或登录，直接重试即可；
+        若其他进程已换了新令牌，换用它而不是自己续期或登录。
+        """
+        with self.lock:
+            if self.session.state[2] != generation:
+                return True
+            entry = self.store.read()
+            if usable(entry) and entry["access_token"] != self.session.state[0]:
+                self.adopt(entry)
+                return True
+            if not self.expired():
+                print(f"\n{Colors.RED}[提示] 令牌已失效，正在续期...{Colors.RESET}", file=sys.stderr)
+                if self.renew():
+                    return True
+            print(f"\n{Colors.RED}[提示] 令牌已过期，正在重新登录...{Colors.RESET}", file=sys.stderr)
+            self.login()
+            return True
+
+    def renew_loop(self):
+        """后台线程：空闲接近 TOKEN_RENEW_IDLE 时续期，使令牌不因空闲超时而失效；顺便保存最近使用时间"""
+        while not self.stopped.wait(config.TOKEN_RENEW_CHECK):
+            self.save_activity()
+            if self.expired() or time.time() - self.last_activity < config.TOKEN_RENEW_IDLE:
+                continue
+            with self.lock:
+                self.renew()
+
+def get_session(pool_size=None):
+    """获取由 SessionManager 管理的会话：优先使用共享令牌，没有或已过期则进行 OAuth 登录"""
+    return SessionManager(pool_size).start()
+
+def oauth_login():
+    """执行 OAuth 1.0a 认证流程，返回 (access_token, access_token_secret)"""
+    print("\n正在连接 E*TRADE 进行认证...")
+
+    etrade = OAuth1Service(
+        name="etrade",
+        consumer_key=config.CONSUMER_KEY,
+        consumer_secret=config.CONSUMER_SECRET,
+        request_token_url=f"{config.BASE_URL}/oauth/request_token",
+        access_token_url=f"{config.BASE_URL}/oauth/access_token",
+        authorize_url="https://us.etrade.com/e/t/etws/authorize?key={}&token={}",
+        base_url=config.BASE_URL
+    )
+
+    request_token, request_token_secret = etrade.get_request_token(
+        params={"oauth_callback": "oob", "format": "json"}
+    )
+
+    authorize_url = etrade.authorize_url.format(etrade.consumer_key, request_token)
+    print(f"\n请在浏览器中打开以下链接进行授权:\n{authorize_url}")
+    # 只有需要登录时才用到浏览器，延迟导入以缩短普通命令的启动时间
+    import webbrowser
+    webbrowser.open(authorize_url)
+
+    verifier = input("\n请输入浏览器页面显示的验证码 (Verifier Code): ")
+
+    access_token, access_token_secret = etrade.get_access_token(
+        request_token,
+        request_token_secret,
+        params={"oauth_verifier": verifier}
+    )
+
+    print("认证成功！")
+    return access_token, access_token_secret
@@ -0,0 +1,205 @@
+"""account summary 子命令：把所有账户的持仓装入 NumPy 列式数组，做跨账户的向量化统计
+
+统计全部基于整列运算 (bincount / argpartition / percentile / histogram)，
+没有逐行的 Python 循环，几十万笔持仓也能在亚秒内算完。
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+import requests
+
+from etrade_cli import config
+from etrade_cli.accounts import get_accounts, iter_portfolio_pages
+from etrade_cli.colors import Colors
+from etrade_cli.render import Column, Report, pl_color
+
+class PositionColumns:
+    """列式持仓：每个字段一列，symbol 列存放代码表 symbols 中的下标"""
+    __slots__ = ("account", "symbol", "symbols", "quantity", "market_value", "total_gain")
+
+    def __init__(self, account, symbol, symbols, quantity, market_value, total_gain):
+        self.account = account
+        self.symbol = symbol
+        self.symbols = symbols
+        self.quantity = quantity
+        self.market_value = market_value
+        self.total_gain = total_gain
+
+    def __len__(self):
+        return len(self.account)
+
+    @classmethod
+    def from_positions(cls, positions_by_account):
+        """由每个账户的 [Position] 列表构建；symbol 在装载时顺便编码成整数"""
+        codes = {}
+        lengths = [len(positions) for positions in positions_by_account]
+        flat = list(chain.from_iterable(positions_by_account))
+        column = lambda name: np.fromiter(map(attrgetter(name), flat), dtype=np.float64, count=len(flat))
+        symbol = np.fromiter((codes.setdefault(p.symbol, len(codes)) for p in flat), dtype=np.int32, count=len(flat))
+        return cls(np.repeat(np.arange(len(lengths), dtype=np.int32), lengths), symbol,
+                   np.array(list(codes), dtype=object), column("quantity"), column("market_value"),
+                   column("total_gain"))
+
+def summarize(cols, account_count, top=config.SUMMARY_TOP, bins=config.SUMMARY_RETURN_BINS):
+    """计算汇总统计，返回 dict；空持仓时各项为 0"""
+    mv = cols.market_value
+    gain = cols.total_gain
+    cost = mv - gain
+    symbol_count = len(cols.symbols)
+
+    # 总计与按账户汇总
+    total_mv = float(mv.sum())
+    total_gain = float(gain.sum())
+    total_cost = float(cost.sum())
+    account_mv = np.bincount(cols.account, weights=mv, minlength=account_count)
+    account_gain = np.bincount(cols.account, weights=gain, minlength=account_count)
+
+    # 按 symbol 跨账户轧差：净数量、净市值、盈亏、笔数、涉及的账户数
+    net_qty = np.bincount(cols.symbol, weights=cols.quantity, minlength=symbol_count)
+    net_mv = np.bincount(cols.symbol, weights=mv, minlength=symbol_count)
+    net_gain = np.bincount(cols.symbol, weights=gain, minlength=symbol_count)
+    lots = np.bincount(cols.symbol, minlength=symbol_count)
+    pairs = np.unique(cols.symbol.astype(np.int64) * max(account_count, 1) + cols.account)
+    accounts_held = np.bincount(pairs // max(account_count, 1), minlength=symbol_count)
+
+    # 权重按总敞口 (空头市值取绝对值) 计算
+    exposure = np.abs(net_mv)
+    gross = float(exposure.sum())
+    weights = exposure / gross if gross else np.zeros(symbol_count)
+    n = min(top, symbol_count)
+    top_index = np.argpartition(-exposure, n - 1)[:n] if n else np.empty(0, dtype=np.intp)
+    top_index = top_index[np.argsort(-exposure[top_index], kind="stable")]
+    ranked = np.sort(weights)[::-1]
+
+    # 每笔持仓的收益率分布 (成本为 0 的记 0)
+    returns = np.divide(gain, cost, out=np.zeros_like(gain), where=cost != 0) * 100
+    edges = np.array([-np.inf, *bins, np.inf])
+    histogram, _ = np.histogram(returns, bins=edges)
+
+    return {
+        "lots": len(cols), "symbols": symbol_count,
+        "total_mv": total_mv, "total_cost": total_cost, "total_gain": total_gain,
+        "account_mv": account_mv, "account_gain": account_gain,
+        "top": [(cols.symbols[i], net_qty[i], net_mv[i], weights[i], net_gain[i], lots[i], accounts_held[i])
+                for i in top_index],
+        "top5": float(ranked[:5].sum()), "top10": float(ranked[:10].sum()),
+        "hhi": float(np.square(weights).sum()),
+        "winners": int(np.count_nonzero(gain > 0)), "losers": int(np.count_nonzero(gain < 0)),
+        "percentiles": np.percentile(returns, [5, 25, 50, 75, 95]) if len(returns) else np.zeros(5),
+        "histogram": list(zip(edges[:-1], edges[1:], histogram)),
+    }
+
+def fetch_all_positions(session, account_key):
+    """获取一个账户的全部持仓 (逐页)；任何一页失败都返回 None，不用部分持仓算出错误的合计"""
+    positions = []
+    try:
+        for page in iter_portfolio_pages(session, account_key):
+            positions.extend(page)
+    except requests.RequestException:
+        return None
+    return positions
+
+def print_summary(report, accounts, stats, failed):
+    pct = stats["total_gain"] / stats["total_cost"] * 100 if stats["total_cost"] else 0.0
+    hhi = stats["hhi"]
+    percentiles = dict(zip(("p5", "p25", "p50", "p75", "p95"), map(float, stats["percentiles"])))
+
+    if report.format == "table":
+        color = pl_color(stats["total_gain"])
+        report.text(f"\n{Colors.BOLD}组合汇总{Colors.RESET}  ({len(accounts)} 个账户，{stats['lots']} 笔持仓，{stats['symbols']} 个标的)")
+        report.text(f"{'='*90}")
+        report.text(f"总市值 ${stats['total_mv']:,.2f}  |  总成本 ${stats['total_cost']:,.2f}  |  "
+                    f"总盈亏 {color}${stats['total_gain']:,.2f} ({pct:+.2f}%){Colors.RESET}")
+        if failed:
+            report.text(f"{Colors.RED}{failed} 个账户的持仓获取失败，未计入统计{Colors.RESET}")
+    else:
+        overview = report.table("overview", [Column(key) for key in (
+            "accounts", "failed_accounts", "lots", "symbols", "market_value", "cost", "total_gain", "total_gain_pct",
+            "top5_weight", "top10_weight", "hhi", "winners", "losers", *percentiles)])
+        overview.row({"accounts": len(accounts), "failed_accounts": failed, "lots": stats["lots"],
+                      "symbols": stats["symbols"], "market_value": stats["total_mv"], "cost": stats["total_cost"],
+                      "total_gain": stats["total_gain"], "total_gain_pct": pct, "top5_weight": stats["top5"],
+                      "top10_weight": stats["top10"], "hhi": hhi, "winners": stats["winners"],
+                      "losers": stats["losers"], **percentiles})
+
+    table = report.table("accounts", [
+        Column("account_id", text=False),
+        Column("account", "账户", 20),
+        Column("market_value", "市值 ($)", 16, ">", ",.2f"),
+        Column("share", "占比", 8, ">", ".2f", suffix="%"),
+        Column("total_gain", "盈亏 ($)", 14, ">", ",.2f", color=pl_color),
+    ])
+    table.header("")
+    for acc, mv, gain in zip(accounts, stats["account_mv"], stats["account_gain"]):
+        share = mv / stats["total_mv"] * 100 if stats["total_mv"] else 0.0
+        table.row({"account_id": acc.account_id, "account": acc.description, "market_value": float(mv),
+                   "share": float(share), "total_gain": float(gain)})
+    table.footer()
+
+    table = report.table("symbols", [
+        Column("symbol", "Symbol", 12),
+        Column("net_quantity", "净数量", 12, ">", ",.2f"),
+        Column("market_value", "净市值 ($)", 16, ">", ",.2f"),
+        Column("weight", "权重", 8, ">", ".2f", suffix="%"),
+        Column("total_gain", "盈亏 ($)", 14, ">", ",.2f", color=pl_color),
+        Column("lots", "笔数", 6, ">"),
+        Column("accounts", "账户数", 6, ">"),
+    ])
+    table.header(f"\n前 {len(stats['top'])} 大标的 (跨账户轧差)")
+    for symbol, qty, mv, weight, gain, lots, held in stats["top"]:
+        table.row({"symbol": symbol, "net_quantity": float(qty), "market_value": float(mv),
+                   "weight": float(weight) * 100, "total_gain": float(gain), "lots": int(lots), "accounts": int(held)})
+    table.footer()
+
+    if report.format == "table":
+        report.text(f"\n集中度: 前 5 大 {stats['top5'] * 100:.2f}%，前 10 大 {stats['top10'] * 100:.2f}%，"
+                    f"HHI {hhi:.4f} (有效标的数 {1 / hhi if hhi else 0:.1f})")
+        report.text(f"\n盈亏分布: 盈利 {stats['winners']} 笔，亏损 {stats['losers']} 笔；收益率分位 "
+                    + " / ".join(f"{name.upper()} {value:.1f}%" for name, value in percentiles.items()))
+
+    table = report.table("distribution", [
+        Column("bucket", "收益率", 14, ">"),
+        Column("low", text=False),
+        Column("high", text=False),
+        Column("lots", "笔数", 8, ">"),
+        Column("bar", "", 40, data=False),
+    ])
+    table.header()
+    largest = max((count for _, _, count in stats["histogram"]), default=0)
+    for low, high, count in stats["histogram"]:
+        label = f"< {high:g}%" if low == -np.inf else f">= {low:g}%" if high == np.inf else f"{low:g}% ~ {high:g}%"
+        table.row({"bucket": label, "low": None if low == -np.inf else float(low),
+                   "high": None if high == np.inf else float(high), "lots": int(count),
+                   "bar": "#" * int(round(count / largest * 40)) if largest else ""})
+    if report.format == "table":
+        report.text(f"{'='*90}")
+
+def cmd_account_summary(session, concurrency=config.DEFAULT_CONCURRENCY, refresh=False, fmt="table"):
+    """处理 'account summary' 命令；有账户的持仓获取失败时返回退出码 1"""
+    accounts = get_accounts(session, refresh)
+    if accounts is None:
+        return 1
+    if not accounts:
+        print("名下没有账户。")
+        return 0
+
+    # 1. 并发拉取所有账户的全部持仓
+    start = time.perf_counter()
+    workers = max(1, min(concurrency, len(accounts)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda acc: fetch_all_positions(session, acc.account_id_key), accounts))
+    failed = sum(1 for r in results if r is None)
+    loaded = time.perf_counter()
+
+    # 2. 装入列式数组并做向量化统计
+    cols = PositionColumns.from_positions([r or [] for r in results])
+    stats = summarize(cols, len(accounts))
+    done = time.perf_counter()
+
+    with Report(fmt) as report:
+        print_summary(report, accounts, stats, failed)
+        report.text(f"\n获取 {loaded - start:.2f}s，统计 {(done - loaded) * 1000:.0f}ms")
+    return 1 if failed else 0
@@ -0,0 +1,192 @@
+"""令牌存储：多个 main.py 进程共用同一份 OAuth 令牌
+
+令牌不再写回 config.ini，而是单独保存在 TOKEN_FILE (JSON，权限 0600)：
+  - 修改都在锁文件 (TOKEN_FILE.lock) 的排他锁内读-改-写，先写临时文件再原子替换，
+    读取不加锁也不会读到半个文件；
+  - 需要交互式登录的进程先登记"登录租约"，其他进程看到租约就等它写入新令牌，
+    而不是各自再登录一次 (新登录会让别的进程手里的令牌失效)；
+  - last_used 记录最近一次使用令牌的时间，启动时据此判断是否要先续期。
+"""
+import os
+import json
+import time
+import socket
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from etrade_cli import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def eastern_zone():
+    """E*TRADE 按美东时间 (America/New_York) 划分日期"""
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo("America/New_York")
+    except (ImportError, KeyError, OSError):
+        return timezone(timedelta(hours=-5))  # 没有时区数据时按 EST 估算
+
+def token_expiry(issued_at):
+    """令牌在签发后的第一个美东时间午夜失效，返回该时刻的时间戳"""
+    eastern = eastern_zone()
+    issued = datetime.fromtimestamp(issued_at, eastern)
+    midnight = datetime(issued.year, issued.month, issued.day, tzinfo=eastern) + timedelta(days=1)
+    return midnight.timestamp()
+
+def usable(entry):
+    """条目中有令牌且尚未过美东午夜"""
+    if not entry.get("access_token") or not entry.get("access_token_secret"):
+        return False
+    issued = entry.get("issued_at")
+    return not issued or time.time() < token_expiry(issued)
+
+@contextmanager
+def file_lock(path):
+    """进程间排他锁 (Unix 用 flock，Windows 用 msvcrt)；进程退出时由系统释放，不会留下死锁"""
+    with open(path, "a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def process_alive(pid):
+    # os.kill(pid, 0) 在 Windows 上会结束进程，只在 POSIX 上探测
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+class TokenStore:
+    """按 Consumer Key 分条保存令牌：{键: {access_token, access_token_secret, issued_at, last_used, lease}}"""
+
+    def __init__(self, path, consumer_key, lease_seconds=600):
+        self.path = path
+        self.key = hashlib.sha256(consumer_key.encode()).hexdigest()
+        self.lease_seconds = lease_seconds
+        self.owner = {"pid": os.getpid(), "host": socket.gethostname()}
+
+    def read_all(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def read(self):
+        """当前 Consumer Key 的条目 (dict)，没有返回 {}"""
+        entry = self.read_all().get(self.key)
+        return entry if isinstance(entry, dict) else {}
+
+    def write_all(self, data):
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.path)
+
+    @contextmanager
+    def update(self):
+        """在锁内读出当前条目供修改，退出时写回"""
+        with file_lock(f"{self.path}.lock"):
+            data = self.read_all()
+            entry = data.get(self.key)
+            entry = entry if isinstance(entry, dict) else {}
+            yield entry
+            data[self.key] = entry
+            self.write_all(data)
+
+    def load(self):
+        """读取令牌；令牌文件里还没有时沿用旧版本写在 config.ini 中的令牌 (只读，不再改写 config.ini)"""
+        entry = self.read()
+        if entry.get("access_token"):
+            return entry
+        section = config.load()["DEFAULT"]
+        if section.get("ACCESS_TOKEN") and section.get("ACCESS_TOKEN_SECRET"):
+            issued = section.get("ACCESS_TOKEN_ISSUED")
+            return {"access_token": section["ACCESS_TOKEN"], "access_token_secret": section["ACCESS_TOKEN_SECRET"],
+                    "issued_at": int(issued) if issued else None}
+        return {}
+
+    def save(self, access_token, access_token_secret):
+        """保存新令牌，同时释放本进程的登录租约"""
+        now = time.time()
+        with self.update() as entry:
+            entry.update(access_token=access_token, access_token_secret=access_token_secret,
+                         issued_at=int(now), last_used=now)
+            entry.pop("lease", None)
+
+    def touch(self, last_used):
+        """记录最近一次使用令牌的时间 (只前进不后退)"""
+        with self.update() as entry:
+            entry["last_used"] = max(entry.get("last_used") or 0, last_used)
+
+    def lease_holder(self, entry):
+        """仍然有效的他人租约，没有返回 None；过期或持有进程已退出的租约视为无效"""
+        lease = entry.get("lease")
+        if not lease or lease.get("until", 0) < time.time():
+            return None
+        if lease.get("pid") == self.owner["pid"] and lease.get("host") == self.owner["host"]:
+            return None
+        if lease.get("host") == self.owner["host"] and not process_alive(lease.get("pid", 0)):
+            return None
+        return lease
+
+    def begin_login(self, stale_token, interactive=True):
+        """准备登录：返回 ("tokens", 条目) 表示其他进程已换了新令牌可以直接用，
+        ("wait", 租约) 表示其他进程正在登录，("login", None) 表示已登记租约、由本进程登录，
+        ("none", None) 表示非交互式进程既没有新令牌可用也不能登录"""
+        with file_lock(f"{self.path}.lock"):
+            data = self.read_all()
+            entry = data.get(self.key)
+            entry = entry if isinstance(entry, dict) else {}
+            if usable(entry) and entry["access_token"] != stale_token:
+                return "tokens", entry
+            lease = self.lease_holder(entry)
+            if lease:
+                return "wait", lease
+            if not interactive:
+                return "none", None
+            entry["lease"] = {**self.owner, "until": time.time() + self.lease_seconds}
+            data[self.key] = entry
+            self.write_all(data)
+            return "login", None
+
+    def end_login(self):
+        """登录失败或中断时释放本进程的租约"""
+        with self.update() as entry:
+            lease = entry.get("lease")
+            if lease and lease.get("pid") == self.owner["pid"] and lease.get("host") == self.owner["host"]:
+                del entry["lease"]
+
+    def wait_login(self, stale_token, poll=1.0):
+        """等待持有租约的进程登录完成：返回新令牌条目；租约消失或失效仍没有新令牌时返回 None"""
+        while True:
+            time.sleep(poll)
+            entry = self.read()
+            if usable(entry) and entry["access_token"] != stale_token:
+                return entry
+            if not self.lease_holder(entry):
+                return None
+
+def get_token_store():
+    return TokenStore(config.TOKEN_FILE, config.CONSUMER_KEY, config.LOGIN_LEASE)
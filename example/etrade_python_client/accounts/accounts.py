@@ -1,21 +1,16 @@
-import json
-import logging
 import configparser
-from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
 from order.order import Order
+from market.market import quote_cache
+from models.models import Balance, decode_positions
+from tracing.tracing import trace_response
 
 # loading configuration file
 config = configparser.ConfigParser()
 config.read('config.ini')
 
-# logger settings
-logger = logging.getLogger('my_logger')
-logger.setLevel(logging.DEBUG)
-handler = RotatingFileHandler("python_client.log", maxBytes=5 * 1024 * 1024, backupCount=3)
-FORMAT = "%(asctime)-15s %(message)s"
-fmt = logging.Formatter(FORMAT, datefmt='%m/%d/%Y %I:%M:%S %p')
-handler.setFormatter(fmt)
-logger.addHandler(handler)
+# Number of positions requested per portfolio page
+PORTFOLIO_PAGE_SIZE = 50
 
 
 class Accounts:
@@ -41,12 +36,10 @@ class Accounts:
 
         # Make API call for GET request
         response = self.session.get(url, header_auth=True)
-        logger.debug("Request Header: %s", response.request.headers)
+        trace_response(response)
 
         # Handle and parse response
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
 
             data = response.json()
             if data is not None and "AccountListResponse" in data and "Accounts" in data["AccountListResponse"] \
@@ -84,7 +77,6 @@ class Accounts:
                         print("Unknown Account Selected!")
             else:
                 # Handle errors
-                logger.debug("Response Body: %s", response.text)
                 if response is not None and response.headers['Content-Type'] == 'application/json' \
                         and "Error" in response.json() and "message" in response.json()["Error"] \
                         and response.json()["Error"]["message"] is not None:
@@ -93,7 +85,6 @@ class Accounts:
                     print("Error: AccountList API service error")
         else:
             # Handle errors
-            logger.debug("Response Body: %s", response.text)
             if response is not None and response.headers['Content-Type'] == 'application/json' \
                     and "Error" in response.json() and "message" in response.json()["Error"] \
                     and response.json()["Error"]["message"] is not None:
@@ -101,6 +92,75 @@ class Accounts:
             else:
                 print("Error: AccountList API service error")
 
+    def fetch_portfolio_page(self, page_number=1):
+        """
+        Calls portfolio API for a single page of positions
+
+        :param page_number: page to request, starting at 1
+        :return response object
+        """
+        # URL for the API endpoint
+        url = self.base_url + "/v1/accounts/" + self.account["accountIdKey"] + "/portfolio.json"
+
+        # Add parameters
+        params = {"count": PORTFOLIO_PAGE_SIZE, "pageNumber": page_number}
+
+        # Make API call for GET request
+        response = self.session.get(url, header_auth=True, params=params)
+        trace_response(response)
+        return response
+
+    @staticmethod
+    def parse_portfolio_page(data, page_number):
+        """
+        Extracts the positions of one portfolio page and the number of the page after it
+
+        :param data: parsed portfolio response
+        :param page_number: number of the page the response belongs to
+        :return list of Position records and the next page number, or None on the last page
+        """
+        positions = []
+        next_page = None
+        if data is not None and "PortfolioResponse" in data and "AccountPortfolio" in data["PortfolioResponse"]:
+            for acctPortfolio in data["PortfolioResponse"]["AccountPortfolio"]:
+                if acctPortfolio is not None:
+                    positions.extend(decode_positions(acctPortfolio))
+                if acctPortfolio is not None and acctPortfolio.get("nextPageNo"):
+                    next_page = int(acctPortfolio["nextPageNo"])
+                elif acctPortfolio is not None and int(acctPortfolio.get("totalPages", 1) or 1) > page_number:
+                    next_page = page_number + 1
+        return positions, next_page
+
+    def portfolio_pages(self, first_page_data=None):
+        """
+        Generator over the account's positions one page at a time, following pageNumber to the
+        last page. The next page is prefetched while the caller works on the current one, so at
+        most two pages are held in memory
+
+        :param first_page_data: already parsed first page, if the caller fetched it
+        :return iterator of lists of Position records
+        """
+        page_number = 1
+        if first_page_data is None:
+            response = self.fetch_portfolio_page(page_number)
+            if response is None or response.status_code != 200:
+                return
+            first_page_data = response.json()
+        positions, next_page = self.parse_portfolio_page(first_page_data, page_number)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                future = executor.submit(self.fetch_portfolio_page, next_page) if next_page else None
+                yield positions
+                if future is None:
+                    return
+                response = future.result()
+                if response is None or response.status_code != 200:
+                    print("Error: Portfolio API service error")
+                    return
+                page_number = next_page
+                positions, next_page = self.parse_portfolio_page(response.json(), page_number)
+
     def portfolio(self):
         """
         Call portfolio API to retrieve a list of positions held in the specified account
@@ -108,49 +168,51 @@ class Accounts:
         :param self: Passes in parameter authenticated session and information on selected account
         """
 
-        # URL for the API endpoint
-        url =self.base_url + "/v1/accounts/" + self.account["accountIdKey"] + "/portfolio.json"
-
-        # Make API call for GET request
-        response = self.session.get(url, header_auth=True)
-        logger.debug("Request Header: %s", response.request.headers)
+        # Make API call for GET request of the first page
+        response = self.fetch_portfolio_page(1)
 
         print("\nPortfolio:")
 
         # Handle and parse response
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
             data = response.json()
 
             if data is not None and "PortfolioResponse" in data and "AccountPortfolio" in data["PortfolioResponse"]:
-                # Display balance information
-                for acctPortfolio in data["PortfolioResponse"]["AccountPortfolio"]:
-                    if acctPortfolio is not None and "Position" in acctPortfolio:
-                        for position in acctPortfolio["Position"]:
-                            print_str = ""
-                            if position is not None and "symbolDescription" in position:
-                                print_str = print_str + "Symbol: " + str(position["symbolDescription"])
-                            if position is not None and "quantity" in position:
-                                print_str = print_str + " | " + "Quantity #: " + str(position["quantity"])
-                            if position is not None and "Quick" in position and "lastTrade" in position["Quick"]:
-                                print_str = print_str + " | " + "Last Price: " \
-                                            + str('${:,.2f}'.format(position["Quick"]["lastTrade"]))
-                            if position is not None and "pricePaid" in position:
-                                print_str = print_str + " | " + "Price Paid $: " \
-                                            + str('${:,.2f}'.format(position["pricePaid"]))
-                            if position is not None and "totalGain" in position:
-                                print_str = print_str + " | " + "Total Gain $: " \
-                                            + str('${:,.2f}'.format(position["totalGain"]))
-                            if position is not None and "marketValue" in position:
-                                print_str = print_str + " | " + "Value $: " \
-                                            + str('${:,.2f}'.format(position["marketValue"]))
-                            print(print_str)
-                    else:
-                        print("None")
+                # Display positions, page by page as they arrive
+                has_positions = False
+                for positions in self.portfolio_pages(data):
+                    for position in positions:
+                        has_positions = True
+                        # Share the Quick quote with the quote cache so a follow-up lookup is free
+                        if position.symbol is not None and position.last_trade is not None:
+                            quote_cache.update(position.symbol,
+                                               security_type=position.security_type,
+                                               last_trade=position.last_trade,
+                                               change_close=position.change,
+                                               change_close_pct=position.change_pct,
+                                               total_volume=position.volume)
+                        print_str = ""
+                        if position.description is not None:
+                            print_str = print_str + "Symbol: " + str(position.description)
+                        if position.quantity is not None:
+                            print_str = print_str + " | " + "Quantity #: " + str(position.quantity)
+                        if position.last_trade is not None:
+                            print_str = print_str + " | " + "Last Price: " \
+                                        + str('${:,.2f}'.format(position.last_trade))
+                        if position.price_paid is not None:
+                            print_str = print_str + " | " + "Price Paid $: " \
+                                        + str('${:,.2f}'.format(position.price_paid))
+                        if position.total_gain is not None:
+                            print_str = print_str + " | " + "Total Gain $: " \
+                                        + str('${:,.2f}'.format(position.total_gain))
+                        if position.market_value is not None:
+                            print_str = print_str + " | " + "Value $: " \
+                                        + str('${:,.2f}'.format(position.market_value))
+                        print(print_str)
+                if not has_positions:
+                    print("None")
             else:
                 # Handle errors
-                logger.debug("Response Body: %s", response.text)
                 if response is not None and "headers" in response and "Content-Type" in response.headers \
                         and response.headers['Content-Type'] == 'application/json' \
                         and "Error" in response.json() and "message" in response.json()["Error"] \
@@ -162,7 +224,6 @@ class Accounts:
             print("None")
         else:
             # Handle errors
-            logger.debug("Response Body: %s", response.text)
             if response is not None and "headers" in response and "Content-Type" in response.headers \
                     and response.headers['Content-Type'] == 'application/json' \
                     and "Error" in response.json() and "message" in response.json()["Error"] \
@@ -187,37 +248,28 @@ class Accounts:
 
         # Make API call for GET request
         response = self.session.get(url, header_auth=True, params=params, headers=headers)
-        logger.debug("Request url: %s", url)
-        logger.debug("Request Header: %s", response.request.headers)
+        trace_response(response)
 
         # Handle and parse response
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
             data = response.json()
-            if data is not None and "BalanceResponse" in data:
-                balance_data = data["BalanceResponse"]
-                if balance_data is not None and "accountId" in balance_data:
-                    print("\n\nBalance for " + balance_data["accountId"] + ":")
+            if data is not None and data.get("BalanceResponse") is not None:
+                balance = Balance.from_json(data["BalanceResponse"])
+                if balance.account_id is not None:
+                    print("\n\nBalance for " + balance.account_id + ":")
                 else:
                     print("\n\nBalance:")
                 # Display balance information
-                if balance_data is not None and "accountDescription" in balance_data:
-                    print("Account Nickname: " + balance_data["accountDescription"])
-                if balance_data is not None and "Computed" in balance_data \
-                        and "RealTimeValues" in balance_data["Computed"] \
-                        and "totalAccountValue" in balance_data["Computed"]["RealTimeValues"]:
-                    print("Net Account Value: "
-                          + str('${:,.2f}'.format(balance_data["Computed"]["RealTimeValues"]["totalAccountValue"])))
-                if balance_data is not None and "Computed" in balance_data \
-                        and "marginBuyingPower" in balance_data["Computed"]:
-                    print("Margin Buying Power: " + str('${:,.2f}'.format(balance_data["Computed"]["marginBuyingPower"])))
-                if balance_data is not None and "Computed" in balance_data \
-                        and "cashBuyingPower" in balance_data["Computed"]:
-                    print("Cash Buying Power: " + str('${:,.2f}'.format(balance_data["Computed"]["cashBuyingPower"])))
+                if balance.description is not None:
+                    print("Account Nickname: " + balance.description)
+                if balance.net_value is not None:
+                    print("Net Account Value: " + str('${:,.2f}'.format(balance.net_value)))
+                if balance.margin_buying_power is not None:
+                    print("Margin Buying Power: " + str('${:,.2f}'.format(balance.margin_buying_power)))
+                if balance.cash_buying_power is not None:
+                    print("Cash Buying Power: " + str('${:,.2f}'.format(balance.cash_buying_power)))
             else:
                 # Handle errors
-                logger.debug("Response Body: %s", response.text)
                 if response is not None and response.headers['Content-Type'] == 'application/json' \
                         and "Error" in response.json() and "message" in response.json()["Error"] \
                         and response.json()["Error"]["message"] is not None:
@@ -226,7 +278,6 @@ class Accounts:
                     print("Error: Balance API service error")
         else:
             # Handle errors
-            logger.debug("Response Body: %s", response.text)
             if response is not None and response.headers['Content-Type'] == 'application/json' \
                     and "Error" in response.json() and "message" in response.json()["Error"] \
                     and response.json()["Error"]["message"] is not None:
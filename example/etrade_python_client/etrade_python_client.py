@@ -1,29 +1,18 @@
 """This Python script provides examples on using the E*TRADE API endpoints"""
 from __future__ import print_function
 import webbrowser
-import json
-import logging
 import configparser
 import sys
 import requests
 from rauth import OAuth1Service
-from logging.handlers import RotatingFileHandler
 from accounts.accounts import Accounts
-from market.market import Market
+from market.market import Market, quote_cache
+from transport.transport import configure_transport, print_transport_stats
 
 # loading configuration file
 config = configparser.ConfigParser()
 config.read('config.ini')
 
-# logger settings
-logger = logging.getLogger('my_logger')
-logger.setLevel(logging.DEBUG)
-handler = RotatingFileHandler("python_client.log", maxBytes=5*1024*1024, backupCount=3)
-FORMAT = "%(asctime)-15s %(message)s"
-fmt = logging.Formatter(FORMAT, datefmt='%m/%d/%Y %I:%M:%S %p')
-handler.setFormatter(fmt)
-logger.addHandler(handler)
-
 
 def oauth():
     """Allows user authorization for the sample application with OAuth 1"""
@@ -72,6 +61,9 @@ def oauth():
                                   request_token_secret,
                                   params={"oauth_verifier": text_code})
 
+    # Share one pooled, keep-alive transport across Market, Accounts and Order
+    configure_transport(session, config["DEFAULT"])
+
     main_menu(session, base_url)
 
 
@@ -99,6 +91,9 @@ def main_menu(session, base_url):
             accounts = Accounts(session, base_url)
             accounts.account_list()
         elif selection == "3":
+            print_transport_stats(session)
+            stats = quote_cache.stats()
+            print("Quote Cache Hits: " + str(stats["hits"]) + " | Misses: " + str(stats["misses"]))
             break
         else:
             print("Unknown Option Selected!")
@@ -1,82 +1,281 @@
-import json
-import logging
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from tracing.tracing import logger, trace_response
+from transport.transport import REQUEST_TIMEOUT
 
-# logger settings
-logger = logging.getLogger('my_logger')
-logger.setLevel(logging.DEBUG)
-handler = RotatingFileHandler("python_client.log", maxBytes=5 * 1024 * 1024, backupCount=3)
-FORMAT = "%(asctime)-15s %(message)s"
-fmt = logging.Formatter(FORMAT, datefmt='%m/%d/%Y %I:%M:%S %p')
-handler.setFormatter(fmt)
-logger.addHandler(handler)
+
+# E*TRADE accepts up to 25 symbols per quote request, or 50 with overrideSymbolCount=true
+MAX_SYMBOLS_PER_REQUEST = 50
+
+# Compact quote record returned by Market.get_quotes
+Quote = namedtuple("Quote", ["symbol", "security_type", "date_time", "last_trade", "change_close",
+                             "change_close_pct", "open", "previous_close", "bid", "bid_size", "ask",
+                             "ask_size", "low", "high", "total_volume"])
+
+# How long each quote field stays fresh in the quote cache, in seconds
+QUOTE_FIELD_TTL = {"symbol": float("inf"),
+                   "security_type": 24 * 60 * 60,
+                   "date_time": 2.0,
+                   "last_trade": 2.0,
+                   "change_close": 2.0,
+                   "change_close_pct": 2.0,
+                   "open": 60 * 60,
+                   "previous_close": 60 * 60,
+                   "bid": 2.0,
+                   "bid_size": 2.0,
+                   "ask": 2.0,
+                   "ask_size": 2.0,
+                   "low": 5.0,
+                   "high": 5.0,
+                   "total_volume": 2.0}
+
+# Quote fields a portfolio Quick block provides; Accounts.portfolio seeds them into the quote cache, and the
+# quote view only requires these so that looking up a symbol right after a portfolio refresh is free
+QUICK_QUOTE_FIELDS = ("symbol", "security_type", "last_trade", "change_close", "change_close_pct", "total_volume")
+
+
+class QuoteCache:
+    def __init__(self, max_size=5000, field_ttl=None):
+        """
+        Size-bounded LRU cache of quote fields, each with its own freshness TTL
+
+        :param max_size: maximum number of symbols kept before the least recently used is evicted
+        :param field_ttl: dict of field name to TTL in seconds, defaults to QUOTE_FIELD_TTL
+        """
+        self.max_size = max_size
+        self.field_ttl = field_ttl or QUOTE_FIELD_TTL
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, symbol, fields=Quote._fields):
+        """
+        Looks up a symbol in the cache
+
+        :param symbol: symbol to look up
+        :param fields: quote fields the caller needs; all of them must be fresh for a hit
+        :return Quote record with the other fields set only while they are fresh, or None on a miss
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if entry is None:
+                self.misses += 1
+                return None
+            fresh = {field: value for field, (value, stored) in entry.items() if now - stored <= self.field_ttl[field]}
+            if any(field not in fresh for field in fields):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(symbol)
+            self.hits += 1
+            return Quote(**{field: fresh.get(field) for field in Quote._fields})
+
+    def update(self, symbol, **fields):
+        """
+        Stores fresh values for some of the fields of a symbol, e.g. from a portfolio Quick block
+
+        :param symbol: symbol the values belong to
+        :param fields: quote field values; None values are ignored
+        """
+        self.store(symbol, {field: value for field, value in fields.items() if value is not None})
+
+    def put(self, quote):
+        """
+        Stores every field of a Quote record, including the ones the API left empty
+
+        :param quote: Quote record returned by the quote API
+        """
+        self.store(quote.symbol, quote._asdict())
+
+    def store(self, symbol, fields):
+        """
+        Timestamps the given field values and applies LRU eviction
+
+        :param symbol: symbol the values belong to
+        :param fields: dict of quote field values
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if entry is None:
+                entry = self.entries[symbol] = {}
+            else:
+                self.entries.move_to_end(symbol)
+            entry["symbol"] = (symbol, now)
+            for field, value in fields.items():
+                entry[field] = (value, now)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        """
+        :return dict with the number of cached symbols, hits and misses
+        """
+        with self.lock:
+            return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+# Quote cache shared by Market, Accounts and Order within the process
+quote_cache = QuoteCache()
 
 
 class Market:
-    def __init__(self, session, base_url):
+    def __init__(self, session, base_url, max_workers=8, cache=quote_cache):
         self.session = session
         self.base_url = base_url
+        self.max_workers = max_workers
+        self.cache = cache
 
-    def quotes(self):
+    def get_quotes(self, symbols, detail_flag="ALL", fields=Quote._fields):
         """
-        Calls quotes API to provide quote details for equities, options, and mutual funds
+        Fetches quotes for any number of symbols, split into chunks of MAX_SYMBOLS_PER_REQUEST
+        that are requested concurrently; the session's transport applies the rate limit. Symbols whose requested fields
+        are still fresh in the quote cache are served from it without an API call
 
-        :param self: Passes authenticated session in parameter
+        :param symbols: iterable of symbols, or a comma separated string
+        :param detail_flag: detailFlag passed to the quote API
+        :param fields: quote fields the caller needs, used to decide cache freshness
+        :return list of Quote records in input order, and a list of error messages
         """
-        symbols = input("\nPlease enter Stock Symbol: ")
+        if isinstance(symbols, str):
+            symbols = symbols.split(",")
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+        quotes = {}
+        errors = []
+        missing = []
+        for symbol in symbols:
+            quote = self.cache.get(symbol, fields) if self.cache is not None else None
+            if quote is not None:
+                quotes[symbol] = quote
+            else:
+                missing.append(symbol)
+
+        chunks = [missing[i:i + MAX_SYMBOLS_PER_REQUEST]
+                  for i in range(0, len(missing), MAX_SYMBOLS_PER_REQUEST)]
+        if not chunks:
+            return [quotes[symbol] for symbol in symbols if symbol in quotes], errors
 
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            for chunk_quotes, chunk_errors in executor.map(
+                    lambda chunk: self.fetch_quote_chunk(chunk, detail_flag), chunks):
+                for quote in chunk_quotes:
+                    quotes[quote.symbol] = quote
+                    if self.cache is not None:
+                        self.cache.put(quote)
+                errors.extend(chunk_errors)
+
+        return [quotes[symbol] for symbol in symbols if symbol in quotes], errors
+
+    def fetch_quote_chunk(self, symbols, detail_flag="ALL"):
+        """
+        Calls quotes API for a single chunk of symbols
+
+        :param symbols: list of at most MAX_SYMBOLS_PER_REQUEST symbols
+        :param detail_flag: detailFlag passed to the quote API
+        :return list of Quote records and a list of error messages; a failed request only fails its own chunk
+        """
         # URL for the API endpoint
-        url = self.base_url + "/v1/market/quote/" + symbols + ".json"
+        url = self.base_url + "/v1/market/quote/" + ",".join(symbols) + ".json"
+
+        # Add parameters
+        params = {"detailFlag": detail_flag}
+        if len(symbols) > 25:
+            params["overrideSymbolCount"] = "true"
 
         # Make API call for GET request
-        response = self.session.get(url)
-        logger.debug("Request Header: %s", response.request.headers)
+        try:
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        except requests.Timeout:
+            logger.debug("Quote request timed out: %s", url)
+            return [], ["Quote API request timed out"]
+        except requests.RequestException as e:
+            logger.debug("Quote request failed: %s", e)
+            return [], ["Quote API network error"]
+        trace_response(response)
+
+        if response is None or response.status_code != 200:
+            logger.debug("Response Body: %s", response)
+            return [], ["Quote API service error"]
+        try:
+            data = response.json()
+        except ValueError:
+            return [], ["Quote API service error"]
+        if data is None or "QuoteResponse" not in data:
+            return [], ["Quote API service error"]
 
-        if response is not None and response.status_code == 200:
+        quotes = []
+        for quote in data["QuoteResponse"].get("QuoteData", []):
+            if quote is None:
+                continue
+            product = quote.get("Product", {})
+            detail = quote.get("All", {})
+            quotes.append(Quote(symbol=product.get("symbol"),
+                                security_type=product.get("securityType"),
+                                date_time=quote.get("dateTime"),
+                                last_trade=detail.get("lastTrade"),
+                                change_close=detail.get("changeClose"),
+                                change_close_pct=detail.get("changeClosePercentage"),
+                                open=detail.get("open"),
+                                previous_close=detail.get("previousClose"),
+                                bid=detail.get("bid"),
+                                bid_size=detail.get("bidSize"),
+                                ask=detail.get("ask"),
+                                ask_size=detail.get("askSize"),
+                                low=detail.get("low"),
+                                high=detail.get("high"),
+                                total_volume=detail.get("totalVolume")))
 
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
+        errors = []
+        messages = data["QuoteResponse"].get("Messages", {}).get("Message") or []
+        for error_message in messages:
+            errors.append(error_message.get("description", "Quote API service error"))
+        return quotes, errors
 
-            # Handle and parse response
-            print("")
-            data = response.json()
-            if data is not None and "QuoteResponse" in data and "QuoteData" in data["QuoteResponse"]:
-                for quote in data["QuoteResponse"]["QuoteData"]:
-                    if quote is not None and "dateTime" in quote:
-                        print("Date Time: " + quote["dateTime"])
-                    if quote is not None and "Product" in quote and "symbol" in quote["Product"]:
-                        print("Symbol: " + quote["Product"]["symbol"])
-                    if quote is not None and "Product" in quote and "securityType" in quote["Product"]:
-                        print("Security Type: " + quote["Product"]["securityType"])
-                    if quote is not None and "All" in quote and "lastTrade" in quote["All"]:
-                        print("Last Price: " + str(quote["All"]["lastTrade"]))
-                    if quote is not None and "All" in quote and "changeClose" in quote["All"] \
-                        and "changeClosePercentage" in quote["All"]:
-                        print("Today's Change: " + str('{:,.3f}'.format(quote["All"]["changeClose"])) + " (" +
-                              str(quote["All"]["changeClosePercentage"]) + "%)")
-                    if quote is not None and "All" in quote and "lastTrade" in quote["All"]:
-                        print("Open: " + str('{:,.2f}'.format(quote["All"]["lastTrade"])))
-                    if quote is not None and "All" in quote and "previousClose" in quote["All"]:
-                        print("Previous Close: " + str('{:,.2f}'.format(quote["All"]["previousClose"])))
-                    if quote is not None and "All" in quote and "bid" in quote["All"] and "bidSize" in quote["All"]:
-                        print("Bid (Size): " + str('{:,.2f}'.format(quote["All"]["bid"])) + "x" + str(
-                            quote["All"]["bidSize"]))
-                    if quote is not None and "All" in quote and "ask" in quote["All"] and "askSize" in quote["All"]:
-                        print("Ask (Size): " + str('{:,.2f}'.format(quote["All"]["ask"])) + "x" + str(
-                            quote["All"]["askSize"]))
-                    if quote is not None and "All" in quote and "low" in quote["All"] and "high" in quote["All"]:
-                        print("Day's Range: " + str(quote["All"]["low"]) + "-" + str(quote["All"]["high"]))
-                    if quote is not None and "All" in quote and "totalVolume" in quote["All"]:
-                        print("Volume: " + str('{:,}'.format(quote["All"]["totalVolume"])))
-            else:
-                # Handle errors
-                if data is not None and 'QuoteResponse' in data and 'Messages' in data["QuoteResponse"] \
-                        and 'Message' in data["QuoteResponse"]["Messages"] \
-                        and data["QuoteResponse"]["Messages"]["Message"] is not None:
-                    for error_message in data["QuoteResponse"]["Messages"]["Message"]:
-                        print("Error: " + error_message["description"])
-                else:
-                    print("Error: Quote API service error")
-        else:
-            logger.debug("Response Body: %s", response)
+    def quotes(self):
+        """
+        Calls quotes API to provide quote details for equities, options, and mutual funds
+
+        :param self: Passes authenticated session in parameter
+        """
+        symbols = input("\nPlease enter Stock Symbol: ")
+
+        # Fields beyond the Quick ones are shown when the quote comes from the API or they are still fresh
+        quotes, errors = self.get_quotes(symbols, fields=QUICK_QUOTE_FIELDS)
+
+        # Display quotes
+        print("")
+        for quote in quotes:
+            if quote.date_time is not None:
+                print("Date Time: " + quote.date_time)
+            if quote.symbol is not None:
+                print("Symbol: " + quote.symbol)
+            if quote.security_type is not None:
+                print("Security Type: " + quote.security_type)
+            if quote.last_trade is not None:
+                print("Last Price: " + str(quote.last_trade))
+            if quote.change_close is not None and quote.change_close_pct is not None:
+                print("Today's Change: " + str('{:,.3f}'.format(quote.change_close)) + " (" +
+                      str(quote.change_close_pct) + "%)")
+            if quote.last_trade is not None:
+                print("Open: " + str('{:,.2f}'.format(quote.last_trade)))
+            if quote.previous_close is not None:
+                print("Previous Close: " + str('{:,.2f}'.format(quote.previous_close)))
+            if quote.bid is not None and quote.bid_size is not None:
+                print("Bid (Size): " + str('{:,.2f}'.format(quote.bid)) + "x" + str(quote.bid_size))
+            if quote.ask is not None and quote.ask_size is not None:
+                print("Ask (Size): " + str('{:,.2f}'.format(quote.ask)) + "x" + str(quote.ask_size))
+            if quote.low is not None and quote.high is not None:
+                print("Day's Range: " + str(quote.low) + "-" + str(quote.high))
+            if quote.total_volume is not None:
+                print("Volume: " + str('{:,}'.format(quote.total_volume)))
+
+        # Handle errors
+        for error in errors:
+            print("Error: " + error)
+        if not quotes and not errors:
             print("Error: Quote API service error")
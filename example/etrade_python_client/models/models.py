@@ -0,0 +1,78 @@
+class Position:
+    """
+    One portfolio position, decoded once from the Position object of the portfolio API.
+    Fields missing from the response are None
+    """
+    __slots__ = ("symbol", "security_type", "description", "quantity", "price_paid", "last_trade",
+                 "change", "change_pct", "volume", "market_value", "total_gain")
+
+    def __init__(self, symbol, security_type=None, description=None, quantity=None, price_paid=None,
+                 last_trade=None, change=None, change_pct=None, volume=None, market_value=None, total_gain=None):
+        self.symbol = symbol
+        self.security_type = security_type
+        self.description = description
+        self.quantity = quantity
+        self.price_paid = price_paid
+        self.last_trade = last_trade
+        self.change = change
+        self.change_pct = change_pct
+        self.volume = volume
+        self.market_value = market_value
+        self.total_gain = total_gain
+
+    @classmethod
+    def from_json(cls, position):
+        """
+        Decodes a Position object
+
+        :param position: Position dict from PortfolioResponse.AccountPortfolio
+        :return Position
+        """
+        product = position.get("Product") or {}
+        quick = position.get("Quick") or {}
+        return cls(product.get("symbol"), product.get("securityType"), position.get("symbolDescription"),
+                   position.get("quantity"), position.get("pricePaid"), quick.get("lastTrade"),
+                   quick.get("change"), quick.get("changePct"), quick.get("volume"),
+                   position.get("marketValue"), position.get("totalGain"))
+
+
+class Balance:
+    """
+    Account balance, decoded once from the BalanceResponse object of the balance API.
+    Fields missing from the response are None
+    """
+    __slots__ = ("account_id", "description", "net_value", "cash_buying_power", "margin_buying_power")
+
+    def __init__(self, account_id=None, description=None, net_value=None, cash_buying_power=None,
+                 margin_buying_power=None):
+        self.account_id = account_id
+        self.description = description
+        self.net_value = net_value
+        self.cash_buying_power = cash_buying_power
+        self.margin_buying_power = margin_buying_power
+
+    @classmethod
+    def from_json(cls, balance):
+        """
+        Decodes a BalanceResponse object
+
+        :param balance: BalanceResponse dict
+        :return Balance
+        """
+        computed = balance.get("Computed") or {}
+        real_time = computed.get("RealTimeValues") or {}
+        return cls(balance.get("accountId"), balance.get("accountDescription"), real_time.get("totalAccountValue"),
+                   computed.get("cashBuyingPower"), computed.get("marginBuyingPower"))
+
+
+def decode_positions(section):
+    """
+    Decodes the positions of one AccountPortfolio section
+
+    :param section: AccountPortfolio dict
+    :return list of Position
+    """
+    positions = section.get("Position") or []
+    if isinstance(positions, dict):
+        positions = [positions]
+    return [Position.from_json(position) for position in positions if position is not None]
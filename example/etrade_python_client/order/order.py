@@ -1,30 +1,40 @@
-import json
-import logging
-from logging.handlers import RotatingFileHandler
 import configparser
 import random
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from order.payload import OPTION_FIELDS, OrderRequest, build_preview_xml
+from tracing.tracing import logger, trace_response
+from transport.transport import REQUEST_TIMEOUT
 
 # loading configuration file
 config = configparser.ConfigParser()
 config.read('config.ini')
 
-# logger settings
-logger = logging.getLogger('my_logger')
-logger.setLevel(logging.DEBUG)
-handler = RotatingFileHandler("python_client.log", maxBytes=5 * 1024 * 1024, backupCount=3)
-FORMAT = "%(asctime)-15s %(message)s"
-fmt = logging.Formatter(FORMAT, datefmt='%m/%d/%Y %I:%M:%S %p')
-handler.setFormatter(fmt)
-logger.addHandler(handler)
+# Order statuses shown by view_orders: (API status, section title, print_orders status)
+ORDER_STATUSES = [("OPEN", "Open Orders", "open"),
+                  ("EXECUTED", "Executed Orders", "executed"),
+                  ("INDIVIDUAL_FILLS", "Individual Fills Orders", "indiv_fills"),
+                  ("CANCELLED", "Cancelled Orders", "cancelled"),
+                  ("REJECTED", "Rejected Orders", "rejected"),
+                  ("EXPIRED", "Expired Orders", "expired")]
+
+# Maximum number of orders requested per page of the orders API
+ORDERS_PAGE_SIZE = 100
+
+# Number of orders, most recent first, kept for "Select From Previous Orders"
+MAX_PREVIOUS_ORDERS = 100
 
 
 class Order:
 
-    def __init__(self, session, account, base_url):
+    def __init__(self, session, account, base_url, from_date=None, to_date=None):
         self.session = session
         self.account = account
         self.base_url = base_url
+        self.from_date = from_date
+        self.to_date = to_date
 
     def preview_order(self):
         """
@@ -43,40 +53,20 @@ class Order:
         # Add parameters and header information
         headers = {"Content-Type": "application/xml", "consumerKey": config["DEFAULT"]["CONSUMER_KEY"]}
 
-        # Add payload for POST Request
-        payload = """<PreviewOrderRequest>
-                       <orderType>EQ</orderType>
-                       <clientOrderId>{0}</clientOrderId>
-                       <Order>
-                           <allOrNone>false</allOrNone>
-                           <priceType>{1}</priceType>
-                           <orderTerm>{2}</orderTerm>
-                           <marketSession>REGULAR</marketSession>
-                           <stopPrice></stopPrice>
-                           <limitPrice>{3}</limitPrice>
-                           <Instrument>
-                               <Product>
-                                   <securityType>EQ</securityType>
-                                   <symbol>{4}</symbol>
-                               </Product>
-                               <orderAction>{5}</orderAction>
-                               <quantityType>QUANTITY</quantityType>
-                               <quantity>{6}</quantity>
-                           </Instrument>
-                       </Order>
-                   </PreviewOrderRequest>"""
-        payload = payload.format(order["client_order_id"], order["price_type"], order["order_term"],
-                                 order["limit_price"], order["symbol"], order["order_action"], order["quantity"])
+        # Build the escaped XML payload for the POST request
+        try:
+            payload = build_preview_xml(OrderRequest.from_order(order))
+        except ValueError as e:
+            print("Error: " + str(e))
+            return
 
         # Make API call for POST request
         response = self.session.post(url, header_auth=True, headers=headers, data=payload)
-        logger.debug("Request Header: %s", response.request.headers)
+        trace_response(response)
         logger.debug("Request payload: %s", payload)
 
         # Handle and parse response
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
             data = response.json()
             print("\nPreview Order:")
 
@@ -168,50 +158,22 @@ class Order:
                     # Add parameters and header information
                     headers = {"Content-Type": "application/xml", "consumerKey": config["DEFAULT"]["CONSUMER_KEY"]}
 
-                    # Add payload for POST Request
-                    payload = """<PreviewOrderRequest>
-                                   <orderType>{0}</orderType>
-                                   <clientOrderId>{1}</clientOrderId>
-                                   <Order>
-                                       <allOrNone>false</allOrNone>
-                                       <priceType>{2}</priceType>  
-                                       <orderTerm>{3}</orderTerm>   
-                                       <marketSession>REGULAR</marketSession>
-                                       <stopPrice></stopPrice>
-                                       <limitPrice>{4}</limitPrice>
-                                       <Instrument>
-                                           <Product>
-                                               <securityType>{5}</securityType>
-                                               <symbol>{6}</symbol>
-                                           </Product>
-                                           <orderAction>{7}</orderAction> 
-                                           <quantityType>QUANTITY</quantityType>
-                                           <quantity>{8}</quantity>
-                                       </Instrument>
-                                   </Order>
-                               </PreviewOrderRequest>"""
-
+                    # Build the escaped XML payload for the POST request, with a new client order ID
                     options_select = int(options_select)
                     prev_orders[options_select - 1]["client_order_id"] = str(random.randint(1000000000, 9999999999))
-                    payload = payload.format(prev_orders[options_select - 1]["order_type"],
-                                             prev_orders[options_select - 1]["client_order_id"],
-                                             prev_orders[options_select - 1]["price_type"],
-                                             prev_orders[options_select - 1]["order_term"],
-                                             prev_orders[options_select - 1]["limitPrice"],
-                                             prev_orders[options_select - 1]["security_type"],
-                                             prev_orders[options_select - 1]["symbol"],
-                                             prev_orders[options_select - 1]["order_action"],
-                                             prev_orders[options_select - 1]["quantity"])
+                    try:
+                        payload = build_preview_xml(OrderRequest.from_order(prev_orders[options_select - 1]))
+                    except ValueError as e:
+                        print("Error: " + str(e))
+                        break
 
                     # Make API call for POST request
                     response = session.post(url, header_auth=True, headers=headers, data=payload)
-                    logger.debug("Request Header: %s", response.request.headers)
+                    trace_response(response)
                     logger.debug("Request payload: %s", payload)
 
                     # Handle and parse response
                     if response is not None and response.status_code == 200:
-                        parsed = json.loads(response.text)
-                        logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
                         data = response.json()
                         print("\nPreview Order: ")
                         if data is not None and "PreviewOrderResponse" in data and "PreviewIds" in data["PreviewOrderResponse"]:
@@ -277,88 +239,93 @@ class Order:
     @staticmethod
     def print_orders(response, status):
         """
-        Formats and displays a list of orders
+        Formats and displays a list of orders. Lines are collected for the whole page and
+        written to stdout in one call instead of one print per order
 
         :param response: response object of a list of orders
         :param status: order status related to the response object
         :return a list of previous orders
         """
         prev_orders = []
+        lines = []
         if response is not None and "OrdersResponse" in response and "Order" in response["OrdersResponse"]:
             for order in response["OrdersResponse"]["Order"]:
                 if order is not None and "OrderDetail" in order:
                     for details in order["OrderDetail"]:
                         if details is not None and "Instrument" in details:
                             for instrument in details["Instrument"]:
-                                order_str = ""
+                                fields = []
                                 order_obj = {"price_type": None,
                                              "order_term": None,
                                              "order_indicator": None,
-                                             "order_type": None,
+                                             "order_type": order.get("orderType"),
                                              "security_type": None,
                                              "symbol": None,
                                              "order_action": None,
                                              "quantity": None}
-                                if order is not None and 'orderType' in order:
-                                    order_obj["order_type"] = order["orderType"]
+                                product = instrument.get("Product") or {}
 
-                                if order is not None and 'orderId' in order:
-                                    order_str += "Order #" + str(order["orderId"]) + " : "
+                                if "securityType" in product:
+                                    fields.append("Type: " + product["securityType"])
+                                    order_obj["security_type"] = product["securityType"]
 
-                                if instrument is not None and 'Product' in instrument \
-                                        and 'securityType' in instrument["Product"]:
-                                    order_str += "Type: " + instrument["Product"]["securityType"] + " | "
-                                    order_obj["security_type"] = instrument["Product"]["securityType"]
+                                # Option legs keep their contract so they can be previewed again
+                                for element, name in OPTION_FIELDS:
+                                    if element in product:
+                                        order_obj[name] = product[element]
 
-                                if instrument is not None and 'orderAction' in instrument:
-                                    order_str += "Order Type: " + instrument["orderAction"] + " | "
+                                if "orderAction" in instrument:
+                                    fields.append("Order Type: " + instrument["orderAction"])
                                     order_obj["order_action"] = instrument["orderAction"]
 
-                                if instrument is not None and 'orderedQuantity' in instrument:
-                                    order_str += "Quantity(Exec/Entered): " + str("{:,}".format(instrument["orderedQuantity"])) + " | "
+                                if "orderedQuantity" in instrument:
+                                    fields.append("Quantity(Exec/Entered): " + "{:,}".format(instrument["orderedQuantity"]))
                                     order_obj["quantity"] = instrument["orderedQuantity"]
 
-                                if instrument is not None and 'Product' in instrument and 'symbol' in instrument["Product"]:
-                                    order_str += "Symbol: " + instrument["Product"]["symbol"] + " | "
-                                    order_obj["symbol"] = instrument["Product"]["symbol"]
+                                if "symbol" in product:
+                                    fields.append("Symbol: " + product["symbol"])
+                                    order_obj["symbol"] = product["symbol"]
 
-                                if details is not None and 'priceType' in details:
-                                    order_str += "Price Type: " + details["priceType"] + " | "
+                                if "priceType" in details:
+                                    fields.append("Price Type: " + details["priceType"])
                                     order_obj["price_type"] = details["priceType"]
 
-                                if details is not None and 'orderTerm' in details:
-                                    order_str += "Term: " + details["orderTerm"] + " | "
+                                if "orderTerm" in details:
+                                    fields.append("Term: " + details["orderTerm"])
                                     order_obj["order_term"] = details["orderTerm"]
 
-                                if details is not None and 'limitPrice' in details:
-                                    order_str += "Price: " + str('${:,.2f}'.format(details["limitPrice"])) + " | "
+                                if "limitPrice" in details:
+                                    fields.append("Price: " + '${:,.2f}'.format(details["limitPrice"]))
                                     order_obj["limitPrice"] = details["limitPrice"]
 
-                                if status == "Open" and details is not None and 'netBid' in details:
-                                    order_str += "Bid: " + details["netBid"] + " | "
+                                if status == "Open" and "netBid" in details:
+                                    fields.append("Bid: " + details["netBid"])
                                     order_obj["bid"] = details["netBid"]
 
-                                if status == "Open" and details is not None and 'netAsk' in details:
-                                    order_str += "Ask: " + details["netAsk"] + " | "
+                                if status == "Open" and "netAsk" in details:
+                                    fields.append("Ask: " + details["netAsk"])
                                     order_obj["ask"] = details["netAsk"]
 
-                                if status == "Open" and details is not None and 'netPrice' in details:
-                                    order_str += "Last Price: " + details["netPrice"] + " | "
+                                if status == "Open" and "netPrice" in details:
+                                    fields.append("Last Price: " + details["netPrice"])
                                     order_obj["netPrice"] = details["netPrice"]
 
-                                if status == "indiv_fills" and instrument is not None and 'filledQuantity' in instrument:
-                                    order_str += "Quantity Executed: " + str("{:,}".format(instrument["filledQuantity"])) + " | "
+                                if status == "indiv_fills" and "filledQuantity" in instrument:
+                                    fields.append("Quantity Executed: " + "{:,}".format(instrument["filledQuantity"]))
                                     order_obj["quantity"] = instrument["filledQuantity"]
 
-                                if status != "open" and status != "expired" and status != "rejected" and instrument is not None \
-                                        and "averageExecutionPrice" in instrument:
-                                    order_str += "Price Executed: " + str('${:,.2f}'.format(instrument["averageExecutionPrice"])) + " | "
+                                if status not in ("open", "expired", "rejected") and "averageExecutionPrice" in instrument:
+                                    fields.append("Price Executed: " + '${:,.2f}'.format(instrument["averageExecutionPrice"]))
 
-                                if status != "expired" and status != "rejected" and details is not None and 'status' in details:
-                                    order_str += "Status: " + details["status"]
+                                if status not in ("expired", "rejected") and "status" in details:
+                                    fields.append("Status: " + details["status"])
 
-                                print(order_str)
+                                prefix = "Order #" + str(order["orderId"]) + " : " if "orderId" in order else ""
+                                lines.append(prefix + " | ".join(fields))
                                 prev_orders.append(order_obj)
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
         return prev_orders
 
     @staticmethod
@@ -472,8 +439,7 @@ class Order:
             # Make API call for GET request
             response_open = self.session.get(url, header_auth=True, params=params_open, headers=headers)
 
-            logger.debug("Request Header: %s", response_open.request.headers)
-            logger.debug("Response Body: %s", response_open.text)
+            trace_response(response_open)
 
             print("\nOpen Orders: ")
             # Handle and parse response
@@ -494,8 +460,6 @@ class Order:
                         print("Unknown Option Selected!")
                 break
             elif response_open.status_code == 200:
-                parsed = json.loads(response_open.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
                 data = response_open.json()
 
                 order_list = []
@@ -586,13 +550,11 @@ class Order:
 
                         # Add payload for PUT Request
                         response = self.session.put(url, header_auth=True, headers=headers, data=payload)
-                        logger.debug("Request Header: %s", response.request.headers)
+                        trace_response(response)
                         logger.debug("Request payload: %s", payload)
 
                         # Handle and parse response
                         if response is not None and response.status_code == 200:
-                            parsed = json.loads(response.text)
-                            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
                             data = response.json()
                             if data is not None and "CancelOrderResponse" in data \
                                     and "orderId" in data["CancelOrderResponse"]:
@@ -601,7 +563,6 @@ class Order:
                             else:
                                 # Handle errors
                                 logger.debug("Response Headers: %s", response.headers)
-                                logger.debug("Response Body: %s", response.text)
                                 data = response.json()
                                 if 'Error' in data and 'message' in data["Error"] \
                                         and data["Error"]["message"] is not None:
@@ -611,7 +572,6 @@ class Order:
                         else:
                             # Handle errors
                             logger.debug("Response Headers: %s", response.headers)
-                            logger.debug("Response Body: %s", response.text)
                             data = response.json()
                             if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                                 print("Error: " + data["Error"]["message"])
@@ -625,7 +585,6 @@ class Order:
                         print("Unknown Option Selected!")
                 else:
                     # Handle errors
-                    logger.debug("Response Body: %s", response_open.text)
                     if response_open is not None and response_open.headers['Content-Type'] == 'application/json' \
                             and "Error" in response_open.json() and "message" in response_open.json()["Error"] \
                             and response_open.json()["Error"]["message"] is not None:
@@ -635,7 +594,6 @@ class Order:
                     break
             else:
                 # Handle errors
-                logger.debug("Response Body: %s", response_open.text)
                 if response_open is not None and response_open.headers['Content-Type'] == 'application/json' \
                         and "Error" in response_open.json() and "message" in response_open.json()["Error"] \
                         and response_open.json()["Error"]["message"] is not None:
@@ -644,6 +602,80 @@ class Order:
                     print("Error: Balance API service error")
                 break
 
+    def fetch_orders_page(self, status, marker=None):
+        """
+        Calls orders API for one page of orders with the given status
+
+        :param status: order status to filter on, e.g. "OPEN"
+        :param marker: marker returned by the previous page, None for the first page
+        :return response object, or None when the request failed or timed out
+        """
+        # URL for the API endpoint
+        url = self.base_url + "/v1/accounts/" + self.account["accountIdKey"] + "/orders.json"
+
+        # Add parameters and header information
+        headers = {"consumerkey": config["DEFAULT"]["CONSUMER_KEY"]}
+        params = {"status": status, "count": ORDERS_PAGE_SIZE}
+        if marker is not None:
+            params["marker"] = marker
+        if self.from_date is not None and self.to_date is not None:
+            params["fromDate"] = self.from_date
+            params["toDate"] = self.to_date
+
+        # Make API call for GET request
+        try:
+            response = self.session.get(url, header_auth=True, params=params, headers=headers,
+                                        timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            logger.debug("Orders request failed: %s", e)
+            return None
+        trace_response(response)
+        return response
+
+    def order_pages(self, status, first_response=None):
+        """
+        Generator over the pages of orders with the given status, following the marker to the
+        last page. The next page is prefetched while the caller renders the current one.
+        When a page cannot be fetched an error is printed, so a truncated list is never silent
+
+        :param status: order status to filter on
+        :param first_response: response of the first page, if the caller already fetched it
+        :return iterator of parsed OrdersResponse pages
+        """
+        response = first_response if first_response is not None else self.fetch_orders_page(status)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                if response is not None and response.status_code == 204:
+                    return
+                if response is None or response.status_code != 200:
+                    print("Error: Order API service error, the remaining pages could not be loaded")
+                    return
+                data = response.json()
+                marker = None
+                if data is not None and "OrdersResponse" in data:
+                    marker = data["OrdersResponse"].get("marker")
+                future = executor.submit(self.fetch_orders_page, status, marker) if marker else None
+                yield data
+                if future is None:
+                    return
+                response = future.result()
+
+    def select_date_range(self):
+        """
+        Asks the user for the date range used to filter the order history
+        """
+        from_date = input("\nPlease input start date (MMDDYYYY), or press Enter to clear: ").strip()
+        if from_date == "":
+            self.from_date = None
+            self.to_date = None
+            return
+        to_date = input("Please input end date (MMDDYYYY): ").strip()
+        if re.match(r'^\d{8}$', from_date) and re.match(r'^\d{8}$', to_date):
+            self.from_date = from_date
+            self.to_date = to_date
+        else:
+            print("Unknown Date Format!")
+
     def view_orders(self):
         """
         Calls orders API to provide the details for the orders
@@ -651,131 +683,35 @@ class Order:
         :param self: Pass in authenticated session and information on selected account
         """
         while True:
-            # URL for the API endpoint
-            url = self.base_url + "/v1/accounts/" + self.account["accountIdKey"] + "/orders.json"
-
-            # Add parameters and header information
-            headers = {"consumerkey": config["DEFAULT"]["CONSUMER_KEY"]}
-            params_open = {"status": "OPEN"}
-            params_executed = {"status": "EXECUTED"}
-            params_indiv_fills = {"status": "INDIVIDUAL_FILLS"}
-            params_cancelled = {"status": "CANCELLED"}
-            params_rejected = {"status": "REJECTED"}
-            params_expired = {"status": "EXPIRED"}
-
-            # Make API call for GET request
-            response_open = self.session.get(url, header_auth=True, params=params_open, headers=headers)
-            response_executed = self.session.get(url, header_auth=True, params=params_executed, headers=headers)
-            response_indiv_fills = self.session.get(url, header_auth=True, params=params_indiv_fills, headers=headers)
-            response_cancelled = self.session.get(url, header_auth=True, params=params_cancelled, headers=headers)
-            response_rejected = self.session.get(url, header_auth=True, params=params_rejected, headers=headers)
-            response_expired = self.session.get(url, header_auth=True, params=params_expired, headers=headers)
-
+            # Make API calls for the first page of each order status, issued concurrently.
+            # Results are consumed in status order, so each section prints as soon as it arrives,
+            # and later pages of a section are streamed and printed one page at a time.
             prev_orders = []
-
-            # Open orders
-            logger.debug("Request Header: %s", response_open.request.headers)
-            logger.debug("Response Body: %s", response_open.text)
-
-            print("\nOpen Orders:")
-            # Handle and parse response
-            if response_open.status_code == 204:
-                logger.debug(response_open)
-                print("None")
-            elif response_open.status_code == 200:
-                parsed = json.loads(response_open.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_open.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "open"))
-
-            # Executed orders
-            logger.debug("Request Header: %s", response_executed.request.headers)
-            logger.debug("Response Body: %s", response_executed.text)
-            logger.debug(response_executed.text)
-
-            print("\nExecuted Orders:")
-            # Handle and parse response
-            if response_executed.status_code == 204:
-                logger.debug(response_executed)
-                print("None")
-            elif response_executed.status_code == 200:
-                parsed = json.loads(response_executed.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_executed.json()
-
-                # Display list of executed orders
-                prev_orders.extend(self.print_orders(data, "executed"))
-
-            # Individual fills orders
-            logger.debug("Request Header: %s", response_indiv_fills.request.headers)
-            logger.debug("Response Body: %s", response_indiv_fills.text)
-
-            print("\nIndividual Fills Orders:")
-            # Handle and parse response
-            if response_indiv_fills.status_code == 204:
-                logger.debug("Response Body: %s", response_indiv_fills)
-                print("None")
-            elif response_indiv_fills.status_code == 200:
-                parsed = json.loads(response_indiv_fills.text)
-                logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_indiv_fills.json()
-
-                # Display list of individual fills orders
-                prev_orders.extend(self.print_orders(data, "indiv_fills"))
-
-            # Cancelled orders
-            logger.debug("Request Header: %s", response_cancelled.request.headers)
-            logger.debug("Response Body: %s", response_cancelled.text)
-
-            print("\nCancelled Orders:")
-            # Handle and parse response
-            if response_cancelled.status_code == 204:
-                logger.debug(response_cancelled)
-                print("None")
-            elif response_cancelled.status_code == 200:
-                parsed = json.loads(response_cancelled.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_cancelled.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "cancelled"))
-
-            # Rejected orders
-            logger.debug("Request Header: %s", response_rejected.request.headers)
-            logger.debug("Response Body: %s", response_rejected.text)
-
-            print("\nRejected Orders:")
-            # Handle and parse response
-            if response_rejected.status_code == 204:
-                logger.debug(response_rejected)
-                print("None")
-            elif response_rejected.status_code == 200:
-                parsed = json.loads(response_rejected.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_rejected.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "rejected"))
-
-            # Expired orders
-            print("\nExpired Orders:")
-            # Handle and parse response
-            if response_expired.status_code == 204:
-                logger.debug(response_executed)
-                print("None")
-            elif response_expired.status_code == 200:
-                parsed = json.loads(response_expired.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_expired.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "expired"))
+            if self.from_date is not None:
+                print("\nOrders from " + self.from_date + " to " + self.to_date)
+            with ThreadPoolExecutor(max_workers=len(ORDER_STATUSES)) as executor:
+                responses = executor.map(lambda entry: self.fetch_orders_page(entry[0]), ORDER_STATUSES)
+
+                for (status, title, print_status), response in zip(ORDER_STATUSES, responses):
+                    print("\n" + title + ":")
+                    # Handle and parse response; a failed status does not stop the others
+                    if response is None:
+                        print("Error: Order API service error")
+                    elif response.status_code == 204:
+                        logger.debug(response)
+                        print("None")
+                    elif response.status_code == 200:
+                        # Display list of orders, page by page
+                        for data in self.order_pages(status, response):
+                            orders = self.print_orders(data, print_status)
+                            prev_orders.extend(orders[:MAX_PREVIOUS_ORDERS - len(prev_orders)])
+                    else:
+                        print("Error: Order API service error")
 
             menu_list = {"1": "Preview Order",
                          "2": "Cancel Order",
-                         "3": "Go Back"}
+                         "3": "Filter by Date Range",
+                         "4": "Go Back"}
 
             print("")
             options = menu_list.keys()
@@ -788,6 +724,8 @@ class Order:
             elif selection == "2":
                 self.cancel_order()
             elif selection == "3":
+                self.select_date_range()
+            elif selection == "4":
                 break
             else:
                 print("Unknown Option Selected!")
@@ -0,0 +1,196 @@
+"""
+Order payload compiler for the preview order API
+
+Builds escaped PreviewOrderRequest XML bodies for equities, single-leg options and multi-leg spreads.
+The layout of a body only depends on the shape of the order (the security type of each leg and
+whether a limit or stop price is sent), so each shape is compiled once into a cached template
+and every order only fills in its escaped values
+"""
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+ORDER_ACTIONS = {"EQ": ("BUY", "SELL", "BUY_TO_COVER", "SELL_SHORT"),
+                 "OPTN": ("BUY_OPEN", "SELL_OPEN", "BUY_CLOSE", "SELL_CLOSE")}
+PRICE_TYPES = ("MARKET", "LIMIT", "STOP", "STOP_LIMIT")
+SPREAD_PRICE_TYPES = ("NET_DEBIT", "NET_CREDIT", "NET_EVEN")
+LIMIT_PRICE_TYPES = ("LIMIT", "STOP_LIMIT", "NET_DEBIT", "NET_CREDIT")
+STOP_PRICE_TYPES = ("STOP", "STOP_LIMIT")
+ORDER_TERMS = ("GOOD_FOR_DAY", "IMMEDIATE_OR_CANCEL", "FILL_OR_KILL", "GOOD_UNTIL_CANCEL")
+OPTION_FIELDS = (("callPut", "call_put"), ("expiryYear", "expiry_year"), ("expiryMonth", "expiry_month"),
+                 ("expiryDay", "expiry_day"), ("strikePrice", "strike_price"))
+MAX_LEGS = 4
+
+
+class Leg:
+    """
+    One leg of an order. Option legs also carry the call/put, expiry date and strike price
+    """
+    __slots__ = ("security_type", "symbol", "order_action", "quantity",
+                 "call_put", "expiry_year", "expiry_month", "expiry_day", "strike_price")
+
+    def __init__(self, security_type, symbol, order_action, quantity, call_put=None,
+                 expiry_year=None, expiry_month=None, expiry_day=None, strike_price=None):
+        self.security_type = security_type
+        self.symbol = symbol
+        self.order_action = order_action
+        self.quantity = quantity
+        self.call_put = call_put
+        self.expiry_year = expiry_year
+        self.expiry_month = expiry_month
+        self.expiry_day = expiry_day
+        self.strike_price = strike_price
+
+    @classmethod
+    def from_order(cls, order):
+        """
+        Creates a leg from an order dict of user_select_order or print_orders
+
+        :param order: order dict
+        :return Leg
+        """
+        quantity = order.get("quantity")
+        if isinstance(quantity, float) and quantity.is_integer():
+            quantity = int(quantity)  # orderedQuantity of previous orders is a float
+        return cls(order.get("security_type") or "EQ", order.get("symbol"), order.get("order_action"),
+                   quantity, *(order.get(name) for _, name in OPTION_FIELDS))
+
+
+class OrderRequest:
+    """
+    An order to preview: one or more legs sharing the price type, term and prices
+    """
+    __slots__ = ("legs", "price_type", "order_term", "client_order_id", "limit_price", "stop_price")
+
+    def __init__(self, legs, price_type, order_term, client_order_id, limit_price=None, stop_price=None):
+        self.legs = legs
+        self.price_type = price_type
+        self.order_term = order_term
+        self.client_order_id = client_order_id
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+
+    @classmethod
+    def from_order(cls, order):
+        """
+        Creates a single-leg order from an order dict of user_select_order or print_orders
+
+        :param order: order dict
+        :return OrderRequest
+        """
+        limit_price = order.get("limit_price", order.get("limitPrice"))
+        return cls([Leg.from_order(order)], order.get("price_type"), order.get("order_term"),
+                   order.get("client_order_id"), limit_price, order.get("stop_price"))
+
+
+def is_positive(value):
+    try:
+        return 0 < float(value) < float("inf")
+    except (TypeError, ValueError):
+        return False
+
+
+def contract(leg):
+    """
+    :param leg: validated Leg
+    :return (call/put, expiry year, month, day, strike) with numbers normalized, all None for stock legs
+    """
+    if leg.security_type != "OPTN":
+        return None, None, None, None, None
+    return (leg.call_put, int(leg.expiry_year), int(leg.expiry_month), int(leg.expiry_day),
+            float(leg.strike_price))
+
+
+def validate(order):
+    """
+    Checks that an order can be sent
+
+    :param order: OrderRequest
+    :raise ValueError: with the reason when the order is invalid
+    """
+    if not 0 < len(order.legs) <= MAX_LEGS:
+        raise ValueError("An order needs 1 to " + str(MAX_LEGS) + " legs")
+    for leg in order.legs:
+        if leg.security_type not in ORDER_ACTIONS:
+            raise ValueError("Unsupported security type: " + str(leg.security_type))
+        if not leg.symbol:
+            raise ValueError("Symbol is required")
+        if leg.order_action not in ORDER_ACTIONS[leg.security_type]:
+            raise ValueError("Order action must be one of " + ", ".join(ORDER_ACTIONS[leg.security_type]))
+        if not is_positive(leg.quantity) or not float(leg.quantity).is_integer():
+            raise ValueError("Quantity must be a positive whole number")
+        if leg.security_type == "OPTN":
+            if leg.call_put not in ("CALL", "PUT"):
+                raise ValueError("Option legs need a CALL or PUT")
+            if not all(str(value).isdigit() for value in (leg.expiry_year, leg.expiry_month, leg.expiry_day)):
+                raise ValueError("Option legs need an expiry date")
+            if not is_positive(leg.strike_price):
+                raise ValueError("Option legs need a strike price")
+    if len(order.legs) > 1:
+        if len({leg.symbol for leg in order.legs}) > 1:
+            raise ValueError("All legs of a spread must have the same underlying symbol")
+        contracts = [contract(leg) for leg in order.legs]
+        if len(set(contracts)) < len(contracts):
+            raise ValueError("A spread cannot contain the same leg twice")
+
+    price_types = SPREAD_PRICE_TYPES if len(order.legs) > 1 else PRICE_TYPES
+    if order.price_type not in price_types:
+        raise ValueError("Price type must be one of " + ", ".join(price_types))
+    if order.price_type in LIMIT_PRICE_TYPES and not is_positive(order.limit_price):
+        raise ValueError(order.price_type + " orders need a limit price")
+    if order.price_type in STOP_PRICE_TYPES and not is_positive(order.stop_price):
+        raise ValueError(order.price_type + " orders need a stop price")
+    if order.order_term not in ORDER_TERMS:
+        raise ValueError("Order term must be one of " + ", ".join(ORDER_TERMS))
+    client_order_id = str(order.client_order_id or "")
+    if not client_order_id.isascii() or not client_order_id.isalnum() or len(client_order_id) > 20:
+        raise ValueError("Client order ID must be 1 to 20 letters or digits")
+
+
+@lru_cache(maxsize=None)
+def template(security_types, limit, stop):
+    """
+    Compiles the XML template of one order shape
+
+    :param security_types: tuple of the security type of each leg
+    :param limit: whether a limit price is sent
+    :param stop: whether a stop price is sent
+    :return template with %s placeholders, and a (leg index or None, attribute) pair for each placeholder
+    """
+    order_type = "SPREADS" if len(security_types) > 1 else security_types[0]
+    parts = ["<PreviewOrderRequest><orderType>" + order_type + "</orderType>"
+             "<clientOrderId>%s</clientOrderId><Order><allOrNone>false</allOrNone>"
+             "<priceType>%s</priceType><orderTerm>%s</orderTerm><marketSession>REGULAR</marketSession>"]
+    fields = [(None, "client_order_id"), (None, "price_type"), (None, "order_term")]
+    if limit:
+        parts.append("<limitPrice>%s</limitPrice>")
+        fields.append((None, "limit_price"))
+    if stop:
+        parts.append("<stopPrice>%s</stopPrice>")
+        fields.append((None, "stop_price"))
+    for index, security_type in enumerate(security_types):
+        parts.append("<Instrument><Product><securityType>" + security_type + "</securityType><symbol>%s</symbol>")
+        fields.append((index, "symbol"))
+        if security_type == "OPTN":
+            for element, name in OPTION_FIELDS:
+                parts.append("<" + element + ">%s</" + element + ">")
+                fields.append((index, name))
+        parts.append("</Product><orderAction>%s</orderAction>"
+                     "<quantityType>QUANTITY</quantityType><quantity>%s</quantity></Instrument>")
+        fields.extend([(index, "order_action"), (index, "quantity")])
+    parts.append("</Order></PreviewOrderRequest>")
+    return "".join(parts), tuple(fields)
+
+
+def build_preview_xml(order):
+    """
+    Validates an order and fills in the cached template of its shape
+
+    :param order: OrderRequest
+    :return PreviewOrderRequest XML body
+    :raise ValueError: when the order is invalid
+    """
+    validate(order)
+    text, fields = template(tuple(leg.security_type for leg in order.legs),
+                            order.price_type in LIMIT_PRICE_TYPES, order.price_type in STOP_PRICE_TYPES)
+    return text % tuple(escape(str(getattr(order if index is None else order.legs[index], name)))
+                        for index, name in fields)
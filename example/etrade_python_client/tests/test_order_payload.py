@@ -0,0 +1,64 @@
+"""
+Checks the order payload compiler: validation and escaping of the PreviewOrderRequest XML
+
+Run from the repository root or from example/etrade_python_client:
+
+    python -m unittest discover example/etrade_python_client/tests
+"""
+import os
+import sys
+import unittest
+from xml.etree import ElementTree
+
+# order.payload only uses the standard library, so it can be imported without config.ini
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from order.payload import Leg, OrderRequest, build_preview_xml, template, validate  # noqa: E402
+
+SYMBOL = 'A&B<"C">\'%s%%'
+
+
+def option_leg(strike, action="BUY_OPEN"):
+    return Leg("OPTN", SYMBOL, action, 1, "PUT", 2026, 11, 20, strike)
+
+
+class ValidateTest(unittest.TestCase):
+    def test_menu_input_strings_are_accepted(self):
+        validate(OrderRequest([Leg("EQ", "AAPL", "BUY", "10")], "LIMIT", "GOOD_FOR_DAY", "1234", "190.5"))
+
+    def test_invalid_orders_are_rejected(self):
+        orders = [OrderRequest([Leg("EQ", "AAPL", "BUY", "10.5")], "MARKET", "GOOD_FOR_DAY", "1234"),
+                  OrderRequest([Leg("EQ", "AAPL", "BUY", "10")], "LIMIT", "GOOD_FOR_DAY", "1234", "abc"),
+                  OrderRequest([Leg("EQ", "AAPL", "BUY", "10")], "MARKET", "GOOD_FOR_DAY", ""),
+                  OrderRequest([Leg("OPTN", "AAPL", "BUY_OPEN", 1, "PUT", 2026, 11, None, 10)], "MARKET",
+                               "GOOD_FOR_DAY", "1234"),
+                  OrderRequest([option_leg(10), option_leg("10.0", "SELL_OPEN")], "NET_EVEN", "GOOD_FOR_DAY",
+                               "1234")]
+        for order in orders:
+            with self.subTest(order=order):
+                self.assertRaises(ValueError, validate, order)
+
+
+class BuildPreviewXmlTest(unittest.TestCase):
+    def test_values_are_escaped(self):
+        order = OrderRequest([option_leg(12.5), option_leg(10, "SELL_OPEN")], "NET_CREDIT", "GOOD_FOR_DAY",
+                             "ABC1", 0.35)
+        root = ElementTree.fromstring(build_preview_xml(order))
+        self.assertEqual(root.findtext("orderType"), "SPREADS")
+        self.assertEqual([node.text for node in root.iter("symbol")], [SYMBOL, SYMBOL])
+        self.assertEqual([node.text for node in root.iter("strikePrice")], ["12.5", "10"])
+        self.assertEqual(root.findtext("Order/limitPrice"), "0.35")
+        self.assertIsNone(root.find("Order/stopPrice"))
+
+    def test_invalid_order_is_not_built(self):
+        order = OrderRequest([Leg("EQ", "AAPL", "BUY", 0)], "MARKET", "GOOD_FOR_DAY", "ABC1")
+        self.assertRaises(ValueError, build_preview_xml, order)
+
+    def test_shapes_share_a_template(self):
+        template.cache_clear()
+        for quantity in (1, 2, 3):
+            build_preview_xml(OrderRequest([Leg("EQ", "AAPL", "BUY", quantity)], "MARKET", "GOOD_FOR_DAY", "ABC1"))
+        self.assertEqual((template.cache_info().misses, template.cache_info().hits), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Checks that the quote cache seeded by a portfolio refresh serves the follow-up quote lookup
+
+Run from the repository root or from example/etrade_python_client:
+
+    python -m unittest discover example/etrade_python_client/tests
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+import requests
+from requests.adapters import HTTPAdapter
+
+CLIENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sample modules, imported by setUpModule
+accounts = market = None
+workdir = None
+original_cwd = None
+
+
+def setUpModule():
+    """
+    Imports the sample modules from a temporary working directory: they read config.ini and open
+    their log file in the working directory on import
+    """
+    global accounts, market, workdir, original_cwd
+    original_cwd = os.getcwd()
+    workdir = tempfile.TemporaryDirectory()
+    os.chdir(workdir.name)
+    sys.path.insert(0, CLIENT_DIR)
+    accounts = importlib.import_module("accounts.accounts")
+    market = importlib.import_module("market.market")
+
+
+def tearDownModule():
+    os.chdir(original_cwd)
+    sys.path.remove(CLIENT_DIR)
+    workdir.cleanup()
+
+
+BASE_URL = "https://api.example.test"
+
+PORTFOLIO = {"PortfolioResponse": {"AccountPortfolio": [{"totalPages": 1, "Position": [
+    {"Product": {"symbol": "AAPL", "securityType": "EQ"}, "symbolDescription": "AAPL", "quantity": 10,
+     "pricePaid": 150.0, "marketValue": 1905.0, "totalGain": 405.0,
+     "Quick": {"lastTrade": 190.5, "change": 1.25, "changePct": 0.66, "volume": 52000}},
+    {"Product": {"symbol": "MSFT", "securityType": "EQ"}, "symbolDescription": "MSFT", "quantity": 5,
+     "pricePaid": 300.0, "marketValue": 2100.0, "totalGain": 600.0,
+     "Quick": {"lastTrade": 420.0, "change": -2.5, "changePct": -0.59, "volume": 31000}}]}]}}
+
+
+class CannedAdapter(HTTPAdapter):
+    def __init__(self, bodies):
+        """
+        Adapter that answers every request from a dict of URL path to JSON body and records the requests
+
+        :param bodies: dict of URL path to response body
+        """
+        super().__init__()
+        self.bodies = bodies
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        response.url = request.url
+        response.elapsed = timedelta(0)
+        response._content = json.dumps(self.bodies[requests.utils.urlparse(request.url).path]).encode()
+        return response
+
+
+class Session(requests.Session):
+    def request(self, method, url, header_auth=False, **kwargs):
+        # header_auth is an OAuth1Session argument that plain sessions do not take
+        return super().request(method, url, **kwargs)
+
+
+class QuoteCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.adapter = CannedAdapter({"/v1/accounts/KEY/portfolio.json": PORTFOLIO})
+        self.session = Session()
+        self.session.mount("https://", self.adapter)
+        self.cache = market.QuoteCache()
+
+    def refresh_portfolio(self):
+        account = accounts.Accounts(self.session, BASE_URL)
+        account.account = {"accountIdKey": "KEY"}
+        with mock.patch.object(accounts, "quote_cache", self.cache), mock.patch("builtins.print"):
+            account.portfolio()
+
+    def test_quote_after_portfolio_refresh_makes_no_http_call(self):
+        self.refresh_portfolio()
+        self.assertEqual(len(self.adapter.requests), 1)
+
+        quotes = market.Market(self.session, BASE_URL, cache=self.cache)
+        with mock.patch("builtins.input", return_value="aapl,MSFT"), mock.patch("builtins.print") as printed:
+            quotes.quotes()
+
+        self.assertEqual(len(self.adapter.requests), 1)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        lines = [call.args[0] for call in printed.call_args_list if call.args]
+        self.assertIn("Last Price: 190.5", lines)
+        self.assertIn("Today's Change: -2.500 (-0.59%)", lines)
+
+    def test_quick_fields_are_seeded(self):
+        self.refresh_portfolio()
+        quote = self.cache.get("AAPL", market.QUICK_QUOTE_FIELDS)
+        self.assertIsNotNone(quote)
+        self.assertEqual((quote.last_trade, quote.total_volume, quote.bid), (190.5, 52000, None))
+
+    def test_stale_fields_are_not_returned(self):
+        cache = market.QuoteCache(field_ttl=dict(self.cache.field_ttl, bid=-1.0))
+        cache.update("AAPL", last_trade=190.5, bid=190.4)
+        self.assertIsNone(cache.get("AAPL", ("last_trade", "bid")))
+        self.assertIsNone(cache.get("AAPL", ("last_trade",)).bid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import atexit
+import configparser
+import json
+import logging
+import queue
+import random
+import re
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# loading configuration file
+config = configparser.ConfigParser()
+config.read('config.ini')
+
+# Default log settings, overridable from config.ini
+DEFAULT_LOG_FILE = "python_client.log"
+DEFAULT_LOG_LEVEL = "DEBUG"
+DEFAULT_LOG_SAMPLE_RATE = 1.0
+FORMAT = "%(asctime)-15s %(message)s"
+
+# OAuth parameters and headers whose values never reach the log file
+REDACTED_PARAMS = re.compile(r'(oauth_(?:consumer_key|token|signature|verifier)=)("?)[^",&\s]*')
+REDACTED_HEADERS = {"consumerkey", "cookie", "set-cookie"}
+
+
+class RedactedHeaders:
+    """
+    Headers rendered for the log with OAuth credentials masked. The masking runs only
+    when the record is written, on the writer thread
+    """
+    __slots__ = ("headers",)
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def __str__(self):
+        items = {}
+        for name, value in self.headers.items():
+            if name.lower() in REDACTED_HEADERS:
+                value = "***"
+            elif name.lower() == "authorization":
+                value = REDACTED_PARAMS.sub(r"\1\2***", value)
+            items[name] = value
+        return str(items)
+
+
+class RedactedUrl:
+    """Request URL rendered for the log with OAuth query parameters masked"""
+    __slots__ = ("url",)
+
+    def __init__(self, url):
+        self.url = url
+
+    def __str__(self):
+        return REDACTED_PARAMS.sub(r"\1\2***", self.url)
+
+
+class PrettyBody:
+    """
+    Response body pretty-printed as JSON for the log. Decoding, parsing and indenting happen
+    only when the record is written, so callers keep their single response.json()
+    """
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+    def __str__(self):
+        try:
+            return json.dumps(json.loads(self.content), indent=4, sort_keys=True)
+        except ValueError:
+            return self.content.decode("utf-8", "replace")
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the writer thread. The stock handler merges the
+    message arguments before queueing, which would run the lazy objects above on the caller
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def create_logger(log_config):
+    """
+    Configures the shared 'my_logger' with a single file handler fed through a queue and
+    a background writer thread. Safe to call more than once
+
+    :param log_config: DEFAULT section of config.ini
+    :return logger
+    """
+    logger = logging.getLogger('my_logger')
+    if getattr(logger, "queue_listener", None) is not None:
+        return logger
+
+    level = log_config.get("LOG_LEVEL", DEFAULT_LOG_LEVEL).upper()
+    logger.setLevel(getattr(logging, level, logging.DEBUG))
+    logger.propagate = False
+
+    handler = RotatingFileHandler(log_config.get("LOG_FILE", DEFAULT_LOG_FILE), maxBytes=5 * 1024 * 1024,
+                                  backupCount=3)
+    handler.setFormatter(logging.Formatter(FORMAT, datefmt='%m/%d/%Y %I:%M:%S %p'))
+
+    records = queue.SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(records))
+    logger.queue_listener = QueueListener(records, handler)
+    logger.queue_listener.start()
+    atexit.register(logger.queue_listener.stop)
+    return logger
+
+
+logger = create_logger(config["DEFAULT"])
+sample_rate = float(config["DEFAULT"].get("LOG_SAMPLE_RATE", DEFAULT_LOG_SAMPLE_RATE))
+
+
+def trace_response(response, body=True):
+    """
+    Writes one debug record for a request: method, URL, status, elapsed time, redacted
+    request headers and, optionally, the pretty-printed body. Returns at once when debug
+    logging is off or the request is not sampled (LOG_SAMPLE_RATE in config.ini)
+
+    :param response: response object
+    :param body: whether to include the response body
+    """
+    if response is None or not logger.isEnabledFor(logging.DEBUG):
+        return
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    request = response.request
+    elapsed = response.elapsed.total_seconds() * 1000 if response.elapsed is not None else 0.0
+    if body:
+        logger.debug("%s %s -> %s (%.0f ms)\nRequest Header: %s\nResponse Body: %s", request.method,
+                     RedactedUrl(request.url), response.status_code, elapsed, RedactedHeaders(request.headers),
+                     PrettyBody(response.content))
+    else:
+        logger.debug("%s %s -> %s (%.0f ms)\nRequest Header: %s", request.method, RedactedUrl(request.url),
+                     response.status_code, elapsed, RedactedHeaders(request.headers))
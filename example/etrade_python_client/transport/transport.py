@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('my_logger')
+
+# Default connection pool settings, overridable from config.ini
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 8
+
+# Seconds to wait for a response before giving up on a request
+REQUEST_TIMEOUT = 10
+
+# Default requests per second for each endpoint class, overridable from config.ini
+DEFAULT_RATE_LIMITS = {"market": 4.0, "accounts": 2.0, "orders": 2.0}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        Thread-safe token bucket refilled at rate tokens per second, holding at most capacity tokens
+
+        :param rate: tokens added per second
+        :param capacity: maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks the calling thread until a token is taken
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    def __init__(self, rates=None):
+        """
+        Client-side rate limiter with one token bucket per endpoint class
+
+        :param rates: dict of endpoint class to requests per second, 0 to disable
+        """
+        rates = rates or DEFAULT_RATE_LIMITS
+        self.buckets = {name: TokenBucket(rate, max(rate, 1)) for name, rate in rates.items() if rate > 0}
+
+    @staticmethod
+    def endpoint_class(url):
+        """
+        :param url: request URL
+        :return "market", "orders" or "accounts", or None for requests that are not throttled
+        """
+        path = urlsplit(url).path
+        if "/v1/market/" in path:
+            return "market"
+        if "/orders" in path:
+            return "orders"
+        if "/v1/accounts" in path:
+            return "accounts"
+        return None
+
+    def acquire(self, url):
+        """
+        Blocks until the endpoint class of the URL has a token
+
+        :param url: request URL
+        """
+        bucket = self.buckets.get(self.endpoint_class(url))
+        if bucket is not None:
+            bucket.acquire()
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    def __init__(self, limiter, **kwargs):
+        """
+        HTTP adapter that passes every request through the rate limiter before sending it
+
+        :param limiter: RateLimiter shared by all sessions
+        """
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(request.url)
+        return super().send(request, **kwargs)
+
+
+def create_rate_limiter(config=None):
+    """
+    Builds the rate limiter from the RATE_LIMIT_* settings
+
+    :param config: optional configparser section
+    :return RateLimiter
+    """
+    rates = dict(DEFAULT_RATE_LIMITS)
+    if config is not None:
+        for name in rates:
+            rates[name] = float(config.get("RATE_LIMIT_" + name.upper(), rates[name]))
+    return RateLimiter(rates)
+
+
+# Rate limiter shared by every session configured in this process
+rate_limiter = None
+
+
+def configure_transport(session, config=None):
+    """
+    Mounts a pooled, keep-alive, rate-limited HTTP adapter on the session so every Market,
+    Accounts and Order call made with it reuses the same TLS connections and shares one limiter
+
+    :param session: authenticated session
+    :param config: optional configparser section with POOL_CONNECTIONS / POOL_MAXSIZE
+    :return the same session, configured
+    """
+    pool_connections = DEFAULT_POOL_CONNECTIONS
+    pool_maxsize = DEFAULT_POOL_MAXSIZE
+    if config is not None:
+        pool_connections = int(config.get("POOL_CONNECTIONS", pool_connections))
+        pool_maxsize = int(config.get("POOL_MAXSIZE", pool_maxsize))
+
+    global rate_limiter
+    if rate_limiter is None:
+        rate_limiter = create_rate_limiter(config)
+
+    # pool_block caps the connections per host at pool_maxsize; extra requests wait for a free one
+    adapter = RateLimitedAdapter(rate_limiter, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                 pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def transport_stats(session):
+    """
+    Collects connection pool usage for the session
+
+    :param session: session configured with configure_transport
+    :return dict with the number of requests, new connections and reused connections
+    """
+    total_requests = 0
+    total_connections = 0
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total_requests += pool.num_requests
+                total_connections += pool.num_connections
+    return {"requests": total_requests,
+            "connections": total_connections,
+            "reused": max(total_requests - total_connections, 0)}
+
+
+def print_transport_stats(session):
+    """
+    Displays connection reuse for the session
+
+    :param session: session configured with configure_transport
+    """
+    stats = transport_stats(session)
+    logger.debug("Transport stats: %s", stats)
+    print("Requests: " + str(stats["requests"]) + " | New Connections: " + str(stats["connections"])
+          + " | Reused: " + str(stats["reused"]))
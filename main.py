@@ -1,267 +1,260 @@
 import sys
-import configparser
-import webbrowser
-import json
-from rauth import OAuth1Service, OAuth1Session
 
-# --- 颜色代码 (用于美化输出) ---
-class Colors:
-    GREEN = '\033[92m'
-    RED = '\033[91m'
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
-
-# 读取配置文件
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-# 检查配置是否存在
-if config["DEFAULT"]["CONSUMER_KEY"].startswith("PLEASE_ENTER"):
-    print("错误: 请先在 config.ini 中填入您的 Sandbox Key 和 Secret。")
-    sys.exit(1)
-
-# 配置环境参数
-CONSUMER_KEY = config["DEFAULT"]["CONSUMER_KEY"]
-CONSUMER_SECRET = config["DEFAULT"]["CONSUMER_SECRET"]
-# 自动选择 URL：优先读取 PROD，如果被注释则回退到 SANDBOX (根据您之前的修改，这里应该是 PROD)
-BASE_URL = config["DEFAULT"].get("PROD_BASE_URL", "https://api.etrade.com")
-
-def save_tokens(access_token, access_token_secret):
-    """将获取到的 Token 保存到 config.ini"""
-    config["DEFAULT"]["ACCESS_TOKEN"] = access_token
-    config["DEFAULT"]["ACCESS_TOKEN_SECRET"] = access_token_secret
-    with open('config.ini', 'w') as configfile:
-        config.write(configfile)
-    print(">>> 令牌已保存到 config.ini (有效期至今日美东时间午夜)")
-
-def clear_tokens():
-    """清理 config.ini 中的过期 Token"""
-    if "ACCESS_TOKEN" in config["DEFAULT"]:
-        del config["DEFAULT"]["ACCESS_TOKEN"]
-    if "ACCESS_TOKEN_SECRET" in config["DEFAULT"]:
-        del config["DEFAULT"]["ACCESS_TOKEN_SECRET"]
-    with open('config.ini', 'w') as configfile:
-        config.write(configfile)
-
-def get_session():
-    """获取会话：优先尝试读取本地 Token，如果没有则进行 OAuth 登录"""
-    access_token = config["DEFAULT"].get("ACCESS_TOKEN")
-    access_secret = config["DEFAULT"].get("ACCESS_TOKEN_SECRET")
-
-    if access_token and access_secret:
-        session = OAuth1Session(
-            consumer_key=CONSUMER_KEY,
-            consumer_secret=CONSUMER_SECRET,
-            access_token=access_token,
-            access_token_secret=access_secret,
-        )
-        return session
-    return oauth_login()
-
-def oauth_login():
-    """执行 OAuth 1.0a 认证流程"""
-    print("\n正在连接 E*TRADE 进行认证...")
-    
-    etrade = OAuth1Service(
-        name="etrade",
-        consumer_key=CONSUMER_KEY,
-        consumer_secret=CONSUMER_SECRET,
-        request_token_url=f"{BASE_URL}/oauth/request_token",
-        access_token_url=f"{BASE_URL}/oauth/access_token",
-        authorize_url="https://us.etrade.com/e/t/etws/authorize?key={}&token={}",
-        base_url=BASE_URL
-    )
-
-    request_token, request_token_secret = etrade.get_request_token(
-        params={"oauth_callback": "oob", "format": "json"}
-    )
-
-    authorize_url = etrade.authorize_url.format(etrade.consumer_key, request_token)
-    print(f"\n请在浏览器中打开以下链接进行授权:\n{authorize_url}")
-    webbrowser.open(authorize_url)
-
-    verifier = input("\n请输入浏览器页面显示的验证码 (Verifier Code): ")
-
-    session = etrade.get_auth_session(
-        request_token,
-        request_token_secret,
-        params={"oauth_verifier": verifier}
-    )
-    
-    print("认证成功！")
-    save_tokens(session.access_token, session.access_token_secret)
-    return session
-
-def retry_on_401(func):
-    """装饰器：处理 401 过期重试"""
-    def wrapper(session, *args, **kwargs):
-        response = func(session, *args, **kwargs)
-        if response.status_code == 401:
-            print(f"\n{Colors.RED}[提示] 令牌已过期，正在重新登录...{Colors.RESET}")
-            clear_tokens()
-            new_session = oauth_login()
-            # 更新引用，防止后续调用使用旧 session
-            # 注意：这里的 session 是传值，无法直接修改外部变量，但在当前函数栈内有效
-            return func(new_session, *args, **kwargs)
-        return response
-    return wrapper
-
-@retry_on_401
-def fetch_account_list(session):
-    return session.get(f"{BASE_URL}/v1/accounts/list.json")
-
-def list_accounts(session):
-    """获取并打印账户列表"""
-    response = fetch_account_list(session)
-
-    if response.status_code == 200:
-        data = response.json()
-        if "AccountListResponse" in data and "Accounts" in data["AccountListResponse"]:
-            accounts = data["AccountListResponse"]["Accounts"]["Account"]
-            print(f"\n{'='*40}")
-            print(f"{'账户ID':<20} | {'账户描述':<15} | {'类型'}")
-            print(f"{'-'*40}")
-            
-            if isinstance(accounts, dict): accounts = [accounts]
-
-            for acc in accounts:
-                print(f"{acc.get('accountId'):<20} | {acc.get('accountDesc'):<15} | {acc.get('accountType')}")
-            print(f"{'='*40}\n")
+# 注意：启动时只导入 sys 和轻量的 etrade_cli.config (config.ini 在第一次访问设置时才解析)。
+# 各子命令用到的模块 (rauth、requests 等) 都在命令真正执行时才导入，
+# 打印用法或参数出错时不需要为它们付出启动时间。
+from etrade_cli import config
+
+def pop_option(args, name, default=None):
+    """从参数列表中取出 `--name value` 形式的选项，返回其值"""
+    if name in args:
+        i = args.index(name)
+        if i + 1 < len(args):
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        del args[i]
+    return default
+
+def pop_flag(args, name):
+    """从参数列表中取出开关型选项，返回是否存在"""
+    if name in args:
+        args.remove(name)
+        return True
+    return False
+
+def print_usage():
+    print("用法:")
+    print("  python main.py account list       - 查看账户列表")
+    print("  python main.py account balance    - 查看资金余额")
+    print("  python main.py account positions  - 查看当前持仓 (P&L)")
+    print("  python main.py account summary    - 跨账户组合汇总 (权重、集中度、盈亏分布，需要 NumPy)")
+    print("  python main.py quote watch SYM... - 实时行情看板")
+    print("  python main.py orders preview --basket FILE [--account ID]")
+    print("                                    - 批量预览 CSV/JSON 篮子文件中的订单")
+    print("  python main.py orders place --basket FILE [--account ID] [--yes] [--new-batch [--ignore-unresolved]]")
+    print("                                    - 预览并下单；重新运行同一篮子只重试未成功的订单 (篮子改过内容也一样)，")
+    print("                                      结果未知的订单先在订单列表中确认；--new-batch 开始新批次重新下单")
+    print("  python main.py orders cancel --all|--symbol X[,Y]|--older-than T [--account ID] [--dry-run] [--yes]")
+    print("                                    - 跨账户并发撤销符合条件的挂单 (T 如 30s、15m、2h)")
+    print("  python main.py daemon [status|stop] [--concurrency N] - 前台运行常驻守护进程 (account 命令自动交给它执行)，或查询/停止")
+    print("\n选项:")
+    print("  --concurrency N                   - 并发请求的线程数 (默认 8)")
+    print("  --stats                           - 结束时打印连接复用统计")
+    print("  --refresh                         - 忽略本地缓存，重新获取账户列表")
+    print("  --interval S                      - quote watch 的基础轮询间隔秒数 (默认 2)")
+    print("  --format table|csv|json|ndjson    - account / orders 报表的输出格式 (默认 table)")
+    print("  --no-color                        - 关闭颜色 (输出不是终端时自动关闭)")
+    print("  --no-daemon                       - 即使守护进程在运行也在本进程中执行")
+
+def cmd_account_list(session, options, args):
+    from etrade_cli.accounts import list_accounts
+    return list_accounts(session, options["refresh"], options["format"])
+
+def cmd_account_balance(session, options, args):
+    from etrade_cli.accounts import cmd_account_balance
+    return cmd_account_balance(session, options["concurrency"], options["refresh"], options["format"])
+
+def cmd_account_positions(session, options, args):
+    from etrade_cli.accounts import cmd_account_positions
+    return cmd_account_positions(session, options["concurrency"], options["refresh"], options["format"])
+
+def cmd_account_summary(session, options, args):
+    try:
+        from etrade_cli.summary import cmd_account_summary
+    except ImportError as e:
+        if e.name != "numpy":
+            raise
+        print("错误: account summary 需要 NumPy，请先运行 pip install numpy。")
+        return 2
+    return cmd_account_summary(session, options["concurrency"], options["refresh"], options["format"])
+
+def cmd_quote_watch(session, options, args):
+    from etrade_cli.quotes import cmd_quote_watch
+    cmd_quote_watch(session, args, options["interval"], options["concurrency"])
+
+def cmd_orders_preview(session, options, args):
+    basket = pop_option(args, "--basket")
+    if not basket:
+        print("错误: orders preview 需要 --basket 文件 (CSV 或 JSON)。")
+        return 2
+    from etrade_cli.orders import cmd_orders_preview
+    return cmd_orders_preview(session, basket, pop_option(args, "--account"), options["concurrency"],
+                              options["refresh"], options["format"])
+
+def cmd_orders_place(session, options, args):
+    basket = pop_option(args, "--basket")
+    if not basket:
+        print("错误: orders place 需要 --basket 文件 (CSV 或 JSON)。")
+        return 2
+    from etrade_cli.orders import cmd_orders_place
+    return cmd_orders_place(session, basket, pop_option(args, "--account"), options["concurrency"],
+                            options["refresh"], options["format"], pop_flag(args, "--yes"),
+                            pop_flag(args, "--new-batch"), pop_flag(args, "--ignore-unresolved"))
+
+def cmd_orders_cancel(session, options, args):
+    cancel_all = pop_flag(args, "--all")
+    symbols = set()
+    while "--symbol" in args:
+        symbols.update(s.strip().upper() for s in (pop_option(args, "--symbol") or "").split(",") if s.strip())
+    older_than = pop_option(args, "--older-than")
+    if not (cancel_all or symbols or older_than):
+        print("错误: orders cancel 需要 --all、--symbol 或 --older-than 之一。")
+        return 2
+    from etrade_cli.orders import cmd_orders_cancel, parse_age
+    age = parse_age(older_than) if older_than else None
+    if older_than and age is None:
+        print("错误: --older-than 的格式应为数字加单位，如 30s、15m、2h、1d。")
+        return 2
+    return cmd_orders_cancel(session, symbols, age, pop_option(args, "--account"), options["concurrency"],
+                             options["refresh"], options["format"], pop_flag(args, "--yes"),
+                             pop_flag(args, "--dry-run"))
+
+# 子命令注册表: (命令组, 命令) -> 处理函数；处理函数内部才导入对应模块
+COMMANDS = {
+    ("account", "list"): cmd_account_list,
+    ("account", "balance"): cmd_account_balance,
+    ("account", "positions"): cmd_account_positions,
+    ("account", "summary"): cmd_account_summary,
+    ("quote", "watch"): cmd_quote_watch,
+    ("orders", "preview"): cmd_orders_preview,
+    ("orders", "place"): cmd_orders_place,
+    ("orders", "cancel"): cmd_orders_cancel,
+}
+
+def parse_args(args):
+    """解析选项和子命令，返回 (处理函数, options, 子命令参数)；参数有误或只需打印用法时返回 None"""
+    args = list(args)
+    try:
+        concurrency = int(pop_option(args, "--concurrency", config.DEFAULT_CONCURRENCY))
+    except ValueError:
+        concurrency = 0
+    if concurrency < 1:
+        print("错误: --concurrency 必须是正整数。")
+        return None
+    show_stats = pop_flag(args, "--stats")
+    refresh = pop_flag(args, "--refresh")
+    try:
+        interval = float(pop_option(args, "--interval", config.DEFAULT_WATCH_INTERVAL))
+    except ValueError:
+        interval = 0
+    if interval <= 0:
+        print("错误: --interval 必须是正数。")
+        return None
+    fmt = pop_option(args, "--format", "table")
+    if fmt not in config.OUTPUT_FORMATS:
+        print("错误: --format 只能是 table、csv、json 或 ndjson。")
+        return None
+    no_color = pop_flag(args, "--no-color")
+    no_daemon = pop_flag(args, "--no-daemon")
+
+    if len(args) < 2:
+        print_usage()
+        return None
+    handler = COMMANDS.get((args[0], args[1]))
+    if handler is None:
+        if args[0] in ("account", "orders"):
+            print(f"未知命令: {args[1]}")
         else:
-            print("未找到账户。")
+            print_usage()
+        return None
+    if args[0] == "quote" and len(args) < 3:
+        print_usage()
+        return None
+
+    options = {"concurrency": concurrency, "refresh": refresh, "interval": interval, "format": fmt,
+               "stats": show_stats, "color": not no_color, "daemon": not no_daemon and args[0] == "account"}
+    return handler, options, args[2:]
+
+def run(handler, options, args, session=None, tty=True):
+    """执行一条已解析的命令，返回退出码 (0 成功，1 认证或配额错误，2 参数错误)；
+    session 为 None 时新建会话 (守护进程中传入常驻会话)"""
+    from etrade_cli.colors import Colors, disable_colors, enable_colors
+    from etrade_cli.ratelimit import QuotaExceededError
+    from etrade_cli.session import AuthenticationError, get_session, print_transport_stats
+
+    # 被管道/重定向或输出机器可读格式时不输出 ANSI 颜色
+    if not options["color"] or options["format"] != "table" or not tty:
+        disable_colors()
     else:
-        print(f"请求失败: {response.status_code} - {response.text}")
-
-def get_portfolio_data(session, account_key):
-    """获取单个账户的持仓数据"""
-    url = f"{BASE_URL}/v1/accounts/{account_key}/portfolio.json"
-    response = session.get(url)
-    
-    if response.status_code == 200:
-        data = response.json()
-        if "PortfolioResponse" in data and "AccountPortfolio" in data["PortfolioResponse"]:
-            return data["PortfolioResponse"]["AccountPortfolio"]
-    return None
-
-def cmd_account_positions(session):
-    """处理 'account positions' 命令"""
-    
-    # 1. 获取账户列表
-    response = fetch_account_list(session)
-    if response.status_code != 200:
-        print(f"无法获取账户列表。Code: {response.status_code}")
-        return
-
-    data = response.json()
-    if "AccountListResponse" not in data or "Accounts" not in data["AccountListResponse"]:
-        print("名下没有账户。")
-        return
-
-    accounts = data["AccountListResponse"]["Accounts"]["Account"]
-    if isinstance(accounts, dict): accounts = [accounts]
-
-    # 2. 遍历每个账户获取持仓
-    for acc in accounts:
-        acc_desc = acc.get('accountDesc', 'Unknown Account')
-        acc_id = acc.get('accountId')
-        acc_key = acc.get('accountIdKey')
-
-        print(f"\n{Colors.BOLD}账户: {acc_desc} ({acc_id}){Colors.RESET}")
-        
-        # 表头
-        print(f"{'-'*135}")
-        print(f"{'Symbol':<20} | {'Name':<25} | {'Qty':>8} | {'Paid ($)':>10} | {'Price ($)':>10} | {'Mkt Value ($)':>14} | {'P&L ($)':>12} | {'P&L %':>10}")
-        print(f"{'-'*135}")
-
-        portfolios = get_portfolio_data(session, acc_key)
-        
-        if not portfolios:
-            print("  (无持仓或无法获取数据)")
-            continue
-
-        # AccountPortfolio 可能是列表（如果有多页或其他情况），通常只有一项
-        for p_section in portfolios:
-            positions = p_section.get("Position", [])
-            if not positions:
-                continue
-                
-            for pos in positions:
-                # 提取数据
-                product = pos.get("Product", {})
-                symbol = product.get("symbol", "N/A")
-                description = pos.get("symbolDescription", "N/A")[:25] # 截断太长的名字
-                
-                qty = pos.get("quantity", 0)
-                price_paid = pos.get("pricePaid", 0) # 平均成本
-                
-                # 获取当前价格 (Quick 字段通常包含实时/延时数据)
-                current_price = pos.get("Quick", {}).get("lastTrade", 0)
-                market_value = pos.get("marketValue", 0)
-                total_gain = pos.get("totalGain", 0)
-                total_gain_pct = pos.get("totalGainPct", 0)
-
-                # 设置颜色：盈利绿色，亏损红色
-                pl_color = Colors.GREEN if total_gain >= 0 else Colors.RED
-                
-                # 格式化输出行
-                print(f"{symbol:<20} | {description:<25} | {qty:>8.2f} | {price_paid:>10.2f} | {current_price:>10.2f} | {market_value:>14.2f} | {pl_color}{total_gain:>12.2f}{Colors.RESET} | {pl_color}{total_gain_pct:>9.2f}%{Colors.RESET}")
-
-        print(f"{'-'*135}")
-
-def cmd_account_balance(session):
-    """处理 'account balance' 命令"""
-    response = fetch_account_list(session)
-    if response.status_code != 200:
-        return
-
-    data = response.json()
-    accounts = data["AccountListResponse"]["Accounts"]["Account"]
-    if isinstance(accounts, dict): accounts = [accounts]
-
-    print(f"\n{'='*85}")
-    print(f"{'账户描述':<20} | {'净资产 (Net Value)':<18} | {'现金购买力':<15} | {'保证金购买力'}")
-    print(f"{'-'*85}")
-
-    for acc in accounts:
-        # 获取余额
-        url = f"{BASE_URL}/v1/accounts/{acc['accountIdKey']}/balance.json"
-        params = {"instType": acc.get("institutionType", "BROKERAGE"), "realTimeNAV": "true"}
-        bal_res = session.get(url, params=params, headers={"consumerkey": CONSUMER_KEY})
-        
-        net_value = 0.0
-        cash_power = 0.0
-        margin_power = 0.0
-
-        if bal_res.status_code == 200:
-            b_data = bal_res.json().get("BalanceResponse", {})
-            computed = b_data.get("Computed", {})
-            real_time = computed.get("RealTimeValues", {})
-            net_value = real_time.get("totalAccountValue", computed.get("totalAccountValue", 0))
-            cash_power = computed.get("cashBuyingPower", 0)
-            margin_power = computed.get("marginBuyingPower", 0)
-
-        print(f"{acc.get('accountDesc'):<20} | ${net_value:<17,.2f} | ${cash_power:<14,.2f} | ${margin_power:,.2f}")
-    print(f"{'='*85}\n")
+        enable_colors()
+
+    try:
+        if session is None:
+            session = get_session(pool_size=options["concurrency"])
+        code = handler(session, options, args) or 0
+    except (QuotaExceededError, AuthenticationError) as e:
+        print(f"{Colors.RED}错误: {e}{Colors.RESET}", file=sys.stderr)
+        return 1
+
+    if options["stats"]:
+        print_transport_stats(session)
+    return code
+
+def execute(argv, session, tty):
+    """守护进程中执行客户端转来的一条命令，返回退出码"""
+    parsed = parse_args(argv)
+    return run(*parsed, session=session, tty=tty) if parsed else 2
+
+def cmd_daemon(args):
+    """daemon [status|stop] [--concurrency N]：在前台运行守护进程，或查询/停止正在运行的守护进程；返回退出码"""
+    from etrade_cli import daemon
+    args = list(args)
+    try:
+        concurrency = int(pop_option(args, "--concurrency", config.DEFAULT_CONCURRENCY))
+    except ValueError:
+        concurrency = 0
+    if concurrency < 1:
+        print("错误: --concurrency 必须是正整数。")
+        return 2
+    action = args[0] if args else "start"
+    if action == "start" and len(args) <= 1:
+        # 启动时就完成登录并导入各子命令模块，之后的命令不再为这些付出时间
+        from etrade_cli.session import get_session
+        import etrade_cli.accounts  # noqa: F401
+        try:
+            import etrade_cli.summary  # noqa: F401
+        except ImportError:
+            pass
+        session = get_session(pool_size=concurrency)
+        # 守护进程执行命令时 stdin 仍是守护进程自己的，不能在命令中途提示客户端输入验证码
+        session.manager.forbid_login("令牌已失效，需要重新登录；守护进程无法交互式登录，"
+                                     "请加 --no-daemon 在终端中运行一次命令完成授权 (守护进程会自动换用新令牌)")
+        daemon.serve(execute, session)
+        return 0
+    if action == "status" and len(args) == 1:
+        reply = daemon.request({"status": True})
+        if reply is None:
+            print("守护进程没有运行。")
+            return 1
+        print(f"守护进程运行中: pid {reply['pid']}，已运行 {reply['uptime']:.0f}s，处理命令 {reply['served']} 条")
+        return 0
+    if action == "stop" and len(args) == 1:
+        if daemon.request({"stop": True}):
+            print("守护进程已停止。")
+            return 0
+        print("守护进程没有运行。")
+        return 1
+    print_usage()
+    return 2
 
 def main():
-    if len(sys.argv) < 3 or sys.argv[1] != "account":
-        print("用法:")
-        print("  python main.py account list       - 查看账户列表")
-        print("  python main.py account balance    - 查看资金余额")
-        print("  python main.py account positions  - 查看当前持仓 (P&L)")
-        return
-
-    session = get_session()
-    command = sys.argv[2]
-
-    if command == "list":
-        list_accounts(session)
-    elif command == "balance":
-        cmd_account_balance(session)
-    elif command == "positions":
-        cmd_account_positions(session)
-    else:
-        print(f"未知命令: {command}")
+    """解析并执行命令行，返回进程退出码"""
+    args = sys.argv[1:]
+    if args[:1] == ["daemon"]:
+        return cmd_daemon(args[1:])
+    parsed = parse_args(args)
+    if parsed is None:
+        return 2
+    handler, options, rest = parsed
+
+    # 有守护进程在运行时 account 命令交给它执行 (复用已认证的会话和长连接)，退出码由守护进程回传
+    if options["daemon"]:
+        from etrade_cli.daemon import forward
+        code = forward(args, sys.stdout.isatty())
+        if code is not None:
+            return code
+    return run(handler, options, rest, tty=sys.stdout.isatty())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""orders place 的核心路径：订单内容键、下单日志回放、下单结果的状态归类，以及结果未知时禁止开始新批次
+
+    python -m unittest discover tests
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+from unittest import mock
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli import config, orders  # noqa: E402
+from etrade_cli.journal import UNRESOLVED, OrderJournal  # noqa: E402
+from etrade_cli.models import Account  # noqa: E402
+from etrade_cli.orders import BasketOrder, order_keys, place_order, submit_order  # noqa: E402
+from etrade_cli.payload import Leg  # noqa: E402
+
+# config 的设置是按需从 config.ini 读取的 (mock.patch 取原值时也会触发读取)，测试直接改模块字典
+SETTINGS = {"BASE_URL": "http://etrade.test", "CONSUMER_KEY": "ck", "JSON_BACKEND": "json"}
+
+ACCOUNT = Account("80000000", "KEY0", "Account 0")
+OTHER = Account("80000001", "KEY1", "Account 1")
+
+def basket_order(line, symbol="AAPL", quantity=10, account=ACCOUNT, **kwargs):
+    return BasketOrder(line, account, [Leg(symbol, "BUY", quantity)], **kwargs)
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = body if isinstance(body, bytes) else json.dumps(body).encode()
+
+class Session:
+    """按顺序返回预设的响应 (或抛出预设的异常)，记录请求的 URL"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.urls = []
+
+    def post(self, url, **kwargs):
+        self.urls.append(url)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+PREVIEW = Response(200, {"PreviewOrderResponse": {"PreviewIds": [{"previewId": 7}],
+                                                  "Order": [{"estimatedTotalAmount": 1000.5}]}})
+PLACED = Response(200, {"PlaceOrderResponse": {"OrderIds": [{"orderId": 5001}], "placedTime": 1}})
+
+def error(status_code, code, message):
+    return Response(status_code, {"Error": {"code": code, "message": message}})
+
+class OrderKeysTest(unittest.TestCase):
+    def test_key_ignores_line_numbers(self):
+        before = order_keys([basket_order(2), basket_order(3, "MSFT", 5)])
+        after = order_keys([basket_order(2, "IBM", 3), basket_order(3), basket_order(4, "MSFT", 5)])
+        self.assertEqual(after[1:], before)
+
+    def test_identical_rows_are_numbered(self):
+        keys = order_keys([basket_order(2), basket_order(3), basket_order(4)])
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual([key.rsplit("-", 1)[1] for key in keys], ["1", "2", "3"])
+
+    def test_content_changes_the_key(self):
+        base = order_keys([basket_order(2)])[0]
+        variants = [basket_order(2, quantity=11), basket_order(2, account=OTHER),
+                    basket_order(2, price_type="LIMIT", limit_price=190.0), basket_order(2, client_order_id="ABC1"),
+                    BasketOrder(2, ACCOUNT, [Leg("AAPL", "BUY_OPEN", 10, "CALL", date(2026, 11, 20), 190.0)])]
+        keys = {order_keys([order])[0] for order in variants}
+        self.assertEqual(len(keys), len(variants))
+        self.assertNotIn(base, keys)
+
+class JournalReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal.jsonl")
+        self.basket = os.path.join(self.tmp.name, "basket.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def journal(self, batch, basket=None):
+        journal = OrderJournal(self.path, basket or self.basket)
+        journal.batch = batch
+        return journal
+
+    def test_replay_merges_states_per_batch(self):
+        first, second = self.journal("b1"), self.journal("b2")
+        first.record({"key": "k1", "line": 2, "state": "new", "client_order_id": "A1"})
+        second.record({"key": "k1", "line": 2, "state": "new", "client_order_id": "B1"})
+        first.record({"key": "k1", "line": 2, "state": "placing", "preview_id": 7},
+                     {"key": "k2", "line": 3, "state": "new", "client_order_id": "A2"})
+        first.record({"key": "k1", "line": 2, "state": "placed", "order_id": 5001})
+        self.journal("b3", os.path.join(self.tmp.name, "other.csv")).record({"key": "k1", "state": "unknown"})
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"batch": "b1", "basket": ')  # 写到一半中断的行
+
+        batches = OrderJournal(self.path, self.basket).replay()
+        self.assertEqual(list(batches), ["b2", "b1"])  # 最后写入的批次排在最后
+        entry = batches["b1"]["k1"]
+        self.assertEqual((entry["state"], entry["client_order_id"], entry["order_id"], entry["preview_id"]),
+                         ("placed", "A1", 5001, 7))
+        self.assertEqual(batches["b1"]["k2"]["state"], "new")
+        self.assertEqual(batches["b2"]["k1"]["client_order_id"], "B1")
+
+    def test_missing_journal_is_empty(self):
+        self.assertEqual(OrderJournal(self.path, self.basket).replay(), {})
+
+class PlaceOrderTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(vars(config), SETTINGS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def state(self, response):
+        order = basket_order(2, client_order_id="ABC1")
+        return place_order(Session(response), order, 7)[0]
+
+    def test_accepted_order_is_placed(self):
+        order = basket_order(2, client_order_id="ABC1")
+        self.assertEqual(place_order(Session(PLACED), order, 7)[:2], ("placed", 5001))
+
+    def test_duplicate_client_order_id_means_placed(self):
+        self.assertEqual(self.state(error(400, 1019, "Order already exists")), "placed")
+
+    def test_client_errors_are_rejected(self):
+        self.assertEqual(self.state(error(400, 1037, "Invalid symbol")), "rejected")
+        self.assertEqual(self.state(error(400, 1037, "Duplicate symbol in basket")), "rejected")
+        self.assertEqual(self.state(Response(200, {"PlaceOrderResponse": {}})), "rejected")
+
+    def test_uncertain_outcomes_are_unknown(self):
+        for response in (error(500, 100, "Internal error"), error(503, None, "Service unavailable"),
+                         Response(502, b"<html>Bad Gateway</html>"), Response(504, b""),
+                         error(408, None, "Request timeout"), error(429, None, "Too many requests"),
+                         requests.Timeout(), requests.ConnectionError()):
+            with self.subTest(response=response):
+                state = self.state(response)
+                self.assertEqual(state, "unknown")
+                self.assertIn(state, UNRESOLVED)
+
+class PlaceBatchTest(unittest.TestCase):
+    """网关 5xx 后订单可能已被接受：记为 unknown，不加 --ignore-unresolved 就不能开始新批次"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.basket = os.path.join(self.tmp.name, "basket.csv")
+        with open(self.basket, "w") as f:
+            f.write("symbol,action,quantity\nAAPL,BUY,10\n")
+        patcher = mock.patch.dict(vars(config), SETTINGS, ORDER_JOURNAL=os.path.join(self.tmp.name, "journal.jsonl"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(orders, "get_accounts", return_value=[ACCOUNT])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def place(self, session, **kwargs):
+        with redirect_stdout(io.StringIO()) as out, mock.patch("sys.stderr", io.StringIO()):
+            code = orders.cmd_orders_place(session, self.basket, yes=True, fmt="csv", **kwargs)
+        return code, out.getvalue()
+
+    def test_gateway_error_blocks_new_batch(self):
+        session = Session(PREVIEW, error(503, None, "Service unavailable"))
+        self.assertEqual(self.place(session)[0], 1)
+
+        code, out = self.place(Session(), new_batch=True)
+        self.assertEqual(code, 1)
+        self.assertIn("--ignore-unresolved", out)
+
+    def test_submit_records_each_state(self):
+        journal = OrderJournal(config.ORDER_JOURNAL, self.basket)
+        journal.batch = "b1"
+        order = basket_order(2, client_order_id="ABC1")
+        self.assertEqual(submit_order(Session(PREVIEW, PLACED), journal, order, "k1")[:2], ("placed", 5001))
+        self.assertEqual(submit_order(Session(PREVIEW, error(400, 1037, "Invalid symbol")), journal, order, "k2")[0],
+                         "rejected")
+        self.assertEqual(submit_order(Session(error(400, 1037, "Invalid symbol")), journal, order, "k3")[0],
+                         "preview_failed")
+        self.assertEqual(submit_order(Session(PREVIEW, requests.Timeout()), journal, order, "k4")[0], "unknown")
+        entries = journal.replay()["b1"]
+        self.assertEqual({key: entry["state"] for key, entry in entries.items()},
+                         {"k1": "placed", "k2": "rejected", "k3": "preview_failed", "k4": "unknown"})
+        self.assertIn("sent", entries["k4"])
+
+if __name__ == "__main__":
+    unittest.main()
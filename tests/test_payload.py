@@ -0,0 +1,162 @@
+"""订单请求体编译器：校验规则、JSON / XML 转义，以及与示例客户端 (example/.../order/payload.py) 校验规则的一致性
+
+示例客户端是独立的脚本目录，不能导入 etrade_cli，两边各有一份校验规则；这里用同一组订单分别交给两边校验，
+要求接受 / 拒绝的结论一致，改了一边的规则而没改另一边会在这里失败。
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import sys
+import unittest
+from datetime import date
+from xml.etree import ElementTree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from etrade_cli import payload  # noqa: E402
+from etrade_cli.payload import Leg, OrderSpec  # noqa: E402
+
+# 示例客户端的 order.payload 只依赖标准库，导入时不读 config.ini、不打开日志
+sys.path.insert(0, os.path.join(ROOT, "example", "etrade_python_client"))
+from order import payload as example  # noqa: E402
+
+EXPIRY = date(2026, 11, 20)
+
+def stock(symbol="AAPL", action="BUY", quantity=10):
+    return (symbol, action, quantity, None, None, None)
+
+def option(call_put="CALL", strike=190.0, action="BUY_OPEN", quantity=1, symbol="AAPL", expiry=EXPIRY):
+    return (symbol, action, quantity, call_put, expiry, strike)
+
+# (说明, 各腿, 订单参数)；各腿为 (symbol, action, quantity, call_put, expiry, strike)
+CASES = [
+    ("market stock", [stock()], {}),
+    ("limit stock", [stock()], {"price_type": "LIMIT", "limit_price": 190.5}),
+    ("stop limit", [stock(action="SELL")], {"price_type": "STOP_LIMIT", "limit_price": 180.0, "stop_price": 181.0}),
+    ("single option", [option()], {"price_type": "LIMIT", "limit_price": 2.5}),
+    ("vertical spread", [option(strike=190.0), option(strike=195.0, action="SELL_OPEN")],
+     {"price_type": "NET_DEBIT", "limit_price": 1.2}),
+    ("covered call", [stock(), option(action="SELL_OPEN")], {"price_type": "NET_EVEN"}),
+    ("four legs", [option(strike=s) for s in (180.0, 185.0, 195.0, 200.0)], {"price_type": "NET_CREDIT",
+                                                                           "limit_price": 0.8}),
+    ("escaped symbol", [stock(symbol="AT&T")], {}),
+    ("no legs", [], {}),
+    ("five legs", [option(strike=s) for s in (180.0, 185.0, 190.0, 195.0, 200.0)], {"price_type": "NET_EVEN"}),
+    ("empty symbol", [stock(symbol="")], {}),
+    ("stock with option action", [stock(action="BUY_OPEN")], {}),
+    ("option with stock action", [option(action="BUY")], {}),
+    ("unknown action", [stock(action="HOLD")], {}),
+    ("zero quantity", [stock(quantity=0)], {}),
+    ("negative quantity", [stock(quantity=-5)], {}),
+    ("bad call_put", [option(call_put="C")], {}),
+    ("zero strike", [option(strike=0.0)], {}),
+    ("spread symbols differ", [option(), option(symbol="MSFT", strike=195.0)], {"price_type": "NET_EVEN"}),
+    ("duplicate leg", [option(), option(action="SELL_OPEN")], {"price_type": "NET_EVEN"}),
+    ("duplicate stock leg", [stock(), stock(action="SELL")], {"price_type": "NET_EVEN"}),
+    ("spread price type on stock", [stock()], {"price_type": "NET_DEBIT", "limit_price": 1.0}),
+    ("stock price type on spread", [option(), option(strike=195.0)], {"price_type": "LIMIT", "limit_price": 1.0}),
+    ("limit without price", [stock()], {"price_type": "LIMIT"}),
+    ("negative limit", [stock()], {"price_type": "LIMIT", "limit_price": -1.0}),
+    ("infinite limit", [stock()], {"price_type": "LIMIT", "limit_price": float("inf")}),
+    ("stop without price", [stock()], {"price_type": "STOP"}),
+    ("unknown price type", [stock()], {"price_type": "PEGGED"}),
+    ("unknown order term", [stock()], {"order_term": "FOREVER"}),
+    ("client id too long", [stock()], {"client_order_id": "A" * 21}),
+    ("client id punctuation", [stock()], {"client_order_id": "ABC-1"}),
+    ("client id non ascii", [stock()], {"client_order_id": "ÄBC1"}),
+]
+
+def cli_order(legs, price_type="MARKET", order_term="GOOD_FOR_DAY", limit_price=None, stop_price=None,
+              client_order_id="ABC1"):
+    return OrderSpec([Leg(*leg) for leg in legs], price_type, order_term, limit_price, stop_price, client_order_id)
+
+def example_order(legs, price_type="MARKET", order_term="GOOD_FOR_DAY", limit_price=None, stop_price=None,
+                  client_order_id="ABC1"):
+    converted = []
+    for symbol, action, quantity, call_put, expiry, strike in legs:
+        if call_put is None:
+            converted.append(example.Leg("EQ", symbol, action, quantity))
+        else:
+            converted.append(example.Leg("OPTN", symbol, action, quantity, call_put, expiry.year, expiry.month,
+                                         expiry.day, strike))
+    return example.OrderRequest(converted, price_type, order_term, client_order_id, limit_price, stop_price)
+
+def accepted(validate, order):
+    try:
+        validate(order)
+    except ValueError:
+        return False
+    return True
+
+class ParityTest(unittest.TestCase):
+    def test_rule_tables_match(self):
+        self.assertEqual(example.ORDER_ACTIONS, {"EQ": payload.ORDER_ACTIONS, "OPTN": payload.OPTION_ACTIONS})
+        for name in ("PRICE_TYPES", "SPREAD_PRICE_TYPES", "LIMIT_PRICE_TYPES", "STOP_PRICE_TYPES", "ORDER_TERMS",
+                     "MAX_LEGS"):
+            self.assertEqual(getattr(example, name), getattr(payload, name), name)
+
+    def test_validators_agree(self):
+        for name, legs, kwargs in CASES:
+            with self.subTest(name):
+                expected = accepted(payload.validate, cli_order(legs, **kwargs))
+                self.assertEqual(accepted(example.validate, example_order(legs, **kwargs)), expected)
+
+    def test_cases_cover_both_outcomes(self):
+        outcomes = [accepted(payload.validate, cli_order(legs, **kwargs)) for _, legs, kwargs in CASES]
+        self.assertEqual(outcomes.index(False), 8)  # 前 8 个合法，其余都应被拒绝
+        self.assertTrue(all(outcomes[:8]) and not any(outcomes[8:]))
+
+class ValidateTest(unittest.TestCase):
+    def test_types_are_strict(self):
+        for leg in (Leg("AAPL", "BUY", "10"), Leg("AAPL", "BUY", 10.0), Leg("AAPL", "BUY", True),
+                    Leg("AAPL", "BUY_OPEN", 1, "CALL", "2026-11-20", 190.0)):
+            with self.subTest(leg=leg):
+                self.assertRaises(ValueError, payload.validate, OrderSpec([leg]))
+
+    def test_unassigned_client_order_id_is_allowed(self):
+        payload.validate(OrderSpec([Leg("AAPL", "BUY", 10)], client_order_id=""))
+
+    def test_spread_errors_name_the_leg(self):
+        with self.assertRaisesRegex(ValueError, "第 2 条腿"):
+            payload.validate(OrderSpec([Leg(*option()), Leg(*option(strike=0.0))], "NET_EVEN"))
+
+class BuildTest(unittest.TestCase):
+    SYMBOL = 'A&B<"C">\'%s%%\\'
+
+    def order(self, **kwargs):
+        legs = [Leg(self.SYMBOL, "BUY_OPEN", 1, "PUT", EXPIRY, 12.5), Leg(self.SYMBOL, "SELL_OPEN", 1, "PUT", EXPIRY,
+                                                                        10.0)]
+        return OrderSpec(legs, "NET_CREDIT", limit_price=0.35, client_order_id="ABC1", **kwargs)
+
+    def test_json_escapes_values(self):
+        request = json.loads(payload.build(self.order(), "PlaceOrderRequest", preview_id=42))["PlaceOrderRequest"]
+        self.assertEqual(request["orderType"], "SPREADS")
+        self.assertEqual(request["PreviewIds"], [{"previewId": 42}])
+        detail = request["Order"][0]
+        self.assertEqual((detail["priceType"], detail["limitPrice"], detail["allOrNone"]), ("NET_CREDIT", 0.35, False))
+        self.assertNotIn("stopPrice", detail)
+        products = [instrument["Product"] for instrument in detail["Instrument"]]
+        self.assertEqual([product["symbol"] for product in products], [self.SYMBOL] * 2)
+        self.assertEqual((products[0]["expiryYear"], products[0]["expiryMonth"], products[0]["expiryDay"],
+                          products[0]["strikePrice"]), (2026, 11, 20, 12.5))
+
+    def test_xml_escapes_values(self):
+        root = ElementTree.fromstring(payload.build(self.order(), fmt="xml"))
+        self.assertEqual(root.tag, "PreviewOrderRequest")
+        self.assertEqual([node.text for node in root.iter("symbol")], [self.SYMBOL] * 2)
+        self.assertEqual(root.findtext("Order/limitPrice"), "0.35")
+        self.assertIsNone(root.find("PreviewIds"))
+
+    def test_build_validates(self):
+        self.assertRaises(ValueError, payload.build, OrderSpec([Leg("AAPL", "BUY", 0)]))
+        self.assertRaises(ValueError, payload.build, self.order(), fmt="yaml")
+
+    def test_shapes_share_a_template(self):
+        payload.template.cache_clear()
+        for quantity in (1, 2, 3):
+            payload.build(OrderSpec([Leg("AAPL", "BUY", quantity)]))
+        self.assertEqual((payload.template.cache_info().misses, payload.template.cache_info().hits), (1, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""quote watch 的轮询间隔：按本地限流器 (market 令牌桶与当日配额) 估算余量，响应的 X-RateLimit-* 头优先
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli import config, ratelimit  # noqa: E402
+from etrade_cli.quotes import next_poll_interval  # noqa: E402
+from etrade_cli.ratelimit import RateLimiter  # noqa: E402
+
+class Response:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class Noon(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 10, 16, 12, 0)
+
+class NextPollIntervalTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(vars(config), {"WATCH_MAX_INTERVAL": 60.0, "QUOTA_FLUSH_EVERY": 20})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def limiter(self, rate=4, daily_quota=0):
+        limiter = RateLimiter({"market": rate}, os.path.join(self.tmp.name, "quota.json"), daily_quota)
+        self.addCleanup(limiter.flush)
+        return limiter
+
+    def test_backs_off_when_the_bucket_is_nearly_used(self):
+        # 每 1 秒 4 次请求正好用完每秒 4 个令牌
+        self.assertEqual(next_poll_interval(1.0, 1.0, [Response()] * 4, self.limiter()), 1.5)
+
+    def test_returns_to_base_with_headroom(self):
+        self.assertEqual(next_poll_interval(4.0, 1.0, [Response()] * 4, self.limiter()), 3.2)
+        self.assertEqual(next_poll_interval(1.0, 1.0, [Response()], self.limiter()), 1.0)
+
+    def test_daily_quota_limits_the_rate(self):
+        # 中午起每 5 秒 1 次，到午夜还需 8640 次，远超当日配额
+        limiter = self.limiter(rate=0, daily_quota=100)
+        patcher = mock.patch.object(ratelimit, "datetime", Noon)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertEqual(next_poll_interval(5.0, 1.0, [Response()], limiter), 7.5)
+        self.assertEqual(limiter.headroom("market", 1, 5.0), 0.0)
+        self.assertAlmostEqual(self.limiter(rate=0, daily_quota=86400).headroom("market", 1, 5.0), 0.9)
+
+    def test_headers_override_the_limiter(self):
+        headers = {"X-RateLimit-Remaining": "50", "X-RateLimit-Limit": "100"}
+        self.assertEqual(next_poll_interval(1.0, 1.0, [Response(headers=headers)] * 4, self.limiter()), 1.0)
+        headers = {"X-RateLimit-Remaining": "5", "X-RateLimit-Limit": "100"}
+        self.assertEqual(next_poll_interval(1.0, 1.0, [Response(headers=headers)], self.limiter()), 1.5)
+
+    def test_throttled_responses_double_the_interval(self):
+        self.assertEqual(next_poll_interval(2.0, 1.0, [Response(), Response(429)], self.limiter()), 4.0)
+        self.assertEqual(next_poll_interval(40.0, 1.0, [None]), 60.0)
+
+    def test_no_limits_means_no_backoff(self):
+        self.assertIsNone(self.limiter(rate=0).headroom("market", 10, 1.0))
+        self.assertEqual(next_poll_interval(2.0, 1.0, [Response()] * 10, self.limiter(rate=0)), 1.6)
+
+if __name__ == "__main__":
+    unittest.main()
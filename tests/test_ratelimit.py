@@ -0,0 +1,69 @@
+"""当日配额：多个进程 (这里用共享同一配额文件的多个 RateLimiter 模拟) 合计不超过 DAILY_QUOTA
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etrade_cli import config  # noqa: E402
+from etrade_cli.ratelimit import QuotaExceededError, RateLimiter  # noqa: E402
+
+class DailyQuotaTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(vars(config), {"QUOTA_FLUSH_EVERY": 20, "QUOTA_PROCESSES": 4})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "quota.json")
+
+    def limiter(self, daily_quota):
+        limiter = RateLimiter({}, self.path, daily_quota)
+        self.addCleanup(limiter.flush)
+        return limiter
+
+    def on_disk(self):
+        with open(self.path) as f:
+            return json.load(f).get(time.strftime("%Y-%m-%d"), 0)
+
+    def calls(self, limiter, n):
+        made = 0
+        for _ in range(n):
+            try:
+                limiter.count()
+            except QuotaExceededError:
+                break
+            made += 1
+        return made
+
+    def test_processes_together_stay_under_the_quota(self):
+        limiters = [self.limiter(200) for _ in range(3)]
+        made = 0
+        for _ in range(100):
+            made += sum(self.calls(limiter, 3) for limiter in limiters)
+        for limiter in limiters:
+            limiter.flush()
+        self.assertEqual((made, self.on_disk()), (200, 200))
+        self.assertRaises(QuotaExceededError, self.limiter(200).count)
+
+    def test_far_from_the_quota_writes_in_batches(self):
+        limiter = self.limiter(1000)
+        self.calls(limiter, 19)
+        self.assertFalse(os.path.exists(self.path))
+        self.calls(limiter, 1)
+        self.assertEqual(self.on_disk(), 20)
+
+    def test_unlimited_quota_never_refuses(self):
+        limiter = self.limiter(0)
+        self.assertEqual(self.calls(limiter, 50), 50)
+        limiter.flush()
+        self.assertEqual(self.on_disk(), 50)
+
+if __name__ == "__main__":
+    unittest.main()